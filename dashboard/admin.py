@@ -1,11 +1,91 @@
 from django.contrib import admin
-from .models import Match
+from django.db.models import Q
+from .models import Match, ModelFit, Season, SeasonAlias, Team, TeamAlias, TeamRating, TeamSeasonStats
+from .services.aggregates import refresh_seasons
+from .services.seasons import resolve_or_create_seasons
+from .services.versioning import bump_season_version
+
+
+class TeamAliasInline(admin.TabularInline):
+    model = TeamAlias
+    extra = 1
+
+
+@admin.register(Team)
+class TeamAdmin(admin.ModelAdmin):
+    list_display = ['name', 'key']
+    search_fields = ['name', 'aliases__alias']
+    inlines = [TeamAliasInline]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'name' in form.changed_data:
+            # Season snapshots and cached charts carry the team's name
+            seasons = Match.objects.filter(Q(home_team=obj) | Q(away_team=obj)).values_list('season', flat=True)
+            for season in sorted(set(seasons)):
+                bump_season_version(season)
+
+
+class SeasonAliasInline(admin.TabularInline):
+    model = SeasonAlias
+    extra = 1
+
+
+@admin.register(Season)
+class SeasonAdmin(admin.ModelAdmin):
+    list_display = ['key', 'name', 'start_year']
+    search_fields = ['key', 'name', 'aliases__alias']
+    inlines = [SeasonAliasInline]
 
 
 @admin.register(Match)
 class MatchAdmin(admin.ModelAdmin):
     list_display = ['date', 'home_team', 'away_team', 'home_goals', 'away_goals', 'result', 'season']
     list_filter = ['season', 'result', 'date']
-    search_fields = ['home_team', 'away_team']
+    list_select_related = ['home_team', 'away_team']
+    search_fields = ['home_team__name', 'away_team__name']
     ordering = ['-date']
     date_hierarchy = 'date'
+
+    # Edits go through refresh_seasons like the loaders' writes, so the
+    # aggregates are rebuilt and the data version moves on for the snapshots
+    # and chart cache of every process.
+    def save_model(self, request, obj, form, change):
+        old_season = Match.objects.filter(pk=obj.pk).values_list('season', flat=True).first() if change else None
+        obj.season = resolve_or_create_seasons({obj.season})[obj.season]
+        obj.result = 'H' if obj.home_goals > obj.away_goals else ('A' if obj.away_goals > obj.home_goals else 'D')
+        super().save_model(request, obj, form, change)
+        refresh_seasons({obj.season, old_season} - {None})
+
+    def delete_model(self, request, obj):
+        season = obj.season
+        super().delete_model(request, obj)
+        refresh_seasons([season])
+
+    def delete_queryset(self, request, queryset):
+        seasons = set(queryset.values_list('season', flat=True))
+        super().delete_queryset(request, queryset)
+        refresh_seasons(seasons)
+
+
+@admin.register(TeamSeasonStats)
+class TeamSeasonStatsAdmin(admin.ModelAdmin):
+    list_display = ['team', 'season', 'played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'points']
+    list_filter = ['season']
+    list_select_related = ['team']
+    search_fields = ['team__name']
+
+
+class TeamRatingInline(admin.TabularInline):
+    model = TeamRating
+    fields = ['team', 'attack', 'defence']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(ModelFit)
+class ModelFitAdmin(admin.ModelAdmin):
+    list_display = ['season', 'window', 'matches', 'home_advantage', 'rho', 'iterations', 'fitted_at']
+    readonly_fields = list_display + ['log_likelihood']
+    inlines = [TeamRatingInline]
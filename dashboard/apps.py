@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .services.timing import install_query_counter
+        connection_created.connect(install_query_counter)
@@ -0,0 +1,40 @@
+import os
+from django.core.cache.backends.filebased import FileBasedCache
+
+_MISSING = object()
+
+
+class LRUFileBasedCache(FileBasedCache):
+    """FileBasedCache that culls the least recently used entries instead of a random sample.
+
+    Expiry lives inside each file, so a hit is free to set the file's mtime
+    to now; culling then removes the oldest-touched files first. Files are
+    shared between processes, so this is LRU across the whole deployment.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+        try:
+            os.utime(self._key_to_file(key, version))
+        except FileNotFoundError:
+            pass
+        return value
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+
+        def last_used(fname):
+            try:
+                return os.path.getmtime(fname)
+            except FileNotFoundError:
+                return 0
+
+        for fname in sorted(filelist, key=last_used)[:int(num_entries / self._cull_frequency)]:
+            self._delete(fname)
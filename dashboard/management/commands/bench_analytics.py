@@ -0,0 +1,85 @@
+import time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from dashboard.services.analytics import TeamSeries, season_team_rows
+
+
+def _loop_team_series(team, matches):
+    # The per-row computation the team views used before services/analytics.py
+    rows = []
+    for m in matches:
+        is_home = m['home_team'] == team
+        gf = m['home_goals'] if is_home else m['away_goals']
+        ga = m['away_goals'] if is_home else m['home_goals']
+        if gf == ga: pts = 1
+        elif gf > ga: pts = 3
+        else: pts = 0
+        rows.append({'date': m['date'], 'points': pts, 'gd': gf - ga})
+    df = pd.DataFrame(rows)
+    df['rolling_avg'] = df['points'].rolling(window=5, min_periods=1).mean()
+    df['cumulative'] = df['points'].cumsum()
+    return df
+
+
+class Command(BaseCommand):
+    help = 'Compare the vectorised team analytics against the old per-row loops on a synthetic season'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, default=5000, help='Matches in the synthetic season')
+        parser.add_argument('--teams', type=int, default=40, help='Teams in the synthetic season')
+        parser.add_argument('--repeat', type=int, default=3, help='Timing runs; the best one is reported')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        n, n_teams = options['matches'], options['teams']
+        teams = np.array([f'Team {i:03d}' for i in range(n_teams)], dtype=object)
+        home = rng.integers(0, n_teams, n)
+        away = (home + rng.integers(1, n_teams, n)) % n_teams
+        dates = np.array([date(2024, 8, 1) + timedelta(days=int(d)) for d in np.sort(rng.integers(0, 300, n))], dtype=object)
+        home_goals = rng.poisson(1.5, n)
+        away_goals = rng.poisson(1.2, n)
+        matches = [
+            {'date': d, 'home_team': teams[h], 'away_team': teams[a], 'home_goals': int(hg), 'away_goals': int(ag)}
+            for d, h, a, hg, ag in zip(dates, home, away, home_goals, away_goals)
+        ]
+
+        def best_of(fn):
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                result = fn()
+                timings.append(time.perf_counter() - started)
+            return min(timings), result
+
+        # Both sides start from each team's own matches, as the views get them from the database
+        by_team = {team: [m for m in matches if team in (m['home_team'], m['away_team'])] for team in teams}
+        loop_time, loop_result = best_of(lambda: {team: _loop_team_series(team, by_team[team]) for team in teams})
+        season_time, rows = best_of(lambda: season_team_rows(
+            np.arange(n), dates, teams[home], teams[away], home_goals, away_goals))
+
+        columns = ('date', 'opponent', 'is_home', 'goals_for', 'goals_against')
+        team_columns = {team: [rows[c][rows['team'] == team] for c in columns] for team in teams}
+
+        def per_team():
+            result = {}
+            for team in teams:
+                series = TeamSeries(team, *team_columns[team])
+                result[team] = (series.rolling_form, series.cumulative_points)
+            return result
+
+        team_time, team_result = best_of(per_team)
+
+        for team in teams:
+            rolling, cumulative = team_result[team]
+            expected = loop_result[team]
+            assert np.allclose(rolling, expected['rolling_avg']), team
+            assert (cumulative == expected['cumulative'].to_numpy()).all(), team
+
+        self.stdout.write(f'{n} matches, {n_teams} teams (best of {options["repeat"]})')
+        self.stdout.write(f'  per-row loops, every team:     {loop_time * 1000:8.1f} ms')
+        self.stdout.write(f'  season_team_rows, every team:  {season_time * 1000:8.1f} ms  ({loop_time / season_time:.0f}x)')
+        self.stdout.write(f'  TeamSeries, every team:        {team_time * 1000:8.1f} ms  ({loop_time / team_time:.0f}x)')
+        self.stdout.write(self.style.SUCCESS('Vectorised results match the per-row loops.'))
@@ -0,0 +1,167 @@
+import io
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, reverse
+from dashboard import urls as dashboard_urls
+from dashboard.models import Match
+from dashboard.services.synthetic import synthetic_matches, write_csv, write_statsbomb_mirror
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every dashboard endpoint and the ingest commands against a synthetic league'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seasons', type=int, default=1, help='Synthetic seasons to generate (1-50)')
+        parser.add_argument('--teams', type=int, default=20, help='Teams per season (20-100)')
+        parser.add_argument('--requests', type=int, default=20, help='Timed requests per endpoint')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', type=str, help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', type=str, help='Results JSON from an earlier run to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative slowdown against the baseline before failing')
+        parser.add_argument('--skip-png', action='store_true', help='Leave out the matplotlib image endpoints')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['seasons'] <= 50:
+            raise CommandError('--seasons must be between 1 and 50.')
+        if not 20 <= options['teams'] <= 100:
+            raise CommandError('--teams must be between 20 and 100.')
+
+        # Everything runs against a throwaway test database
+        setup_test_environment(debug=True)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        payload = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(payload)
+            self.stdout.write(f'Results written to {options["output"]}')
+        else:
+            self.stdout.write(payload)
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                regressions = compare(json.load(f), results, options['tolerance'])
+            if regressions:
+                raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def run(self, options):
+        matches = list(synthetic_matches(options['seasons'], options['teams'], options['seed']))
+        results = {
+            'config': {key: options[key] for key in ('seasons', 'teams', 'requests', 'seed', 'skip_png')},
+            'ingest': {},
+            'endpoints': {},
+        }
+
+        # StatsBomb import from an offline open-data mirror, into an empty database
+        with tempfile.TemporaryDirectory() as tmp:
+            pairs = write_statsbomb_mirror(tmp, matches)
+            started = time.perf_counter()
+            call_command('import_statsbomb', *pairs, source_dir=tmp, stdout=io.StringIO())
+            results['ingest']['import_statsbomb'] = _rate(len(matches), time.perf_counter() - started)
+        self.stdout.write(f'import_statsbomb: {results["ingest"]["import_statsbomb"]["rows_per_sec"]:.0f} rows/sec')
+
+        # CSV load over the same fixtures: clear first so every row is inserted
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'synthetic.csv')
+            write_csv(csv_path, matches)
+            started = time.perf_counter()
+            call_command('load_matches', file=csv_path, clear=True, stdout=io.StringIO())
+            results['ingest']['load_matches'] = _rate(len(matches), time.perf_counter() - started)
+        self.stdout.write(f'load_matches: {results["ingest"]["load_matches"]["rows_per_sec"]:.0f} rows/sec')
+
+        season = Match.objects.values_list('season', flat=True).first()
+        team1, team2 = sorted({m['home_team'] for m in matches})[:2]
+        client = Client()
+        for name, url in endpoint_urls(season, team1, team2, options['skip_png']):
+            caches['charts'].clear()
+            results['endpoints'][name] = measure(client, url, options['requests'])
+            timing = results['endpoints'][name]
+            self.stdout.write(f'{name}: p50 {timing["p50_ms"]:.1f} ms, p99 {timing["p99_ms"]:.1f} ms, '
+                              f'{timing["queries"]} queries')
+        return results
+
+
+def _rate(rows, seconds):
+    return {'rows': rows, 'seconds': round(seconds, 4), 'rows_per_sec': rows / seconds if seconds else 0.0}
+
+
+def endpoint_urls(season, team1, team2, skip_png=False):
+    """One concrete URL per named route in dashboard/urls.py."""
+    query = f'?season={season}&team1={team1}&team2={team2}&opponent={team2}&home={team1}&away={team2}'
+    for pattern in dashboard_urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        if skip_png and pattern.name.startswith('api_mpl'):
+            continue
+        kwargs = {'team_name': team1} if 'team_name' in pattern.pattern.converters else {}
+        url = reverse(f'{dashboard_urls.app_name}:{pattern.name}', kwargs=kwargs)
+        yield pattern.name, url + (query if url.startswith('/api/') else '')
+
+
+def measure(client, url, requests):
+    """Latency percentiles plus the query count of a warm request."""
+    started = time.perf_counter()
+    response = client.get(url)
+    first = time.perf_counter() - started
+    if response.status_code >= 400:
+        raise CommandError(f'{url} returned {response.status_code}')
+
+    timings = []
+    for _ in range(requests):
+        reset_queries()
+        started = time.perf_counter()
+        client.get(url)
+        timings.append(time.perf_counter() - started)
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+
+    ms = np.array(timings) * 1000
+    return {
+        'status': response.status_code,
+        'first_ms': round(first * 1000, 3),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p90_ms': round(float(np.percentile(ms, 90)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'queries': len(queries),
+    }
+
+
+def compare(baseline, current, tolerance, floor_ms=1.0):
+    """List the ways ``current`` is slower than ``baseline``.
+
+    Latency counts as a regression only when it is more than ``tolerance``
+    slower and at least ``floor_ms`` slower, so sub-millisecond jitter is
+    ignored. Any extra query counts.
+    """
+    regressions = []
+    for name, before in baseline.get('endpoints', {}).items():
+        after = current['endpoints'].get(name)
+        if after is None:
+            continue
+        for key in ('p50_ms', 'p90_ms'):
+            if after[key] > before[key] * (1 + tolerance) and after[key] - before[key] > floor_ms:
+                regressions.append(f'{name} {key}: {before[key]:.1f} -> {after[key]:.1f}')
+        if after['queries'] > before['queries']:
+            regressions.append(f'{name} queries: {before["queries"]} -> {after["queries"]}')
+    for name, before in baseline.get('ingest', {}).items():
+        after = current['ingest'].get(name)
+        if after and after['rows_per_sec'] < before['rows_per_sec'] * (1 - tolerance):
+            regressions.append(f'{name} rows/sec: {before["rows_per_sec"]:.0f} -> {after["rows_per_sec"]:.0f}')
+    return regressions
@@ -0,0 +1,121 @@
+import json
+import time
+import tracemalloc
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from dashboard.models import Match, Team
+
+MIB = 1024 * 1024
+
+
+def insert_matches(rows, teams, batch_size=5000):
+    """Insert ``rows`` synthetic matches: every ordered pair of ``teams`` teams plays once a day."""
+    team_ids = [Team.objects.create(name=f'Export Team {i:03d}', key=f'export team {i:03d}').id for i in range(teams)]
+    pairs = [(home, away) for home in team_ids for away in team_ids if home != away]
+    first = date(2000, 1, 1)
+
+    def batches():
+        batch = []
+        for n in range(rows):
+            day = first + timedelta(days=n // len(pairs))
+            home, away = pairs[n % len(pairs)]
+            home_goals, away_goals = n % 4, n % 3
+            batch.append(Match(
+                date=day, home_team_id=home, away_team_id=away, home_goals=home_goals, away_goals=away_goals,
+                result='H' if home_goals > away_goals else ('A' if away_goals > home_goals else 'D'),
+                season=f'{day.year}-{day.year + 1}', matchday=n // len(pairs) % 38 + 1,
+            ))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    with transaction.atomic():
+        for batch in batches():
+            Match.objects.bulk_create(batch)
+
+
+def stream(client, url, rows, checkpoints=10, traced=False):
+    """Read the streamed export at ``url``. Returns seconds, bytes and, when ``traced``, a memory profile."""
+    profile = []
+    every = max(rows // checkpoints, 1)
+    next_checkpoint = every
+    lines = size = 0
+    if traced:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned {response.status_code}')
+        for chunk in response.streaming_content:
+            size += len(chunk)
+            lines += chunk.count(b'\n')
+            if traced and lines >= next_checkpoint:
+                current, peak = tracemalloc.get_traced_memory()
+                profile.append({'rows': lines, 'current_mib': round(current / MIB, 2), 'peak_mib': round(peak / MIB, 2)})
+                next_checkpoint += every
+    finally:
+        elapsed = time.perf_counter() - started
+        if traced:
+            tracemalloc.stop()
+    return elapsed, size, profile
+
+
+class Command(BaseCommand):
+    help = 'Stream a large CSV/NDJSON match export and record its memory profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Matches to insert and export')
+        parser.add_argument('--teams', type=int, default=40, help='Teams in the synthetic data')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], action='append',
+                            help='Export format to measure (repeatable). Defaults to both.')
+        parser.add_argument('--output', type=str, help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1:
+            raise CommandError('--rows must be a positive integer.')
+        if options['teams'] < 2:
+            raise CommandError('--teams must be at least 2.')
+
+        # A throwaway test database; DEBUG stays off so executed SQL is not kept in memory
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def run(self, options):
+        started = time.perf_counter()
+        insert_matches(options['rows'], options['teams'])
+        self.stdout.write(f'Inserted {options["rows"]:,} matches in {time.perf_counter() - started:.1f}s')
+
+        client = Client()
+        results = {'config': {key: options[key] for key in ('rows', 'teams')}, 'formats': {}}
+        for output in options['format'] or ['csv', 'ndjson']:
+            url = f'/api/matches/?format={output}'
+            # Untraced for throughput, then traced for the memory profile
+            elapsed, size, _ = stream(client, url, options['rows'])
+            _, _, profile = stream(client, url, options['rows'], traced=True)
+            results['formats'][output] = {
+                'seconds': round(elapsed, 3),
+                'rows_per_sec': round(options['rows'] / elapsed),
+                'mib': round(size / MIB, 1),
+                'memory': profile,
+            }
+            self.stdout.write(f'{output}: {options["rows"] / elapsed:,.0f} rows/sec, {size / MIB:.1f} MiB streamed')
+            for point in profile:
+                self.stdout.write(f'  {point["rows"]:>10,} rows: {point["current_mib"]:.2f} MiB in use, '
+                                  f'{point["peak_mib"]:.2f} MiB peak')
+        return results
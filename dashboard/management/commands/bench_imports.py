@@ -0,0 +1,108 @@
+import json
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SETUP = (
+    "import os; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'football_visualizer.settings'); "
+    "import django; django.setup()"
+)
+
+# What each start-up path imports. Everything except 'charts' has to stay
+# clear of HEAVY_MODULES; 'charts' shows what the first chart render pays.
+TARGETS = {
+    'django_setup': SETUP,
+    'urls': SETUP + '; import dashboard.urls',
+    'load_matches': SETUP + "; from django.core.management import load_command_class; load_command_class('dashboard', 'load_matches')",
+    'import_statsbomb': SETUP + "; from django.core.management import load_command_class; load_command_class('dashboard', 'import_statsbomb')",
+    'refresh_team_stats': SETUP + "; from django.core.management import load_command_class; load_command_class('dashboard', 'refresh_team_stats')",
+    'charts': SETUP + '; import dashboard.services.charts',
+}
+LAZY_TARGETS = [name for name in TARGETS if name != 'charts']
+HEAVY_MODULES = ('pandas', 'matplotlib', 'scipy', 'mplsoccer')
+
+
+def parse_importtime(stderr):
+    """``{module: (self_us, cumulative_us)}`` from ``python -X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_import(code, repeat=1):
+    """Import-time profile of running ``code`` in a fresh interpreter; the fastest of ``repeat`` runs."""
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if proc.returncode:
+            raise RuntimeError(f'Import failed:\n{proc.stderr[-2000:]}')
+        modules = parse_importtime(proc.stderr)
+        total = sum(self_us for self_us, _ in modules.values())
+        if best is None or total < best[0]:
+            best = (total, modules)
+    total, modules = best
+    top = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:10]
+    return {
+        'total_ms': round(total / 1000, 1),
+        'modules': len(modules),
+        'heavy': sorted({name.split('.')[0] for name in modules if name.split('.')[0] in HEAVY_MODULES}),
+        'top': [{'module': name, 'cumulative_ms': round(cumulative / 1000, 1)} for name, (_, cumulative) in top],
+    }
+
+
+def compare(baseline, current, tolerance, floor_ms=5.0):
+    """List start-up paths that got slower than ``baseline`` or picked up a heavy import."""
+    regressions = []
+    for name, after in current.items():
+        if name in LAZY_TARGETS and after['heavy']:
+            regressions.append(f'{name} imports {", ".join(after["heavy"])}')
+        before = baseline.get(name)
+        if before and after['total_ms'] > before['total_ms'] * (1 + tolerance) \
+                and after['total_ms'] - before['total_ms'] > floor_ms:
+            regressions.append(f'{name} import time: {before["total_ms"]:.1f} -> {after["total_ms"]:.1f} ms')
+    return regressions
+
+
+class Command(BaseCommand):
+    help = 'Measure import time of each start-up path with python -X importtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', choices=sorted(TARGETS),
+                            help='Start-up path to measure (repeatable). Defaults to all of them.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per target; the fastest is kept')
+        parser.add_argument('--output', type=str, help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', type=str, help='Results JSON from an earlier run to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative slowdown against the baseline before failing')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be a positive integer.')
+        results = {}
+        for name in options['target'] or TARGETS:
+            try:
+                results[name] = measure_import(TARGETS[name], options['repeat'])
+            except RuntimeError as e:
+                raise CommandError(f'{name}: {e}')
+            heavy = f' (imports {", ".join(results[name]["heavy"])})' if results[name]['heavy'] else ''
+            self.stdout.write(f'{name}: {results[name]["total_ms"]:.1f} ms, {results[name]["modules"]} modules{heavy}')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+        regressions = compare({}, results, options['tolerance'])
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                regressions = compare(json.load(f), results, options['tolerance'])
+        if regressions:
+            raise CommandError('Import regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No import regressions.'))
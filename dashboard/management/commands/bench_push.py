@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from dashboard.services.ingest import parse_row
+from dashboard.services.live import apply_result
+from dashboard.services.push import publisher
+from dashboard.services.synthetic import season_label, synthetic_matches, write_csv
+
+KIB = 1024
+
+
+def _rss():
+    # Resident set size from /proc; None where it is not available
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def parse_events(chunks):
+    """``[(event, data), ...]`` from received Server-Sent Event chunks; keep-alive comments are left out."""
+    events = []
+    for block in b''.join(chunks).decode('utf-8').split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class Subscriber:
+    """One EventSource client, driven straight through an ASGI application with no socket in between."""
+
+    def __init__(self, application, path, query='', on_chunk=None):
+        self.application = application
+        self.on_chunk = on_chunk
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        }
+        self.status = None
+        self.chunks = []
+        self.arrivals = []
+        self.arrived = asyncio.Event()
+        self.disconnected = asyncio.Event()
+        self.requested = False
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.application(self.scope, self.receive, self.send))
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message.get('body'):
+            self.chunks.append(message['body'])
+            self.arrivals.append(time.perf_counter())
+            self.arrived.set()
+            if self.on_chunk is not None:
+                self.on_chunk()
+
+    async def wait_for(self, count, timeout=10.0):
+        """Wait until ``count`` body chunks have arrived."""
+        async def arrived():
+            while len(self.chunks) < count:
+                self.arrived.clear()
+                await self.arrived.wait()
+        await asyncio.wait_for(arrived(), timeout)
+
+    def events(self):
+        return parse_events(self.chunks)
+
+    async def close(self):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 10.0)
+
+
+class Command(BaseCommand):
+    help = 'Hold many idle Server-Sent Event subscribers and measure memory per connection and broadcast latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=2000, help='Simultaneous connections')
+        parser.add_argument('--broadcasts', type=int, default=10, help='Results applied while they listen')
+        parser.add_argument('--teams', type=int, default=20, help='Teams in the synthetic season')
+        parser.add_argument('--output', type=str, help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['subscribers'] < 1 or options['broadcasts'] < 1:
+            raise CommandError('--subscribers and --broadcasts must be positive integers.')
+        if options['teams'] < 4:
+            raise CommandError('--teams must be at least 4.')
+
+        # A throwaway test database; DEBUG stays off so executed SQL is not kept in memory
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            matches = list(synthetic_matches(1, options['teams'], seed=0))
+            held_back = matches[-options['broadcasts']:]
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'season.csv')
+                write_csv(path, matches[:-options['broadcasts']])
+                call_command('load_matches', file=path, stdout=StringIO())
+            results = asyncio.run(self.run(held_back, options))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    async def run(self, held_back, options):
+        application = ASGIHandler()
+        season = season_label(0)
+        parsed = [parse_row({key: str(value) for key, value in match.items()}, self.stderr.write) for match in held_back]
+
+        # One subscriber first, so the channel and the season snapshot are not counted per connection
+        first = Subscriber(application, '/api/live/', f'season={season}')
+        first.start()
+        await first.wait_for(1)
+        if first.status != 200:
+            raise CommandError(f'/api/live/ returned {first.status}')
+
+        n = options['subscribers']
+        tracemalloc.start()
+        rss_before, traced_before = _rss(), tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        # Counted in the send callbacks, so waiting for a broadcast adds no tasks of its own
+        tally = {'chunks': 0, 'target': n, 'reached': asyncio.Event()}
+
+        def counted():
+            tally['chunks'] += 1
+            if tally['chunks'] >= tally['target']:
+                tally['reached'].set()
+
+        subscribers = [Subscriber(application, '/api/live/', f'season={season}', counted) for _ in range(n)]
+        for subscriber in subscribers:
+            subscriber.start()
+        await asyncio.wait_for(tally['reached'].wait(), 120.0)
+        connected = time.perf_counter() - started
+        traced = (tracemalloc.get_traced_memory()[0] - traced_before) / n
+        tracemalloc.stop()
+        rss_after = _rss()
+        rss = (rss_after - rss_before) / n if rss_before and rss_after else None
+        self.stdout.write(f'{n:,} subscribers connected in {connected:.2f}s: {traced / KIB:.1f} KiB traced per connection'
+                          + (f', {rss / KIB:.1f} KiB RSS' if rss is not None else ''))
+
+        broadcasts = []
+        for i, result in enumerate(parsed, start=1):
+            tally['target'] += n
+            tally['reached'].clear()
+            applied = time.perf_counter()
+            await sync_to_async(apply_result)(result)
+            await asyncio.wait_for(tally['reached'].wait(), 60.0)
+            latencies = np.array([subscriber.arrivals[i] - applied for subscriber in subscribers]) * 1000
+            broadcasts.append({
+                'first_ms': round(float(latencies.min()), 2),
+                'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+                'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+                'last_ms': round(float(latencies.max()), 2),
+            })
+        update = subscribers[0].events()[-1]
+        if update[0] != 'update':
+            raise CommandError(f'Expected an update event, got {update[0]}')
+        for stat in ('first_ms', 'p50_ms', 'p95_ms', 'last_ms'):
+            values = [broadcast[stat] for broadcast in broadcasts]
+            self.stdout.write(f'  result -> {stat[:-3]} subscriber: median {np.median(values):.1f} ms, '
+                              f'max {max(values):.1f} ms over {len(broadcasts)} broadcasts')
+
+        await asyncio.gather(*(subscriber.close() for subscriber in subscribers + [first]))
+        if publisher.channels:
+            raise CommandError('Channels were left open after every subscriber disconnected.')
+        return {
+            'config': {key: options[key] for key in ('subscribers', 'broadcasts', 'teams')},
+            'connect_seconds': round(connected, 3),
+            'traced_kib_per_connection': round(traced / KIB, 2),
+            'rss_kib_per_connection': round(rss / KIB, 2) if rss is not None else None,
+            'broadcasts': broadcasts,
+        }
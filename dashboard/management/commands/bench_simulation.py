@@ -0,0 +1,76 @@
+import json
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.services.simulation import shutdown_pool, simulate_season
+from dashboard.services.snapshot import SeasonSnapshot
+from dashboard.services.synthetic import synthetic_matches
+
+
+def synthetic_snapshot(teams, seed):
+    """An in-memory snapshot of one synthetic season; no database needed."""
+    matches = list(synthetic_matches(1, teams, seed))
+    names = sorted({m['home_team'] for m in matches})
+    pks = {name: pk for pk, name in enumerate(names, start=1)}
+    rows = [
+        (i, m['date_utc'].date(), m['matchday'], pks[m['home_team']], pks[m['away_team']],
+         m['fulltime_home'], m['fulltime_away'])
+        for i, m in enumerate(matches, start=1)
+    ]
+    return SeasonSnapshot(matches[0]['season'], (1, None), rows, {pk: name for name, pk in pks.items()})
+
+
+class Command(BaseCommand):
+    help = 'Measure Monte Carlo season simulation throughput as the worker count grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=100000, help='Simulated seasons per measurement')
+        parser.add_argument('--teams', type=int, default=20, help='Teams in the synthetic season')
+        parser.add_argument('--matchday', type=int, default=0,
+                            help='Simulate from this matchday on; 0 simulates the whole season')
+        parser.add_argument('--workers', type=int, action='append',
+                            help='Worker count to measure (repeatable). Defaults to 1, 2 and 4.')
+        parser.add_argument('--repeat', type=int, default=2, help='Timing runs per worker count; the best one is reported')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', type=str, help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1 or options['repeat'] < 1:
+            raise CommandError('--runs and --repeat must be positive integers.')
+        if options['teams'] < 2:
+            raise CommandError('--teams must be at least 2.')
+        snapshot = synthetic_snapshot(options['teams'], options['seed'])
+        results = {
+            'config': {key: options[key] for key in ('runs', 'teams', 'matchday', 'seed')},
+            'workers': {},
+        }
+        reference = None
+        try:
+            for workers in options['workers'] or [1, 2, 4]:
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    result = simulate_season(snapshot, options['runs'], options['matchday'], options['seed'], workers)
+                    timings.append(time.perf_counter() - started)
+                # Chunks are seeded independently of the worker count, so the odds must match
+                positions = np.array([team['positions'] for team in result['teams']])
+                if reference is None:
+                    reference = positions
+                elif not np.array_equal(reference, positions):
+                    raise CommandError(f'{workers} workers gave different odds from the first run.')
+                best = min(timings)
+                results['workers'][workers] = {
+                    'seconds': round(best, 4),
+                    'sims_per_sec': round(options['runs'] / best),
+                    'speedup': round(results['workers'][next(iter(results['workers']))]['seconds'] / best, 2)
+                    if results['workers'] else 1.0,
+                }
+                self.stdout.write(f'{workers} workers: {best:.2f} s, {options["runs"] / best:,.0f} seasons/sec, '
+                                  f'{result["remaining_fixtures"]} fixtures')
+        finally:
+            shutdown_pool()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
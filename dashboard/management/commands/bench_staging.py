@@ -0,0 +1,103 @@
+import csv
+import json
+import os
+import tempfile
+import time
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.services import staging
+from dashboard.services.ingest import parse_row
+from dashboard.services.synthetic import CSV_FIELDS, season_label, synthetic_matches, write_csv
+
+MIB = 1024 * 1024
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def best_of(repeat, func):
+    """``(seconds, result)`` for the fastest of ``repeat`` calls."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[0]:
+            best = (elapsed, result)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Compare parse time and file size of the CSV path against the Parquet staging format'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seasons', type=int, default=40, help='Seasons of synthetic matches')
+        parser.add_argument('--teams', type=int, default=20, help='Teams per season')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the fastest is reported')
+        parser.add_argument('--output', type=str, help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['seasons'] < 1 or options['teams'] < 2 or options['repeat'] < 1:
+            raise CommandError('--seasons and --repeat must be positive and --teams at least 2.')
+        try:
+            pa = staging._arrow()
+        except staging.StagingError as e:
+            raise CommandError(str(e))
+        import pandas as pd
+
+        repeat = options['repeat']
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'matches.csv')
+            stage_dir = os.path.join(tmp, 'staging')
+            rows = write_csv(csv_path, synthetic_matches(options['seasons'], options['teams'], seed=0))
+
+            def parse_csv():
+                with open(csv_path, encoding='utf-8') as f:
+                    return [parsed for parsed in map(parse_row, csv.DictReader(f)) if parsed is not None]
+
+            def read_staged():
+                return [row for chunk in staging.iter_rows(stage_dir, 1000) for row in chunk]
+
+            stage_seconds, _ = best_of(repeat, lambda: staging.stage_csv(csv_path, stage_dir, parse_row))
+            arrow_peak = pa.default_memory_pool().max_memory()
+            csv_rows_seconds, csv_rows = best_of(repeat, parse_csv)
+            parquet_rows_seconds, parquet_rows = best_of(repeat, read_staged)
+            if len(csv_rows) != len(parquet_rows):
+                raise CommandError(f'CSV gave {len(csv_rows)} rows but the staged copy {len(parquet_rows)}.')
+            pandas_seconds, _ = best_of(repeat, lambda: pd.read_csv(
+                csv_path, usecols=CSV_FIELDS[1:], parse_dates=['date_utc'],
+                dtype={'season': 'category', 'home_team': 'category', 'away_team': 'category'},
+            ))
+            frame_seconds, _ = best_of(repeat, lambda: staging.read_frame(stage_dir))
+            arrays_seconds, _ = best_of(repeat, lambda: staging.read_arrays(stage_dir))
+            one_season_seconds, one_season = best_of(repeat, lambda: staging.read_arrays(stage_dir, [season_label(0)]))
+            csv_bytes, parquet_bytes = os.path.getsize(csv_path), directory_size(stage_dir)
+
+        results = {
+            'config': {key: options[key] for key in ('seasons', 'teams', 'repeat')},
+            'rows': rows,
+            'csv_mib': round(csv_bytes / MIB, 3),
+            'parquet_mib': round(parquet_bytes / MIB, 3),
+            'stage_seconds': round(stage_seconds, 4),
+            'arrow_peak_mib': round(arrow_peak / MIB, 2),
+            'loader_rows': {'csv_seconds': round(csv_rows_seconds, 4), 'parquet_seconds': round(parquet_rows_seconds, 4)},
+            'analytics': {
+                'pandas_read_csv_seconds': round(pandas_seconds, 4),
+                'parquet_frame_seconds': round(frame_seconds, 4),
+                'parquet_arrays_seconds': round(arrays_seconds, 4),
+                'parquet_one_season_seconds': round(one_season_seconds, 4),
+            },
+        }
+        self.stdout.write(f'{rows:,} matches: CSV {csv_bytes / MIB:.2f} MiB, Parquet {parquet_bytes / MIB:.2f} MiB '
+                          f'({csv_bytes / parquet_bytes:.1f}x smaller)')
+        self.stdout.write(f'  stage CSV -> Parquet: {stage_seconds:.3f}s, Arrow memory peak {arrow_peak / MIB:.1f} MiB')
+        self.stdout.write(f'  loader rows: DictReader + parse_row {csv_rows_seconds:.3f}s, '
+                          f'Parquet {parquet_rows_seconds:.3f}s ({csv_rows_seconds / parquet_rows_seconds:.1f}x)')
+        self.stdout.write(f'  DataFrame: pandas.read_csv {pandas_seconds:.3f}s, Parquet {frame_seconds:.3f}s '
+                          f'({pandas_seconds / frame_seconds:.1f}x); NumPy arrays {arrays_seconds:.3f}s')
+        self.stdout.write(f'  one season ({len(one_season["date"])} matches) from Parquet: {one_season_seconds * 1000:.1f} ms')
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
@@ -1,63 +1,138 @@
-from django.core.management.base import BaseCommand
-from mplsoccer import Sbopen
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from dashboard.models import Match
-from datetime import datetime
+from dashboard.services.aggregates import refresh_seasons
+from dashboard.services.prediction import refresh_predictions
+from dashboard.services.seasons import resolve_or_create_seasons
+from dashboard.services.staging import StagingError, stage_rows
+from dashboard.services.statsbomb import StatsBombError, StatsBombSource, match_rows
+from dashboard.services.teams import resolve_or_create_teams
+
+
+def parse_pair(value):
+    competition, _, season = value.partition(':')
+    if not (competition.isdigit() and season.isdigit()):
+        raise CommandError(f'"{value}" is not a COMPETITION:SEASON pair of IDs, e.g. 43:3.')
+    return int(competition), int(season)
+
 
 class Command(BaseCommand):
-    help = 'Import football data from StatsBomb'
-    
+    help = 'Import football data from StatsBomb open data'
+
     def add_arguments(self, parser):
-        parser.add_argument('--competition', type=int, default=43, help='Competition ID (43=Premier League)')
-        parser.add_argument('--season', type=int, default=3, help='Season ID')
+        parser.add_argument('pairs', nargs='*', metavar='COMPETITION:SEASON',
+                            help='Competition/season ID pairs to import, e.g. 43:3 11:90')
+        parser.add_argument('--competition', type=int, default=43,
+                            help='Competition ID (43=Premier League) when no pairs are given')
+        parser.add_argument('--season', type=int, default=3, help='Season ID when no pairs are given')
+        parser.add_argument('--list', action='store_true', help='List the available competitions and seasons, then exit')
+        parser.add_argument('--source-dir', type=str,
+                            help='Read from a local copy of the statsbomb/open-data repository instead of the network')
+        parser.add_argument('--cache-dir', type=str, default=settings.STATSBOMB_CACHE_DIR,
+                            help='Content-addressed cache for downloaded files; an empty value disables it')
+        parser.add_argument('--refresh', action='store_true', help='Download again even when the cache has the file')
+        parser.add_argument('--workers', type=int, default=4, help='Files fetched in parallel')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Matches written per statement')
+        parser.add_argument('--stage', nargs='?', const=settings.STAGING_DIR, metavar='DIR',
+                            help='Write the matches as Parquet to DIR (default: STAGING_DIR) instead of the database')
+        parser.add_argument('--warm', action='store_true',
+                            help='Render and cache the charts of the imported seasons afterwards (see warm_dashboard)')
 
     def handle(self, *args, **options):
-        parser = Sbopen()
-        
-        # Get available competitions first
-        self.stdout.write("Available competitions:")
-        competitions = parser.competition()
-        for comp in competitions.itertuples():
-            self.stdout.write(f"ID: {comp.competition_id} - {comp.competition_name} - {comp.season_name}")
-        
-        # Get matches for specified competition
-        competition_id = options['competition']
-        season_id = options['season']
-        
-        self.stdout.write(f"\nImporting matches for competition {competition_id}, season {season_id}...")
-        
-        matches = parser.match(competition_id=competition_id, season_id=season_id)
-        created_count = 0
-        
-        for match in matches.itertuples():
-            # Convert match date
-            match_date = match.match_date.date()
-
-            
-            # Determine result
-            if match.home_score > match.away_score:
-                result = 'H'
-            elif match.away_score > match.home_score:
-                result = 'A'
-            else:
-                result = 'D'
-            
-            # Create or update match
-            match_obj, created = Match.objects.get_or_create(
-                date=match_date,
-                home_team=match.home_team,
-                away_team=match.away_team,
-                defaults={
-                    'home_goals': match.home_score,
-                    'away_goals': match.away_score,
-                    'result': result,
-                    'season': f"{match.season_name}"
-                }
-            )
-            
-            if created:
-                created_count += 1
-                
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be positive integers.')
+        if options['warm'] and not settings.CHART_CACHE_DIR:
+            raise CommandError('--warm needs CHART_CACHE_DIR: there is no shared charts cache to warm.')
+        source = StatsBombSource(options['source_dir'], options['cache_dir'] or None, options['refresh'])
+
+        if options['list']:
+            try:
+                competitions, _ = source.fetch_json('competitions.json')
+            except StatsBombError as e:
+                raise CommandError(str(e))
+            for comp in competitions:
+                self.stdout.write(f"{comp['competition_id']}:{comp['season_id']} - {comp['competition_name']} - {comp['season_name']}")
+            return
+
+        pairs = list(dict.fromkeys(parse_pair(pair) for pair in options['pairs'])) \
+            or [(options['competition'], options['season'])]
+        self.stdout.write(f'Importing {len(pairs)} competition/season pair(s)...')
+
+        def fetch(pair):
+            matches, origin = source.fetch_json(f'matches/{pair[0]}/{pair[1]}.json')
+            return match_rows(matches), origin
+
+        # Downloads overlap; the results are still written in the order given
+        rows, failures = [], []
+        with ThreadPoolExecutor(max_workers=min(options['workers'], len(pairs))) as pool:
+            futures = [pool.submit(fetch, pair) for pair in pairs]
+            for (competition, season), future in zip(pairs, futures):
+                try:
+                    pair_rows, origin = future.result()
+                except StatsBombError as e:
+                    failures.append(str(e))
+                    continue
+                rows += pair_rows
+                self.stdout.write(f'{competition}:{season}: {len(pair_rows)} matches ({origin})')
+                if options['stage']:
+                    try:
+                        staged = stage_rows(pair_rows, options['stage'], f'statsbomb-{competition}-{season}')
+                    except StagingError as e:
+                        raise CommandError(str(e))
+                    self.stdout.write(f'  staged as season(s) {", ".join(sorted(staged)) or "none"}')
+        if failures:
+            raise CommandError('Import failed:\n  ' + '\n  '.join(failures))
+        if options['stage']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Staged {len(rows)} matches in "{options["stage"]}"; load them with load_matches --parquet'
+            ))
+            return
+
+        created_count, seasons = self.write(rows, options['batch_size'])
         self.stdout.write(
             self.style.SUCCESS(f'Successfully imported {created_count} matches')
         )
-        
\ No newline at end of file
+        team_count = refresh_seasons(seasons)
+        self.stdout.write(f'Refreshed team stats for {len(seasons)} season(s), {team_count} team rows')
+        self.stdout.write(f'Refitted {refresh_predictions(seasons)} prediction model(s)')
+        if options['warm'] and seasons:
+            call_command('warm_dashboard', *sorted(seasons), stdout=self.stdout, stderr=self.stderr)
+
+    def write(self, rows, batch_size):
+        """Insert the fixtures that are not stored yet, ``batch_size`` at a time; existing ones are left as they are.
+
+        Returns the number created and the seasons they went into.
+        """
+        created, seasons = 0, set()
+        with transaction.atomic():
+            team_ids = resolve_or_create_teams({r['home_team'] for r in rows} | {r['away_team'] for r in rows})
+            season_keys = resolve_or_create_seasons({r['season'] for r in rows})
+            fixtures = {}
+            for r in rows:
+                fixtures.setdefault((r['date'], team_ids[r['home_team']], team_ids[r['away_team']]), r)
+            keys = list(fixtures)
+            for start in range(0, len(keys), batch_size):
+                batch = keys[start:start + batch_size]
+                existing = set(Match.objects.filter(
+                    date__in={key[0] for key in batch},
+                    home_team_id__in={key[1] for key in batch},
+                    away_team_id__in={key[2] for key in batch},
+                ).values_list('date', 'home_team_id', 'away_team_id'))
+                matches = []
+                for key in batch:
+                    if key in existing:
+                        continue
+                    r = fixtures[key]
+                    matches.append(Match(
+                        date=key[0], home_team_id=key[1], away_team_id=key[2],
+                        home_goals=r['home_goals'], away_goals=r['away_goals'],
+                        result='H' if r['home_goals'] > r['away_goals'] else ('A' if r['away_goals'] > r['home_goals'] else 'D'),
+                        season=season_keys[r['season']], matchday=r['matchday'],
+                    ))
+                Match.objects.bulk_create(matches)
+                created += len(matches)
+                seasons.update(match.season for match in matches)
+        return created, seasons
@@ -0,0 +1,80 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.services.ingest import parse_row
+from dashboard.services.live import DropDirectory, FeedReader, apply_result
+
+OUTCOMES = ('created', 'updated', 'unchanged', 'moved', 'skipped', 'failed')
+
+
+class Command(BaseCommand):
+    help = 'Apply results from a live NDJSON/CSV feed or drop directory as they arrive'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--feed', type=str, help='Append-only feed file to tail (.csv with a header line, else NDJSON)')
+        source.add_argument('--watch-dir', type=str, help='Directory to pick up dropped .csv/.ndjson files from')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls')
+        parser.add_argument('--from-end', action='store_true', help='Skip what the feed already holds and wait for new lines')
+        parser.add_argument('--once', action='store_true', help='Apply what is there now, then exit')
+
+    def handle(self, *args, **options):
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be positive.')
+        if options['watch_dir']:
+            if not os.path.isdir(options['watch_dir']):
+                raise CommandError(f'Directory "{options["watch_dir"]}" does not exist.')
+            source = DropDirectory(options['watch_dir'])
+        else:
+            source = FeedReader(options['feed'], from_start=not options['from_end'])
+
+        self.counts = dict.fromkeys(OUTCOMES, 0)
+        try:
+            while True:
+                self.ingest(source)
+                if source.waiting():
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            'Live ingest: ' + ', '.join(f'{count} {outcome}' for outcome, count in self.counts.items())
+        ))
+
+    def ingest(self, source):
+        """Apply the records ``source`` has ready; returns ``(parsed, outcome)`` per record, parsed None if not applied.
+
+        A record that raises is reported and counted as failed without
+        stopping the rest; ``source.done()`` is told whether any did once
+        every record has been tried.
+        """
+        records, errors = source.read()
+        for line in errors:
+            self.stderr.write(f'Skipping unreadable line: {line}')
+        self.counts['skipped'] += len(errors)
+        applied, failed = [], False
+        for record in records:
+            try:
+                parsed = parse_row(record, self.stderr.write)
+                if parsed is None:
+                    self.counts['skipped'] += 1
+                    applied.append((None, 'skipped'))
+                    continue
+                outcome = apply_result(parsed)
+            except Exception as e:
+                self.stderr.write(f'Failed to apply {record}: {e}')
+                self.counts['failed'] += 1
+                applied.append((None, 'failed'))
+                failed = True
+                continue
+            self.counts[outcome] += 1
+            applied.append((parsed, outcome))
+            if outcome != 'unchanged':
+                self.stdout.write(
+                    f"{parsed['date']} {parsed['home_team']} {parsed['home_goals']}-{parsed['away_goals']} "
+                    f"{parsed['away_team']}: {outcome}"
+                )
+        source.done(failed)
+        return applied
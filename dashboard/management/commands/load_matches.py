@@ -1,8 +1,14 @@
 import csv
 import os
-from datetime import datetime
+import time
+from django.conf import settings
+from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 from dashboard.models import Match
+from dashboard.services.aggregates import refresh_seasons
+from dashboard.services.ingest import parse_row, write_chunk
+from dashboard.services.prediction import refresh_predictions
+from dashboard.services.staging import StagingError, iter_rows
 
 
 class Command(BaseCommand):
@@ -20,105 +26,110 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing match data before loading new data'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of CSV rows written per transaction'
+        )
+        parser.add_argument(
+            '--parquet',
+            type=str,
+            help='Load from a Parquet staging directory (see stage_matches) instead of --file'
+        )
+        parser.add_argument(
+            '--season',
+            action='append',
+            dest='seasons',
+            help='With --parquet, only load this season; may be repeated'
+        )
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Render and cache the charts of the touched seasons afterwards (see warm_dashboard)'
+        )
 
     def handle(self, *args, **options):
         csv_file = options['file']
-        
-        if not os.path.exists(csv_file):
+        batch_size = options['batch_size']
+
+        if options['parquet']:
+            if not os.path.isdir(options['parquet']):
+                raise CommandError(f'Staging directory "{options["parquet"]}" does not exist.')
+        elif not os.path.exists(csv_file):
             raise CommandError(f'CSV file "{csv_file}" does not exist.')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be a positive integer.')
+        if options['warm'] and not settings.CHART_CACHE_DIR:
+            raise CommandError('--warm needs CHART_CACHE_DIR: there is no shared charts cache to warm.')
         
         if options['clear']:
             self.stdout.write('Clearing existing match data...')
+            cleared_seasons = set(Match.objects.values_list('season', flat=True).distinct())
             Match.objects.all().delete()
             self.stdout.write(self.style.SUCCESS('Existing data cleared.'))
         
-        self.stdout.write(f'Loading match data from "{csv_file}"...')
+        source = f'Parquet staging directory "{options["parquet"]}"' if options['parquet'] else f'CSV file "{csv_file}"'
+        self.stdout.write(f'Loading match data from {source}...')
         
+        self.touched_seasons = cleared_seasons if options['clear'] else set()
         created_count = 0
         updated_count = 0
+        row_count = 0
+        started = time.perf_counter()
         
         try:
-            with open(csv_file, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-
-                for row in reader:
-                    # Required columns mapping per spec
-                    date_str = (row.get('date_utc') or '').strip()
-                    home_team = (row.get('home_team') or '').strip()
-                    away_team = (row.get('away_team') or '').strip()
-                    season = (row.get('season') or '').strip()
-                    # Normalize common season formats to a consistent form, e.g., 2024-2025
-                    season_norm = season.replace('/', '-').replace('_', '-').replace(' ', '')
-
-                    if not date_str or not home_team or not away_team or not season:
-                        self.stderr.write(f'Skipping incomplete row: {row}')
-                        continue
+            if options['parquet']:
+                # Typed columns, so the rows need no parsing
+                for chunk in iter_rows(options['parquet'], batch_size, options['seasons']):
+                    row_count += len(chunk)
+                    created, updated = write_chunk(chunk, self.touched_seasons)
+                    created_count += created
+                    updated_count += updated
+            else:
+                with open(csv_file, 'r', encoding='utf-8') as file:
+                    reader = csv.DictReader(file)
+                    chunk = []
 
-                    # Parse date_utc. Try ISO first, then common fallbacks
-                    try:
-                        # Handle ISO formats with optional timezone, e.g. '2025-01-29 20:00:00+00:00' or '2025-01-29T20:00:00Z'
-                        iso_candidate = date_str.replace('T', ' ').replace('Z', '+00:00')
-                        # datetime.fromisoformat supports '+00:00' offset
-                        date_obj = datetime.fromisoformat(iso_candidate).date()
-                    except ValueError:
-                        try:
-                            cleaned = date_str.replace('Z', '').replace('T', ' ')
-                            if '-' in cleaned and ':' in cleaned:
-                                date_obj = datetime.strptime(cleaned, '%Y-%m-%d %H:%M:%S').date()
-                            elif '-' in cleaned:
-                                date_obj = datetime.strptime(cleaned, '%Y-%m-%d').date()
-                            elif '/' in cleaned:
-                                date_obj = datetime.strptime(cleaned, '%m/%d/%Y').date()
-                            else:
-                                date_obj = datetime.strptime(cleaned, '%d-%m-%Y').date()
-                        except ValueError:
-                            self.stderr.write(f'Invalid date format in row: {row}')
+                    for row in reader:
+                        row_count += 1
+                        parsed = parse_row(row, self.stderr.write)
+                        if parsed is None:
                             continue
+                        chunk.append(parsed)
+                        if len(chunk) >= batch_size:
+                            created, updated = write_chunk(chunk, self.touched_seasons)
+                            created_count += created
+                            updated_count += updated
+                            chunk = []
 
-                    # Goals from fulltime_home/fulltime_away
-                    try:
-                        home_goals = int(row.get('fulltime_home', 0))
-                        away_goals = int(row.get('fulltime_away', 0))
-                    except ValueError:
-                        self.stderr.write(f'Invalid goal values in row: {row}')
-                        continue
-
-                    # Determine result
-                    if home_goals > away_goals:
-                        result = 'H'
-                    elif away_goals > home_goals:
-                        result = 'A'
-                    else:
-                        result = 'D'
-
-                    # Create or update match
-                    match, created = Match.objects.get_or_create(
-                        date=date_obj,
-                        home_team=home_team,
-                        away_team=away_team,
-                        defaults={
-                            'home_goals': home_goals,
-                            'away_goals': away_goals,
-                            'result': result,
-                            'season': season_norm,
-                        }
-                    )
-
-                    if created:
-                        created_count += 1
-                    else:
-                        match.home_goals = home_goals
-                        match.away_goals = away_goals
-                        match.result = result
-                        match.season = season_norm
-                        match.save()
-                        updated_count += 1
+                    if chunk:
+                        created, updated = write_chunk(chunk, self.touched_seasons)
+                        created_count += created
+                        updated_count += updated
                         
+        except StagingError as e:
+            raise CommandError(str(e))
         except Exception as e:
-            raise CommandError(f'Error processing CSV file: {str(e)}')
-        
+            raise CommandError(f'Error processing {source}: {str(e)}')
+        finally:
+            # Each chunk commits on its own, so a load that fails part-way
+            # still leaves its written seasons to refresh and version
+            team_count = refresh_seasons(self.touched_seasons)
+
+        elapsed = time.perf_counter() - started
+        rate = row_count / elapsed if elapsed > 0 else 0.0
         self.stdout.write(
             self.style.SUCCESS(
                 f'Successfully loaded match data: {created_count} created, {updated_count} updated'
             )
-        )
\ No newline at end of file
+        )
+        self.stdout.write(f'Processed {row_count} rows in {elapsed:.2f}s ({rate:.0f} rows/sec)')
+
+        self.stdout.write(f'Refreshed team stats for {len(self.touched_seasons)} season(s), {team_count} team rows')
+        self.stdout.write(f'Refitted {refresh_predictions(self.touched_seasons)} prediction model(s)')
+        if options['warm']:
+            # Cleared seasons with no matches left have nothing to render
+            seasons = sorted(set(Match.objects.filter(season__in=self.touched_seasons).values_list('season', flat=True)))
+            if seasons:
+                call_command('warm_dashboard', *seasons, stdout=self.stdout, stderr=self.stderr)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from dashboard.models import Match
+from dashboard.services.aggregates import refresh_seasons
+from dashboard.services.seasons import resolve_season
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed per-team season stats from the Match table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--season',
+            action='append',
+            help='Season to rebuild (repeatable). Defaults to every season in the database.'
+        )
+
+    def handle(self, *args, **options):
+        if options['season']:
+            seasons = {resolve_season(season) or season for season in options['season']}
+        else:
+            seasons = set(Match.objects.values_list('season', flat=True).distinct())
+        team_count = refresh_seasons(seasons)
+        self.stdout.write(
+            self.style.SUCCESS(f'Refreshed team stats for {len(seasons)} season(s), {team_count} team rows')
+        )
@@ -0,0 +1,188 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from io import StringIO
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from dashboard.management.commands import ingest_live
+from dashboard.models import Match
+from dashboard.services.live import FeedReader
+from dashboard.services.seasons import resolve_season
+from dashboard.services.teams import resolve_team
+
+
+def _kickoff(record):
+    try:
+        return datetime.fromisoformat(str(record.get('date_utc', '')).replace('T', ' ').replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def replay_gaps(records, speed, max_gap):
+    """Seconds to wait before each record: the recorded kick-off gaps divided by ``speed``, capped at ``max_gap``."""
+    gaps, previous = [], None
+    for record in records:
+        kickoff = _kickoff(record)
+        gap = (kickoff - previous).total_seconds() / speed if kickoff and previous else 0.0
+        gaps.append(min(max(gap, 0.0), max_gap))
+        previous = kickoff or previous
+    return gaps
+
+
+def percentiles(values):
+    values = np.asarray(values, dtype=float) * 1000
+    return {'p50_ms': round(float(np.percentile(values, 50)), 2), 'p95_ms': round(float(np.percentile(values, 95)), 2),
+            'max_ms': round(float(values.max()), 2)}
+
+
+class OneAtATime:
+    """Hands out a reader's records one per ``read()``, so each is timed on its own."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.pending = []
+
+    def read(self):
+        if not self.pending:
+            self.pending, errors = self.reader.read()
+            if errors:
+                raise CommandError(f'{len(errors)} unreadable line(s) in the replayed feed.')
+        batch, self.pending = self.pending[:1], self.pending[1:]
+        return batch, []
+
+    def done(self, failed=False):
+        if failed:
+            raise CommandError('A replayed record could not be applied; see the errors above.')
+
+
+class Command(BaseCommand):
+    help = 'Replay a recorded results feed through the live ingest and report ingest-to-visible latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Recorded feed to replay (.csv with a header line, else NDJSON)')
+        parser.add_argument('--seed', type=str, help='CSV loaded with load_matches before the replay starts')
+        parser.add_argument('--speed', type=float, default=600.0,
+                            help='How many times faster than the recorded kick-off times to append records')
+        parser.add_argument('--max-gap', type=float, default=0.5, help='Longest wait between two records, in seconds')
+        parser.add_argument('--poll', type=float, default=0.02, help='Seconds between ingest polls of the feed')
+        parser.add_argument('--timeout', type=float, default=120.0, help='Give up after this many seconds')
+        parser.add_argument('--output', type=str, help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['file']):
+            raise CommandError(f'Feed file "{options["file"]}" does not exist.')
+        if options['seed'] and not os.path.exists(options['seed']):
+            raise CommandError(f'CSV file "{options["seed"]}" does not exist.')
+        if options['speed'] <= 0 or options['poll'] <= 0:
+            raise CommandError('--speed and --poll must be positive.')
+        records, errors = FeedReader(options['file']).read()
+        if errors:
+            raise CommandError(f'{len(errors)} unreadable line(s) in {options["file"]}.')
+        if not records:
+            raise CommandError(f'No records in {options["file"]}.')
+
+        # A throwaway test database; DEBUG stays off so executed SQL is not kept in memory
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                results = self.run(records, os.path.join(tmp, 'feed.ndjson'), options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def run(self, records, feed, options):
+        if options['seed']:
+            call_command('load_matches', file=options['seed'], stdout=StringIO())
+        # What every season's table must add up to once a result is visible
+        scores = {(date, home, away): (season, home_goals + away_goals) for date, home, away, season, home_goals, away_goals
+                  in Match.objects.values_list('date', 'home_team_id', 'away_team_id', 'season', 'home_goals', 'away_goals')}
+
+        gaps = replay_gaps(records, options['speed'], options['max_gap'])
+        appended = [None] * len(records)
+        open(feed, 'w').close()
+
+        def write():
+            with open(feed, 'a', encoding='utf-8') as f:
+                for i, (record, gap) in enumerate(zip(records, gaps)):
+                    time.sleep(gap)
+                    f.write(json.dumps(record, default=str) + '\n')
+                    f.flush()
+                    appended[i] = time.perf_counter()
+
+        ingest = ingest_live.Command(stdout=StringIO(), stderr=self.stderr)
+        ingest.counts = dict.fromkeys(ingest_live.OUTCOMES, 0)
+        reader, client = OneAtATime(FeedReader(feed)), Client()
+        apply_took, applied_after, visible_after = [], [], []
+        writer = threading.Thread(target=write, daemon=True)
+        started = time.perf_counter()
+        writer.start()
+        done = 0
+        while done < len(records):
+            if time.perf_counter() - started > options['timeout']:
+                raise CommandError(f'Timed out after {done} of {len(records)} records.')
+            polled_at = time.perf_counter()
+            batch = ingest.ingest(reader)
+            if not batch:
+                time.sleep(options['poll'])
+                continue
+            applied_at = time.perf_counter()
+            apply_took.append(applied_at - polled_at)
+            seasons = set()
+            for parsed, outcome in batch:
+                if parsed is None:
+                    continue
+                season = resolve_season(parsed['season'])
+                home, away = resolve_team(parsed['home_team']), resolve_team(parsed['away_team'])
+                scores[(parsed['date'], home, away)] = (season, parsed['home_goals'] + parsed['away_goals'])
+                seasons.add(season)
+            for season in seasons:
+                self.wait_visible(client, season, scores, started, options['timeout'])
+            visible_at = time.perf_counter()
+            for i in range(done, done + len(batch)):
+                applied_after.append(applied_at - appended[i])
+                visible_after.append(visible_at - appended[i])
+            done += len(batch)
+        writer.join()
+
+        results = {
+            'config': {key: options[key] for key in ('speed', 'max_gap', 'poll')},
+            'records': len(records),
+            'outcomes': ingest.counts,
+            'seconds': round(time.perf_counter() - started, 3),
+            'apply': percentiles(apply_took),
+            'applied': percentiles(applied_after),
+            'visible': percentiles(visible_after),
+        }
+        self.stdout.write(f'Replayed {len(records)} records in {results["seconds"]:.2f}s: '
+                          + ', '.join(f'{count} {outcome}' for outcome, count in ingest.counts.items()))
+        for stage, label in (('apply', 'apply one record'), ('applied', 'append -> applied'),
+                             ('visible', 'append -> visible')):
+            stats = results[stage]
+            self.stdout.write(f'  {label}: p50 {stats["p50_ms"]:.1f} ms, p95 {stats["p95_ms"]:.1f} ms, '
+                              f'max {stats["max_ms"]:.1f} ms')
+        return results
+
+    def wait_visible(self, client, season, scores, started, timeout):
+        """Poll the league table API until it counts every stored result of ``season``."""
+        fixtures = [goals for key_season, goals in scores.values() if key_season == season]
+        while True:
+            standings = client.get('/api/league-table/', {'season': season}).json()['standings']
+            if sum(row['played'] for row in standings) == 2 * len(fixtures) \
+                    and sum(row['gf'] for row in standings) == sum(fixtures):
+                return
+            if time.perf_counter() - started > timeout:
+                raise CommandError(f'The {season} table never showed the replayed results.')
+            time.sleep(0.001)
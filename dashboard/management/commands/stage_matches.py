@@ -0,0 +1,39 @@
+import os
+import time
+from functools import partial
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.services.ingest import parse_row
+from dashboard.services.staging import StagingError, stage_csv
+
+
+class Command(BaseCommand):
+    help = 'Convert match CSV files into season-partitioned Parquet for load_matches --parquet and offline analysis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='CSV files in the load_matches layout')
+        parser.add_argument('--output', type=str, default=settings.STAGING_DIR,
+                            help='Staging directory (default: STAGING_DIR)')
+        parser.add_argument('--block-size', type=int, default=1 << 20,
+                            help='Bytes of CSV converted and written at a time')
+
+    def handle(self, *args, **options):
+        if options['block_size'] < 1:
+            raise CommandError('--block-size must be a positive integer.')
+        for path in options['files']:
+            if not os.path.exists(path):
+                raise CommandError(f'CSV file "{path}" does not exist.')
+
+        for path in options['files']:
+            started = time.perf_counter()
+            try:
+                seasons = stage_csv(path, options['output'], partial(parse_row, warn=self.stderr.write), options['block_size'])
+            except StagingError as e:
+                raise CommandError(str(e))
+            elapsed = time.perf_counter() - started
+            rows = sum(seasons.values())
+            self.stdout.write(
+                f'{path}: {rows} rows in {elapsed:.2f}s into {len(seasons)} season(s)'
+                + ''.join(f'\n  {season}: {count}' for season, count in sorted(seasons.items()))
+            )
+        self.stdout.write(self.style.SUCCESS(f'Staged {len(options["files"])} file(s) in "{options["output"]}"'))
@@ -0,0 +1,97 @@
+import json
+import os
+import time
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.models import Match
+from dashboard.services.seasons import resolve_season
+from dashboard.services.warmup import season_targets, warm
+
+
+class Command(BaseCommand):
+    help = ('Render every team chart for the given seasons into the shared CHART_CACHE_DIR cache, '
+            'so the first visitors after an import get cache hits')
+
+    def add_arguments(self, parser):
+        parser.add_argument('seasons', nargs='*', help='Seasons to warm (default: every season with matches)')
+        parser.add_argument('--team', action='append', dest='teams', help='Only this team; may be repeated')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Render processes (default: one per CPU; 0 renders in this process)')
+        parser.add_argument('--force', action='store_true', help='Render again even when the charts are cached')
+        parser.add_argument('--max-seconds', type=float, help='Stop starting new teams after this many seconds')
+        parser.add_argument('--output', type=str, help='Write the timings as JSON to this file')
+
+    def handle(self, *args, **options):
+        if not settings.CHART_CACHE_DIR:
+            # The in-memory charts cache would be thrown away when this command exits
+            raise CommandError('CHART_CACHE_DIR is not set, so there is no shared charts cache to warm.')
+        if options['workers'] < 0:
+            raise CommandError('--workers must be zero or a positive integer.')
+        if options['max_seconds'] is not None and options['max_seconds'] <= 0:
+            raise CommandError('--max-seconds must be positive.')
+        if options['seasons']:
+            seasons = []
+            for label in options['seasons']:
+                key = resolve_season(label)
+                if key is None:
+                    raise CommandError(f'Unknown season "{label}".')
+                seasons.append(key)
+            seasons = list(dict.fromkeys(seasons))
+        else:
+            seasons = sorted(set(Match.objects.values_list('season', flat=True)))
+
+        started = time.perf_counter()
+        deadline = started + options['max_seconds'] if options['max_seconds'] else None
+        targets, season_seconds = season_targets(seasons, options['teams'])
+        for season, seconds in season_seconds.items():
+            self.stdout.write(f'{season}: snapshot, table and grids in {seconds * 1000:.0f} ms')
+        if options['teams']:
+            found = {target[2] for target in targets}
+            for team in options['teams']:
+                if team not in found:
+                    self.stderr.write(self.style.WARNING(f'No matches for "{team}" in {", ".join(seasons)}'))
+
+        per_chart, per_team = {}, []
+
+        def progress(done, total, target, rendered, seconds):
+            season, _, team, _ = target
+            for view_name, (_, chart_seconds) in rendered.items():
+                per_chart.setdefault(view_name, []).append(chart_seconds)
+            per_team.append({'season': season, 'team': team, 'seconds': round(seconds, 3)})
+            self.stdout.write(f'[{done}/{total}] {season} {team}: {len(rendered)} charts in {seconds:.2f}s')
+
+        workers = min(options['workers'], len(targets))
+        done, skipped, dropped = warm(targets, workers, options['force'], deadline, progress)
+        elapsed = time.perf_counter() - started
+
+        if per_chart:
+            self.stdout.write('Render time per chart:')
+            for view_name, values in per_chart.items():
+                values = np.array(values) * 1000
+                self.stdout.write(f'  {view_name}: mean {values.mean():.0f} ms, max {values.max():.0f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {done} team(s) in {elapsed:.2f}s on {workers or 1} process(es); {skipped} already cached'
+        ))
+        if dropped:
+            self.stderr.write(self.style.WARNING(
+                f'{dropped} team(s) not warmed within --max-seconds {options["max_seconds"]:g}'
+            ))
+
+        if options['output']:
+            results = {
+                'seasons': seasons,
+                'workers': workers,
+                'seconds': round(elapsed, 3),
+                'warmed': done,
+                'skipped': skipped,
+                'dropped': dropped,
+                'season_seconds': {season: round(seconds, 3) for season, seconds in season_seconds.items()},
+                'teams': per_team,
+                'chart_ms': {view_name: {'mean': round(float(np.mean(values)) * 1000, 1),
+                                         'max': round(float(np.max(values)) * 1000, 1)}
+                             for view_name, values in per_chart.items()},
+            }
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
@@ -0,0 +1,44 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .services import timing
+
+
+class ServerTimingMiddleware:
+    """Time every request, add a Server-Timing header and feed the /metrics histograms.
+
+    Works for both the sync and the async (chart) views without switching the
+    handler between modes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = timing.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.end_request(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = timing.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.end_request(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        timing.observe_request(view, response.status_code, timings)
+        if settings.SERVER_TIMING_HEADER:
+            response.headers['Server-Timing'] = timings.header()
+        return response
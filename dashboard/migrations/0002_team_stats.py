@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamSeasonStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team', models.CharField(max_length=100)),
+                ('season', models.CharField(max_length=20)),
+                ('played', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('goals_for', models.IntegerField(default=0)),
+                ('goals_against', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('home_wins', models.IntegerField(default=0)),
+                ('home_draws', models.IntegerField(default=0)),
+                ('home_losses', models.IntegerField(default=0)),
+                ('home_goals_for', models.IntegerField(default=0)),
+                ('home_goals_against', models.IntegerField(default=0)),
+                ('away_wins', models.IntegerField(default=0)),
+                ('away_draws', models.IntegerField(default=0)),
+                ('away_losses', models.IntegerField(default=0)),
+                ('away_goals_for', models.IntegerField(default=0)),
+                ('away_goals_against', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Team season stats',
+                'ordering': ['season', '-points'],
+                'constraints': [models.UniqueConstraint(fields=('team', 'season'), name='unique_team_season_stats')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TeamMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team', models.CharField(max_length=100)),
+                ('opponent', models.CharField(max_length=100)),
+                ('season', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('is_home', models.BooleanField()),
+                ('goals_for', models.IntegerField()),
+                ('goals_against', models.IntegerField()),
+                ('points', models.IntegerField()),
+                ('cumulative_points', models.IntegerField()),
+                ('rolling_points', models.FloatField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_rows', to='dashboard.match')),
+            ],
+            options={
+                'ordering': ['date', 'match_id'],
+                'indexes': [models.Index(fields=['team', 'season', 'date'], name='teammatch_team_season_date')],
+            },
+        ),
+    ]
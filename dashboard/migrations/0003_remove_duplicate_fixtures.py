@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:27
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def remove_duplicate_fixtures(apps, schema_editor):
+    # Keep the most recently written row for each (date, home_team, away_team)
+    Match = apps.get_model('dashboard', 'Match')
+    duplicates = (
+        Match.objects.values('date', 'home_team', 'away_team')
+        .annotate(rows=Count('id'), keep_id=Max('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates:
+        Match.objects.filter(
+            date=dup['date'], home_team=dup['home_team'], away_team=dup['away_team'],
+        ).exclude(id=dup['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+    """Drop duplicate fixtures so 0004 can make them unique.
+
+    Kept apart from the schema changes: on PostgreSQL, altering a table in
+    the same transaction as the deletes fails with pending trigger events.
+    """
+
+    dependencies = [
+        ('dashboard', '0002_team_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_fixtures, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_remove_duplicate_fixtures'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['season', 'home_team', 'date'], name='match_season_home_date'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['season', 'away_team', 'date'], name='match_season_away_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(fields=('date', 'home_team', 'away_team'), name='unique_match_fixture'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Add the Team table and nullable references to it beside Match's team names.
+
+    0007 fills them in and 0008 swaps them for the name columns. The three
+    are separate so no transaction mixes data changes with ALTER TABLE,
+    which PostgreSQL rejects with pending trigger events.
+    """
+
+    dependencies = [
+        ('dashboard', '0005_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Team',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TeamAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100, unique=True)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='dashboard.team')),
+            ],
+            options={
+                'verbose_name_plural': 'Team aliases',
+                'ordering': ['alias'],
+            },
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='home_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.team'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='away_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.team'),
+        ),
+        # Nullable so that migrating backwards can re-add the columns before refilling them
+        migrations.AlterField(
+            model_name='match',
+            name='home_team',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='away_team',
+            field=models.CharField(max_length=100, null=True),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:40
+
+import re
+import unicodedata
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+_AFFIXES = {'fc', 'afc', 'cf'}
+
+
+def team_key(name):
+    # Frozen copy of dashboard.services.teams.team_key
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+    tokens = re.sub(r'[^a-z0-9]+', ' ', text).split()
+    while len(tokens) > 1 and tokens[-1] in _AFFIXES:
+        tokens.pop()
+    while len(tokens) > 1 and tokens[0] in _AFFIXES:
+        tokens.pop(0)
+    return ' '.join(tokens) or name.strip().lower()
+
+
+def populate_teams(apps, schema_editor):
+    Match = apps.get_model('dashboard', 'Match')
+    Team = apps.get_model('dashboard', 'Team')
+    TeamAlias = apps.get_model('dashboard', 'TeamAlias')
+
+    names = set(Match.objects.values_list('home_team', flat=True))
+    names |= set(Match.objects.values_list('away_team', flat=True))
+    teams = {}
+    for name in sorted(names):
+        key = team_key(name)
+        if key not in teams:
+            teams[key] = Team.objects.create(name=name, key=key)
+    TeamAlias.objects.bulk_create(
+        [TeamAlias(alias=name, team=teams[team_key(name)]) for name in sorted(names)]
+    )
+    for name in names:
+        team = teams[team_key(name)]
+        Match.objects.filter(home_team=name).update(home_ref=team)
+        Match.objects.filter(away_team=name).update(away_ref=team)
+
+    # Spellings merged into one team can turn two rows into the same fixture;
+    # keep the most recently written one as 0003 did
+    duplicates = (
+        Match.objects.values('date', 'home_ref', 'away_ref')
+        .annotate(rows=Count('id'), keep_id=Max('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates:
+        Match.objects.filter(
+            date=dup['date'], home_ref=dup['home_ref'], away_ref=dup['away_ref'],
+        ).exclude(id=dup['keep_id']).delete()
+
+
+def restore_team_names(apps, schema_editor):
+    Match = apps.get_model('dashboard', 'Match')
+    Team = apps.get_model('dashboard', 'Team')
+    for team in Team.objects.all():
+        Match.objects.filter(home_ref=team).update(home_team=team.name)
+        Match.objects.filter(away_ref=team).update(away_team=team.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_team'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_teams, restore_team_names),
+    ]
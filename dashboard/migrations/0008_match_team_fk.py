@@ -0,0 +1,138 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Replace Match's team name columns with the Team references 0007 filled in.
+
+    TeamMatch and TeamSeasonStats are derived from Match, so they are recreated
+    empty here; run ``manage.py refresh_team_stats`` after migrating.
+    """
+
+    dependencies = [
+        ('dashboard', '0007_populate_teams'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='match',
+            name='unique_match_fixture',
+        ),
+        migrations.RemoveIndex(
+            model_name='match',
+            name='match_season_home_date',
+        ),
+        migrations.RemoveIndex(
+            model_name='match',
+            name='match_season_away_date',
+        ),
+        migrations.RemoveField(
+            model_name='match',
+            name='home_team',
+        ),
+        migrations.RemoveField(
+            model_name='match',
+            name='away_team',
+        ),
+        migrations.RenameField(
+            model_name='match',
+            old_name='home_ref',
+            new_name='home_team',
+        ),
+        migrations.RenameField(
+            model_name='match',
+            old_name='away_ref',
+            new_name='away_team',
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='home_team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='home_matches', to='dashboard.team'),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='away_team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='away_matches', to='dashboard.team'),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='home_goals',
+            field=models.SmallIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='away_goals',
+            field=models.SmallIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['season', 'home_team', 'date'], name='match_season_home_date'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['season', 'away_team', 'date'], name='match_season_away_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(fields=('date', 'home_team', 'away_team'), name='unique_match_fixture'),
+        ),
+        migrations.DeleteModel(
+            name='TeamMatch',
+        ),
+        migrations.DeleteModel(
+            name='TeamSeasonStats',
+        ),
+        migrations.CreateModel(
+            name='TeamSeasonStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.CharField(max_length=20)),
+                ('played', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('goals_for', models.IntegerField(default=0)),
+                ('goals_against', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('home_wins', models.IntegerField(default=0)),
+                ('home_draws', models.IntegerField(default=0)),
+                ('home_losses', models.IntegerField(default=0)),
+                ('home_goals_for', models.IntegerField(default=0)),
+                ('home_goals_against', models.IntegerField(default=0)),
+                ('away_wins', models.IntegerField(default=0)),
+                ('away_draws', models.IntegerField(default=0)),
+                ('away_losses', models.IntegerField(default=0)),
+                ('away_goals_for', models.IntegerField(default=0)),
+                ('away_goals_against', models.IntegerField(default=0)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='season_stats', to='dashboard.team')),
+            ],
+            options={
+                'verbose_name_plural': 'Team season stats',
+                'ordering': ['season', '-points'],
+                'constraints': [models.UniqueConstraint(fields=('team', 'season'), name='unique_team_season_stats')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TeamMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('is_home', models.BooleanField()),
+                ('goals_for', models.IntegerField()),
+                ('goals_against', models.IntegerField()),
+                ('points', models.IntegerField()),
+                ('cumulative_points', models.IntegerField()),
+                ('rolling_points', models.FloatField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_rows', to='dashboard.match')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_matches', to='dashboard.team')),
+                ('opponent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.team')),
+            ],
+            options={
+                'ordering': ['date', 'match_id'],
+                'indexes': [models.Index(fields=['team', 'season', 'date'], name='teammatch_team_season_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:52
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def season_key(label):
+    # Frozen copy of dashboard.services.seasons.season_key
+    key = re.sub(r'\s*[/_\-]\s*', '-', label.strip())
+    key = re.sub(r'\s+', '', key)
+    match = re.match(r'^(\d{4})-(\d{2}|\d{4})$', key)
+    if match:
+        start, end = match.groups()
+        if len(end) == 2:
+            end = str(int(start[:2]) * 100 + int(end) + (100 if int(end) < int(start[2:]) else 0))
+        key = f'{start}-{end}'
+    return key
+
+
+def populate_seasons(apps, schema_editor):
+    Match = apps.get_model('dashboard', 'Match')
+    Season = apps.get_model('dashboard', 'Season')
+    SeasonAlias = apps.get_model('dashboard', 'SeasonAlias')
+    TeamMatch = apps.get_model('dashboard', 'TeamMatch')
+    TeamSeasonStats = apps.get_model('dashboard', 'TeamSeasonStats')
+    DataVersion = apps.get_model('dashboard', 'DataVersion')
+
+    labels = set(Match.objects.values_list('season', flat=True).distinct())
+    keys = {label: season_key(label) for label in labels}
+    seasons = {}
+    for key in sorted(set(keys.values())):
+        years = re.match(r'^(\d{4})(?:-(\d{4}))?$', key)
+        if years:
+            start, end = years.groups()
+            name, start_year = (f'{start}/{end}' if end else start), int(start)
+        else:
+            name, start_year = key, None
+        seasons[key] = Season.objects.create(key=key, name=name, start_year=start_year)
+    aliases = dict(keys, **{key: key for key in seasons})
+    SeasonAlias.objects.bulk_create([SeasonAlias(alias=alias, season=seasons[key]) for alias, key in aliases.items()])
+
+    # Relabel matches stored under a non-canonical label. Seasons that gain
+    # matches this way need their derived rows rebuilt (refresh_team_stats),
+    # and their data version moves on so cached charts are not reused.
+    for label, key in keys.items():
+        if label == key:
+            continue
+        Match.objects.filter(season=label).update(season=key)
+        for season in (label, key):
+            TeamMatch.objects.filter(season=season).delete()
+            TeamSeasonStats.objects.filter(season=season).delete()
+        DataVersion.objects.filter(season=label).delete()
+        if not DataVersion.objects.filter(season=key).update(version=F('version') + 1, updated_at=timezone.now()):
+            DataVersion.objects.create(season=key, version=1, updated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_match_team_fk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Season',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(max_length=50)),
+                ('start_year', models.PositiveSmallIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-start_year', 'key'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SeasonAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=50, unique=True)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='dashboard.season')),
+            ],
+            options={
+                'verbose_name_plural': 'Season aliases',
+                'ordering': ['alias'],
+            },
+        ),
+        migrations.RunPython(populate_seasons, migrations.RunPython.noop),
+    ]
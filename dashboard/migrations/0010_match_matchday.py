@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_season'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='matchday',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
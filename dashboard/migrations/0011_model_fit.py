@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_match_matchday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelFit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.CharField(max_length=20, unique=True)),
+                ('window', models.CharField(max_length=255)),
+                ('home_advantage', models.FloatField()),
+                ('rho', models.FloatField()),
+                ('log_likelihood', models.FloatField()),
+                ('matches', models.PositiveIntegerField()),
+                ('iterations', models.PositiveIntegerField()),
+                ('fitted_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TeamRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attack', models.FloatField()),
+                ('defence', models.FloatField()),
+                ('fit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='dashboard.modelfit')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='dashboard.team')),
+            ],
+            options={
+                'ordering': ['-attack'],
+                'constraints': [models.UniqueConstraint(fields=('fit', 'team'), name='unique_fit_team_rating')],
+            },
+        ),
+    ]
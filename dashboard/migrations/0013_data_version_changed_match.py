@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0012_match_export_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataversion',
+            name='changed_match',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='dashboard.match'),
+        ),
+    ]
@@ -1,6 +1,58 @@
 from django.db import models
 
 
+class Team(models.Model):
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+    # Normalised form of the name (see services/teams.team_key) that spellings are matched on
+    key = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class TeamAlias(models.Model):
+    """A spelling of a team name seen in imported data, e.g. 'Manchester United' for 'Manchester United FC'."""
+    alias = models.CharField(max_length=100, unique=True)
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='aliases')
+
+    class Meta:
+        ordering = ['alias']
+        verbose_name_plural = "Team aliases"
+
+    def __str__(self):
+        return self.alias
+
+
+class Season(models.Model):
+    # Canonical form stored on Match.season, e.g. '2024-2025' (see services/seasons.season_key)
+    key = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=50)
+    start_year = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-start_year', 'key']
+
+    def __str__(self):
+        return self.name
+
+
+class SeasonAlias(models.Model):
+    """A season label seen in imported data or requests, e.g. '2024/2025' for '2024-2025'."""
+    alias = models.CharField(max_length=50, unique=True)
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='aliases')
+
+    class Meta:
+        ordering = ['alias']
+        verbose_name_plural = "Season aliases"
+
+    def __str__(self):
+        return self.alias
+
+
 class Match(models.Model):
     RESULT_CHOICES = [
         ('H', 'Home Win'),
@@ -9,16 +61,132 @@ class Match(models.Model):
     ]
     
     date = models.DateField()
-    home_team = models.CharField(max_length=100)
-    away_team = models.CharField(max_length=100)
-    home_goals = models.IntegerField()
-    away_goals = models.IntegerField()
+    home_team = models.ForeignKey(Team, on_delete=models.PROTECT, related_name='home_matches')
+    away_team = models.ForeignKey(Team, on_delete=models.PROTECT, related_name='away_matches')
+    home_goals = models.SmallIntegerField()
+    away_goals = models.SmallIntegerField()
     result = models.CharField(max_length=1, choices=RESULT_CHOICES)
     season = models.CharField(max_length=20)
+    # Round of the competition, when the source has one (CSV 'matchday', StatsBomb 'match_week')
+    matchday = models.PositiveSmallIntegerField(null=True, blank=True)
     
     class Meta:
         ordering = ['date']
         verbose_name_plural = "Matches"
+        indexes = [
+            models.Index(fields=['season', 'home_team', 'date'], name='match_season_home_date'),
+            models.Index(fields=['season', 'away_team', 'date'], name='match_season_away_date'),
+            # Keyset pages of /api/matches/ for one season
+            models.Index(fields=['season', 'date', 'id'], name='match_season_date_id'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'home_team', 'away_team'], name='unique_match_fixture'),
+        ]
     
     def __str__(self):
         return f"{self.home_team} vs {self.away_team} ({self.date})"
+
+
+class TeamSeasonStats(models.Model):
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='season_stats')
+    season = models.CharField(max_length=20)
+    played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    goals_for = models.IntegerField(default=0)
+    goals_against = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+    home_wins = models.IntegerField(default=0)
+    home_draws = models.IntegerField(default=0)
+    home_losses = models.IntegerField(default=0)
+    home_goals_for = models.IntegerField(default=0)
+    home_goals_against = models.IntegerField(default=0)
+    away_wins = models.IntegerField(default=0)
+    away_draws = models.IntegerField(default=0)
+    away_losses = models.IntegerField(default=0)
+    away_goals_for = models.IntegerField(default=0)
+    away_goals_against = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['season', '-points']
+        verbose_name_plural = "Team season stats"
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'season'], name='unique_team_season_stats'),
+        ]
+
+    def __str__(self):
+        return f"{self.team} ({self.season})"
+
+    @property
+    def goal_difference(self):
+        return self.goals_for - self.goals_against
+
+
+class TeamMatch(models.Model):
+    """One row per team per match, seen from that team's side."""
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='team_rows')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='team_matches')
+    opponent = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+    season = models.CharField(max_length=20)
+    date = models.DateField()
+    is_home = models.BooleanField()
+    goals_for = models.IntegerField()
+    goals_against = models.IntegerField()
+    points = models.IntegerField()
+    cumulative_points = models.IntegerField()
+    rolling_points = models.FloatField()
+
+    class Meta:
+        ordering = ['date', 'match_id']
+        indexes = [
+            models.Index(fields=['team', 'season', 'date'], name='teammatch_team_season_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.team} vs {self.opponent} ({self.date})"
+
+
+class DataVersion(models.Model):
+    """Change counter per season, bumped whenever an import rewrites that season's data."""
+    season = models.CharField(max_length=20, unique=True)
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField()
+    # The only match that changed in the latest bump, when that is all that changed;
+    # lets snapshots one version behind apply it instead of reloading the season
+    changed_match = models.ForeignKey('Match', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+
+    def __str__(self):
+        return f"{self.season} v{self.version}"
+
+
+class ModelFit(models.Model):
+    """Fitted Dixon-Coles parameters used to predict one season's matches (see services/prediction.py)."""
+    season = models.CharField(max_length=20, unique=True)
+    # "season:version" for each season in the fitting window, oldest first
+    window = models.CharField(max_length=255)
+    home_advantage = models.FloatField()
+    rho = models.FloatField()
+    log_likelihood = models.FloatField()
+    matches = models.PositiveIntegerField()
+    iterations = models.PositiveIntegerField()
+    fitted_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.season} ({self.window})"
+
+
+class TeamRating(models.Model):
+    fit = models.ForeignKey(ModelFit, on_delete=models.CASCADE, related_name='ratings')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='ratings')
+    attack = models.FloatField()
+    defence = models.FloatField()
+
+    class Meta:
+        ordering = ['-attack']
+        constraints = [
+            models.UniqueConstraint(fields=['fit', 'team'], name='unique_fit_team_rating'),
+        ]
+
+    def __str__(self):
+        return f"{self.team} ({self.fit.season})"
@@ -0,0 +1,77 @@
+import numpy as np
+from django.db import transaction
+from dashboard.models import Match, TeamMatch, TeamSeasonStats
+from dashboard.services.analytics import season_team_rows
+from dashboard.services.versioning import bump_season_version
+
+
+def refresh_season(season):
+    """Rebuild the TeamMatch and TeamSeasonStats rows for one season from Match and bump its version."""
+    matches = list(
+        Match.objects.filter(season=season)
+        .order_by('date', 'id')
+        .values_list('id', 'date', 'home_team_id', 'away_team_id', 'home_goals', 'away_goals')
+    )
+    team_rows = []
+    stats = []
+    if matches:
+        ids, dates, home_teams, away_teams, home_goals, away_goals = (np.array(col, dtype=object) for col in zip(*matches))
+        rows = season_team_rows(ids, dates, home_teams, away_teams, home_goals, away_goals)
+        columns = ('match_id', 'team_id', 'opponent_id', 'date', 'is_home', 'goals_for', 'goals_against',
+                   'points', 'cumulative_points', 'rolling_points')
+        keys = ('match_id', 'team', 'opponent') + columns[3:]
+        for values in zip(*(rows[key].tolist() for key in keys)):
+            team_rows.append(TeamMatch(season=season, **dict(zip(columns, values))))
+
+        index, n_teams = rows['team_index'], len(rows['teams'])
+        points, is_home = rows['points'], rows['is_home']
+
+        def total(values, mask=None):
+            weights = values if mask is None else np.where(mask, values, 0)
+            return np.bincount(index, weights=weights, minlength=n_teams).astype(int).tolist()
+
+        ones = np.ones(len(index), dtype=np.int64)
+        totals = {'played': total(ones), 'points': total(points)}
+        for prefix, side in (('', None), ('home_', is_home), ('away_', ~is_home)):
+            totals[f'{prefix}wins'] = total(ones, points == 3 if side is None else (points == 3) & side)
+            totals[f'{prefix}draws'] = total(ones, points == 1 if side is None else (points == 1) & side)
+            totals[f'{prefix}losses'] = total(ones, points == 0 if side is None else (points == 0) & side)
+            totals[f'{prefix}goals_for'] = total(rows['goals_for'], side)
+            totals[f'{prefix}goals_against'] = total(rows['goals_against'], side)
+        for i, team in enumerate(rows['teams'].tolist()):
+            stats.append(TeamSeasonStats(team_id=team, season=season, **{field: values[i] for field, values in totals.items()}))
+
+    with transaction.atomic():
+        TeamMatch.objects.filter(season=season).delete()
+        TeamSeasonStats.objects.filter(season=season).delete()
+        TeamMatch.objects.bulk_create(team_rows, batch_size=1000)
+        TeamSeasonStats.objects.bulk_create(stats)
+        bump_season_version(season)
+    return len(stats)
+
+
+def refresh_seasons(seasons):
+    """Refresh every season in ``seasons``; returns the number of team rows rebuilt."""
+    return sum(refresh_season(season) for season in sorted(set(seasons)))
+
+
+def rank_standings(teams, head_to_head_key):
+    """Sort table rows on points, goal difference, goals scored, head-to-head, then name.
+
+    ``head_to_head_key(names)`` is only called for groups of teams still level
+    after goals scored, and returns ``{name: (points, gd, gf)}`` over the
+    matches among them.
+    """
+    tied = {}
+    for team in teams:
+        tied.setdefault((team['points'], team['gd'], team['gf']), []).append(team['name'])
+    h2h = {}
+    for names in tied.values():
+        if len(names) > 1:
+            h2h.update(head_to_head_key(names))
+
+    def rank(team):
+        h2h_points, h2h_gd, h2h_gf = h2h.get(team['name'], (0, 0, 0))
+        return (-team['points'], -team['gd'], -team['gf'], -h2h_points, -h2h_gd, -h2h_gf, team['name'])
+
+    return sorted(teams, key=rank)
@@ -0,0 +1,165 @@
+"""Vectorised team-perspective analytics.
+
+Match columns are pulled with ``values_list`` into NumPy arrays, and points,
+goal difference, rolling form and cumulative series are computed with array
+operations instead of per-row Python loops. ``TeamSeries`` covers one team's
+season and builds the JSON payloads the views return. ``season_team_rows``
+does the same for every team in a season at once and is what the ingest
+refresh uses.
+"""
+import numpy as np
+
+FORM_WINDOW = 5
+
+
+def match_points(goals_for, goals_against):
+    return np.where(goals_for > goals_against, 3, np.where(goals_for == goals_against, 1, 0))
+
+
+def grouped_cumsum(values, starts):
+    """Cumulative sum that restarts at every index in ``starts`` (which must include 0)."""
+    totals = np.cumsum(values)
+    if len(values) == 0:
+        return totals
+    offsets = np.zeros(len(values), dtype=totals.dtype)
+    offsets[starts[1:]] = totals[starts[1:] - 1]
+    return totals - np.maximum.accumulate(offsets)
+
+
+def grouped_rolling_mean(values, starts, window=FORM_WINDOW):
+    """Trailing mean over ``window`` rows that never reaches back past its group start.
+
+    Matches pandas ``rolling(window, min_periods=1).mean()`` applied per group.
+    """
+    n = len(values)
+    prefix = np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+    idx = np.arange(n)
+    group_start = np.zeros(n, dtype=np.int64)
+    group_start[starts] = starts
+    group_start = np.maximum.accumulate(group_start)
+    first = np.maximum(idx - window + 1, group_start)
+    return (prefix[idx + 1] - prefix[first]) / (idx + 1 - first)
+
+
+def rolling_mean(values, window=FORM_WINDOW):
+    return grouped_rolling_mean(values, np.array([0]), window) if len(values) else np.zeros(0)
+
+
+def season_team_rows(match_ids, dates, home_teams, away_teams, home_goals, away_goals):
+    """Team-perspective rows for every team in a season.
+
+    Takes one entry per match in date order and returns a dict of arrays with
+    two rows per match (home side, then away side), sorted by team and then
+    date. Each row carries points, cumulative points and rolling form.
+    """
+    home_goals = np.asarray(home_goals, dtype=np.int64)
+    away_goals = np.asarray(away_goals, dtype=np.int64)
+    n = len(match_ids)
+    team = np.concatenate((home_teams, away_teams)).astype(object)
+    rows = {
+        'match_id': np.concatenate((match_ids, match_ids)),
+        'date': np.concatenate((dates, dates)),
+        'team': team,
+        'opponent': np.concatenate((away_teams, home_teams)).astype(object),
+        'is_home': np.concatenate((np.ones(n, dtype=bool), np.zeros(n, dtype=bool))),
+        'goals_for': np.concatenate((home_goals, away_goals)),
+        'goals_against': np.concatenate((away_goals, home_goals)),
+    }
+    # Sort by team, then by the match's position in the (date-ordered) input
+    team_codes, team_index = np.unique(team, return_inverse=True)
+    position = np.concatenate((np.arange(n), np.arange(n)))
+    order = np.lexsort((position, team_index))
+    rows = {key: values[order] for key, values in rows.items()}
+    team_index = team_index[order]
+    starts = np.flatnonzero(np.r_[True, team_index[1:] != team_index[:-1]]) if len(team_index) else np.array([0])
+
+    rows['points'] = match_points(rows['goals_for'], rows['goals_against'])
+    rows['cumulative_points'] = grouped_cumsum(rows['points'], starts)
+    rows['rolling_points'] = grouped_rolling_mean(rows['points'], starts)
+    rows['team_index'] = team_index
+    rows['teams'] = team_codes
+    return rows
+
+
+class TeamSeries:
+    """One team's season as parallel arrays, in date order."""
+
+    def __init__(self, team, dates, opponents, is_home, goals_for, goals_against, date_labels=None):
+        self.team = team
+        self.dates = list(dates)
+        self._date_labels = date_labels
+        self.opponents = np.asarray(opponents, dtype=object)
+        self.is_home = np.asarray(is_home, dtype=bool)
+        self.goals_for = np.asarray(goals_for, dtype=np.int64)
+        self.goals_against = np.asarray(goals_against, dtype=np.int64)
+        self.points = match_points(self.goals_for, self.goals_against)
+        self.goal_diff = self.goals_for - self.goals_against
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def date_labels(self):
+        if self._date_labels is None:
+            self._date_labels = [d.strftime('%Y-%m-%d') for d in self.dates]
+        return self._date_labels
+
+    @property
+    def cumulative_points(self):
+        return np.cumsum(self.points)
+
+    @property
+    def rolling_form(self):
+        return rolling_mean(self.points)
+
+    def columns(self):
+        """Plain lists per column, as the chart renderers take them."""
+        return {
+            'date': self.dates,
+            'is_home': self.is_home.tolist(),
+            'goals_for': self.goals_for.tolist(),
+            'goals_against': self.goals_against.tolist(),
+            'points': self.points.tolist(),
+            'rolling_points': self.rolling_form.tolist(),
+            'cumulative_points': self.cumulative_points.tolist(),
+        }
+
+    def _outcomes(self, mask=None):
+        points = self.points if mask is None else self.points[mask]
+        return int((points == 3).sum()), int((points == 1).sum()), int((points == 0).sum())
+
+    def results(self):
+        wins, draws, losses = self._outcomes()
+        return {'wins': wins, 'draws': draws, 'losses': losses}
+
+    def form(self):
+        return {'dates': self.date_labels, 'rolling_average': self.rolling_form.tolist()}
+
+    def goals_over_time(self):
+        return {'dates': self.date_labels, 'scored': self.goals_for.tolist(), 'conceded': self.goals_against.tolist()}
+
+    def cumulative(self):
+        return {'dates': self.date_labels, 'cumulative_points': self.cumulative_points.tolist()}
+
+    def goal_diff_series(self):
+        return {'dates': self.date_labels, 'goal_diff': self.goal_diff.tolist()}
+
+    def home_away_breakdown(self):
+        stats = {}
+        for side, mask in (('home', self.is_home), ('away', ~self.is_home)):
+            wins, draws, losses = self._outcomes(mask)
+            stats[side] = {'wins': wins, 'draws': draws, 'losses': losses,
+                           'gf': int(self.goals_for[mask].sum()), 'ga': int(self.goals_against[mask].sum())}
+        return stats
+
+    def goals_histogram(self):
+        if not len(self):
+            return {'bins': [], 'counts': []}
+        counts = np.bincount(self.goals_for)
+        # bins are left edges, one per goal count from 0 to the maximum
+        return {'bins': list(range(len(counts))), 'counts': counts.tolist()}
+
+    def head_to_head(self, opponent):
+        wins, draws, losses = self._outcomes(self.opponents == opponent)
+        return {'team1_name': self.team, 'team2_name': opponent,
+                'results': {'team1_wins': wins, 'team2_wins': losses, 'draws': draws}}
@@ -0,0 +1,135 @@
+"""Matplotlib chart renderers.
+
+Everything here is plain pandas/matplotlib with no Django imports, so the
+functions can run inside the rendering worker processes
+(see services/rendering.py). Each chart takes the team's match rows as a
+DataFrame and returns a figure, or None when there is nothing to draw.
+"""
+import time
+from io import BytesIO
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+
+def team_matches_dataframe(columns) -> pd.DataFrame:
+    df = pd.DataFrame(columns)
+    df['venue'] = df['is_home'].map({True: 'Home', False: 'Away'})
+    df['gd'] = df['goals_for'] - df['goals_against']
+    return df
+
+
+def form_image(df, team_name, season):
+    fig, ax1 = plt.subplots(figsize=(7, 3.5), dpi=150)
+    ax1.plot(df['date'], df['rolling_points'], color='#0d6efd', label='Rolling 5 Avg')
+    ax1.set_ylabel('Rolling Avg')
+    ax2 = ax1.twinx()
+    ax2.plot(df['date'], df['cumulative_points'], color='#198754', label='Cumulative Points')
+    ax2.set_ylabel('Points')
+    ax1.set_title(f'{team_name} Form ({season})')
+    fig.autofmt_xdate()
+    return fig
+
+
+def hist_goals(df, team_name, season):
+    fig, ax = plt.subplots(figsize=(6,3.2), dpi=150)
+    df['goals_for'].plot(kind='hist', bins=range(0, int(df['goals_for'].max())+2), color='#0d6efd', edgecolor='white', ax=ax)
+    ax.set_title(f'Goals Scored Histogram - {team_name} ({season})')
+    ax.set_xlabel('Goals For per Match')
+    ax.set_ylabel('Matches')
+    return fig
+
+
+def kde_gd(df, team_name, season):
+    if df['gd'].nunique() <= 1: return None
+    fig, ax = plt.subplots(figsize=(6,3.2), dpi=150)
+    df['gd'].plot(kind='kde', color='#198754', ax=ax)
+    ax.set_title(f'Goal Difference KDE - {team_name} ({season})')
+    ax.set_xlabel('Goal Difference')
+    return fig
+
+
+def box_points(df, team_name, season):
+    fig, ax = plt.subplots(figsize=(4,3.2), dpi=150)
+    df['points'].plot(kind='box', ax=ax)
+    ax.set_title(f'Points Distribution - {team_name} ({season})')
+    ax.set_ylabel('Points per Match')
+    return fig
+
+
+def scatter_scored_conceded(df, team_name, season):
+    fig, ax = plt.subplots(figsize=(6,3.2), dpi=150)
+    df.plot.scatter(x='goals_for', y='goals_against', color='#dc3545', ax=ax)
+    ax.set_title(f'Scored vs Conceded - {team_name} ({season})')
+    ax.set_xlabel('Goals For')
+    ax.set_ylabel('Goals Against')
+    return fig
+
+
+def hexbin_scored_conceded(df, team_name, season):
+    fig, ax = plt.subplots(figsize=(6,3.2), dpi=150)
+    df.plot.hexbin(x='goals_for', y='goals_against', gridsize=15, cmap='Blues', ax=ax)
+    ax.set_title(f'Density: Scored vs Conceded - {team_name} ({season})')
+    ax.set_xlabel('Goals For')
+    ax.set_ylabel('Goals Against')
+    return fig
+
+
+def box_goals_by_venue(df, team_name, season):
+    fig, ax = plt.subplots(figsize=(6,3.2), dpi=150)
+    df.boxplot(column='goals_for', by='venue', ax=ax)
+    ax.set_title(f'Goals For by Venue - {team_name} ({season})')
+    ax.set_xlabel('')
+    ax.set_ylabel('Goals For')
+    fig.suptitle('')
+    return fig
+
+
+def corr_heatmap(df, team_name, season):
+    cols = ['points','goals_for','goals_against','gd']
+    corr = df[cols].corr()
+    fig, ax = plt.subplots(figsize=(4.5,3.5), dpi=150)
+    cax = ax.imshow(corr, cmap='coolwarm', vmin=-1, vmax=1)
+    ax.set_xticks(range(len(cols))); ax.set_xticklabels(cols, rotation=45, ha='right')
+    ax.set_yticks(range(len(cols))); ax.set_yticklabels(cols)
+    ax.set_title(f'Correlation Heatmap - {team_name} ({season})')
+    fig.colorbar(cax, ax=ax, fraction=0.046, pad=0.04)
+    return fig
+
+
+CHARTS = {
+    'form_image': form_image,
+    'hist_goals': hist_goals,
+    'kde_gd': kde_gd,
+    'box_points': box_points,
+    'scatter_scored_conceded': scatter_scored_conceded,
+    'hexbin_scored_conceded': hexbin_scored_conceded,
+    'box_goals_by_venue': box_goals_by_venue,
+    'corr_heatmap': corr_heatmap,
+}
+
+
+def render(kind, team_name, season, columns, timings=None):
+    """Draw chart ``kind`` from the team's match columns and return PNG bytes, or None for no content.
+
+    If ``timings`` is a dict, the seconds spent building the DataFrame and
+    drawing the figure are stored in it under 'dataframe' and 'render'.
+    """
+    started = time.perf_counter()
+    df = team_matches_dataframe(columns)
+    built = time.perf_counter()
+    if timings is not None:
+        timings['dataframe'] = built - started
+    if df.empty:
+        return None
+    fig = CHARTS[kind](df, team_name, season)
+    if fig is None:
+        return None
+    buf = BytesIO()
+    fig.tight_layout()
+    fig.savefig(buf, format='png')
+    plt.close(fig)
+    if timings is not None:
+        timings['render'] = time.perf_counter() - built
+    return buf.getvalue()
@@ -0,0 +1,96 @@
+"""Raw match export for /api/matches/.
+
+JSON is paged with a keyset cursor on (date, id). Each page is one indexed
+range query, however deep into the result set it is. CSV and NDJSON stream
+the whole result set through ``QuerySet.iterator()``, so at most one chunk of
+rows is in memory at a time. Under ASGI the chunks are produced through
+``aiterate()``: Django would otherwise read a synchronous iterator into a
+list before sending anything.
+"""
+import csv
+import io
+import json
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from dashboard.models import Match
+
+FIELDS = ('id', 'date', 'season', 'matchday', 'home_team', 'away_team', 'home_goals', 'away_goals', 'result')
+_COLUMNS = ('id', 'date', 'season', 'matchday', 'home_team__name', 'away_team__name', 'home_goals', 'away_goals', 'result')
+
+
+def match_rows(season=None, team_pk=None, date_from=None, date_to=None):
+    """Matches as ``FIELDS`` tuples in (date, id) order, filtered by canonical season, Team pk and inclusive dates."""
+    matches = Match.objects.order_by('date', 'id')
+    if season is not None:
+        matches = matches.filter(season=season)
+    if team_pk is not None:
+        matches = matches.filter(Q(home_team_id=team_pk) | Q(away_team_id=team_pk))
+    if date_from is not None:
+        matches = matches.filter(date__gte=date_from)
+    if date_to is not None:
+        matches = matches.filter(date__lte=date_to)
+    return matches.values_list(*_COLUMNS)
+
+
+def parse_cursor(cursor):
+    """``(date, id)`` from a ``next`` cursor; raises ValueError if it is malformed."""
+    day, _, pk = cursor.partition(':')
+    return date.fromisoformat(day), int(pk)
+
+
+def page(rows, after=None, limit=100):
+    """One page of ``rows`` after the ``(date, id)`` cursor, plus the cursor of the next page (None on the last)."""
+    if after is not None:
+        day, pk = after
+        rows = rows.filter(Q(date__gt=day) | Q(date=day, id__gt=pk))
+    batch = list(rows[:limit + 1])
+    next_cursor = f'{batch[limit - 1][1].isoformat()}:{batch[limit - 1][0]}' if len(batch) > limit else None
+    return [_record(row) for row in batch[:limit]], next_cursor
+
+
+def _record(row):
+    record = dict(zip(FIELDS, row))
+    record['date'] = record['date'].isoformat()
+    return record
+
+
+def csv_chunks(rows, chunk_size=2000):
+    """The CSV export, header first, as one string per ``chunk_size`` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for i, row in enumerate(rows.iterator(chunk_size=chunk_size), start=1):
+        writer.writerow(row)
+        if i % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(rows, chunk_size=2000):
+    """The NDJSON export, one object per line, as one string per ``chunk_size`` rows."""
+    lines = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        lines.append(json.dumps(_record(row)))
+        if len(lines) == chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+async def aiterate(chunks):
+    """Serve a query-running chunk generator to an ASGI response, one chunk per thread hop."""
+    # thread_sensitive keeps every step on the thread that owns the DB cursor
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await step(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Also runs when the client disconnects mid-export, releasing the cursor
+        await sync_to_async(chunks.close, thread_sensitive=True)()
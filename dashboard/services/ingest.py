@@ -0,0 +1,137 @@
+"""Parsing and bulk writing of match rows, shared by the ingest commands.
+
+``parse_row`` turns one CSV or feed record into Match field values under
+raw team and season names; load_matches, ingest_live and stage_matches all
+go through it, so a record is read the same way whichever path it takes.
+Problems with a record are passed to ``warn`` (a command's
+``stderr.write``) rather than raised.
+
+``write_chunk`` upserts a list of parsed rows in one transaction and adds
+every season it wrote to, or moved a fixture out of, to ``touched``; the
+caller refreshes those with ``refresh_seasons`` once it is done.
+"""
+from datetime import datetime
+from django.db import transaction
+from dashboard.models import Match
+from dashboard.services.seasons import resolve_or_create_seasons
+from dashboard.services.teams import resolve_or_create_teams
+
+
+def _ignore(message):
+    pass
+
+
+def parse_row(row, warn=_ignore):
+    """Turn one CSV row into Match field values, or None if it should be skipped."""
+    # Required columns mapping per spec
+    date_str = (row.get('date_utc') or '').strip()
+    home_team = (row.get('home_team') or '').strip()
+    away_team = (row.get('away_team') or '').strip()
+    season = (row.get('season') or '').strip()
+
+    if not date_str or not home_team or not away_team or not season:
+        warn(f'Skipping incomplete row: {row}')
+        return None
+
+    # Parse date_utc. Try ISO first, then common fallbacks
+    try:
+        # Handle ISO formats with optional timezone, e.g. '2025-01-29 20:00:00+00:00' or '2025-01-29T20:00:00Z'
+        iso_candidate = date_str.replace('T', ' ').replace('Z', '+00:00')
+        # datetime.fromisoformat supports '+00:00' offset
+        date_obj = datetime.fromisoformat(iso_candidate).date()
+    except ValueError:
+        try:
+            cleaned = date_str.replace('Z', '').replace('T', ' ')
+            if '-' in cleaned and ':' in cleaned:
+                date_obj = datetime.strptime(cleaned, '%Y-%m-%d %H:%M:%S').date()
+            elif '-' in cleaned:
+                date_obj = datetime.strptime(cleaned, '%Y-%m-%d').date()
+            elif '/' in cleaned:
+                date_obj = datetime.strptime(cleaned, '%m/%d/%Y').date()
+            else:
+                date_obj = datetime.strptime(cleaned, '%d-%m-%Y').date()
+        except ValueError:
+            warn(f'Invalid date format in row: {row}')
+            return None
+
+    # Goals from fulltime_home/fulltime_away
+    try:
+        home_goals = int(row.get('fulltime_home', 0))
+        away_goals = int(row.get('fulltime_away', 0))
+    except ValueError:
+        warn(f'Invalid goal values in row: {row}')
+        return None
+
+    # Matchday is optional; a missing or malformed value is stored as NULL
+    try:
+        matchday = int(row.get('matchday') or '') or None
+    except ValueError:
+        matchday = None
+
+    # Determine result
+    if home_goals > away_goals:
+        result = 'H'
+    elif away_goals > home_goals:
+        result = 'A'
+    else:
+        result = 'D'
+
+    return {
+        'date': date_obj,
+        'home_team': home_team,
+        'away_team': away_team,
+        'home_goals': home_goals,
+        'away_goals': away_goals,
+        'result': result,
+        'season': season,
+        'matchday': matchday,
+    }
+
+
+def write_chunk(chunk, touched):
+    """Upsert a chunk of parsed rows in a single transaction; returns ``(created, updated)``."""
+    with transaction.atomic():
+        team_ids = resolve_or_create_teams({r['home_team'] for r in chunk} | {r['away_team'] for r in chunk})
+        # Stored under the canonical season key, e.g. '2024/2025' becomes '2024-2025'
+        season_keys = resolve_or_create_seasons({r['season'] for r in chunk})
+        # Later rows for the same fixture win, as they did with per-row saves
+        rows = {}
+        for r in chunk:
+            values = {key: value for key, value in r.items() if key not in ('home_team', 'away_team')}
+            values['home_team_id'] = team_ids[r['home_team']]
+            values['away_team_id'] = team_ids[r['away_team']]
+            values['season'] = season_keys[r['season']]
+            rows[(values['date'], values['home_team_id'], values['away_team_id'])] = values
+
+        # Only needed for the created/updated counts and for refreshing
+        # the stats of seasons a fixture is moved out of
+        existing = {}
+        candidates = Match.objects.filter(
+            date__in={key[0] for key in rows},
+            home_team_id__in={key[1] for key in rows},
+            away_team_id__in={key[2] for key in rows},
+        ).values_list('date', 'home_team_id', 'away_team_id', 'season')
+        for date, home_team, away_team, season in candidates:
+            existing[(date, home_team, away_team)] = season
+
+        updated = 0
+        for key, values in rows.items():
+            if key in existing:
+                touched.add(existing[key])
+                updated += 1
+            touched.add(values['season'])
+
+        # A row without a matchday keeps the stored one, so re-importing a
+        # file that lacks the column does not wipe them
+        update_fields = ['home_goals', 'away_goals', 'result', 'season']
+        for has_matchday in (True, False):
+            group = [Match(**values) for values in rows.values() if (values['matchday'] is not None) == has_matchday]
+            if group:
+                Match.objects.bulk_create(
+                    group,
+                    update_conflicts=True,
+                    unique_fields=['date', 'home_team', 'away_team'],
+                    update_fields=update_fields + ['matchday'] if has_matchday else update_fields,
+                )
+
+    return len(rows) - updated, updated
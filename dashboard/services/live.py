@@ -0,0 +1,266 @@
+"""Live results, applied one match at a time.
+
+``apply_result`` writes a new or corrected result to ``Match`` and moves the
+season's ``TeamSeasonStats`` and ``TeamMatch`` rows by that match's delta,
+instead of rebuilding the season the way ``refresh_season`` does. A result
+that lands after a team's latest match, the normal matchday case, costs a
+fixed handful of statements. A late or corrected result also shifts the
+cumulative points of the team's later rows in one UPDATE and recomputes the
+rolling form of at most ``FORM_WINDOW - 1`` of them.
+
+The version bump names the match, so each process's season snapshot (which
+the dashboard reads) applies just that match on its next request instead
+of reloading the season; see ``SeasonSnapshot.with_match``.
+
+``FeedReader`` and ``DropDirectory`` turn an append-only NDJSON/CSV feed or a
+drop directory of such files into records for it.
+"""
+import csv
+import json
+import os
+from django.db import transaction
+from django.db.models import F, Q
+from dashboard.models import Match, TeamMatch, TeamSeasonStats
+from dashboard.services.aggregates import refresh_seasons
+from dashboard.services.analytics import FORM_WINDOW, match_points
+from dashboard.services.seasons import resolve_or_create_seasons
+from dashboard.services.teams import resolve_or_create_teams
+from dashboard.services.versioning import bump_season_version
+
+FEED_SUFFIXES = ('.csv', '.ndjson', '.jsonl')
+
+
+def _points(goals_for, goals_against):
+    return int(match_points(goals_for, goals_against))
+
+
+def _stat_deltas(is_home, goals_for, goals_against, sign=1):
+    points = _points(goals_for, goals_against)
+    outcome = {3: 'wins', 1: 'draws', 0: 'losses'}[points]
+    side = 'home_' if is_home else 'away_'
+    return {
+        'played': sign, 'points': sign * points, outcome: sign, f'{side}{outcome}': sign,
+        'goals_for': sign * goals_for, 'goals_against': sign * goals_against,
+        f'{side}goals_for': sign * goals_for, f'{side}goals_against': sign * goals_against,
+    }
+
+
+def _update_stats(season, team_pk, deltas):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = TeamSeasonStats.objects.filter(team_id=team_pk, season=season).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        TeamSeasonStats.objects.create(team_id=team_pk, season=season, **deltas)
+
+
+def _update_series(match, team_pk, opponent_pk, is_home, goals_for, goals_against, old_points):
+    """Insert or correct ``team_pk``'s TeamMatch row for ``match`` and patch the rows after it."""
+    points = _points(goals_for, goals_against)
+    rows = TeamMatch.objects.filter(team_id=team_pk, season=match.season)
+    before = rows.filter(Q(date__lt=match.date) | Q(date=match.date, match_id__lt=match.id))
+    after = rows.filter(Q(date__gt=match.date) | Q(date=match.date, match_id__gt=match.id))
+    previous = list(before.order_by('-date', '-match_id').values_list('points', 'cumulative_points')[:FORM_WINDOW - 1])
+    window = [p for p, _ in reversed(previous)] + [points]
+    values = {
+        'opponent_id': opponent_pk, 'season': match.season, 'date': match.date, 'is_home': is_home,
+        'goals_for': goals_for, 'goals_against': goals_against, 'points': points,
+        'cumulative_points': (previous[0][1] if previous else 0) + points,
+        'rolling_points': sum(window) / len(window),
+    }
+    if old_points is None:
+        TeamMatch.objects.create(match=match, team_id=team_pk, **values)
+    else:
+        TeamMatch.objects.filter(match=match, team_id=team_pk).update(**values)
+    shift = points - (old_points or 0)
+    if old_points is not None and not shift:
+        return
+    # Appended results have nothing after them; late ones move every later
+    # total and the form of the next few rows
+    if shift:
+        after.update(cumulative_points=F('cumulative_points') + shift)
+    later = list(after.order_by('date', 'match_id').values_list('id', 'points')[:FORM_WINDOW - 1])
+    for row_id, row_points in later:
+        window = (window + [row_points])[-FORM_WINDOW:]
+        TeamMatch.objects.filter(id=row_id).update(rolling_points=sum(window) / len(window))
+
+
+def apply_result(parsed):
+    """Store one parsed result and apply it to the season's aggregates.
+
+    ``parsed`` is a row as returned by ``ingest.parse_row``.
+    Returns 'created', 'updated', 'unchanged' or 'moved'; a fixture moved to
+    another season rebuilds both seasons with ``refresh_seasons``.
+    """
+    with transaction.atomic():
+        team_ids = resolve_or_create_teams({parsed['home_team'], parsed['away_team']})
+        season = resolve_or_create_seasons({parsed['season']})[parsed['season']]
+        home_pk, away_pk = team_ids[parsed['home_team']], team_ids[parsed['away_team']]
+        home_goals, away_goals = parsed['home_goals'], parsed['away_goals']
+        match = Match.objects.select_for_update().filter(
+            date=parsed['date'], home_team_id=home_pk, away_team_id=away_pk
+        ).first()
+
+        if match is None:
+            match = Match.objects.create(
+                date=parsed['date'], home_team_id=home_pk, away_team_id=away_pk, home_goals=home_goals,
+                away_goals=away_goals, result=parsed['result'], season=season, matchday=parsed['matchday'],
+            )
+            old = None
+            outcome = 'created'
+        else:
+            if (match.home_goals, match.away_goals, match.season, match.matchday) == \
+                    (home_goals, away_goals, season, parsed['matchday']):
+                return 'unchanged'
+            old = (match.home_goals, match.away_goals)
+            old_season = match.season
+            Match.objects.filter(id=match.id).update(
+                home_goals=home_goals, away_goals=away_goals, result=parsed['result'],
+                season=season, matchday=parsed['matchday'],
+            )
+            if old_season != season:
+                refresh_seasons({old_season, season})
+                return 'moved'
+            match.home_goals, match.away_goals = home_goals, away_goals
+            outcome = 'updated'
+
+        for team_pk, opponent_pk, is_home, goals_for, goals_against in (
+            (home_pk, away_pk, True, home_goals, away_goals),
+            (away_pk, home_pk, False, away_goals, home_goals),
+        ):
+            deltas = _stat_deltas(is_home, goals_for, goals_against)
+            old_points = None
+            if old is not None:
+                old_for, old_against = old if is_home else old[::-1]
+                old_points = _points(old_for, old_against)
+                for field, delta in _stat_deltas(is_home, old_for, old_against, sign=-1).items():
+                    deltas[field] = deltas.get(field, 0) + delta
+            _update_stats(season, team_pk, deltas)
+            _update_series(match, team_pk, opponent_pk, is_home, goals_for, goals_against, old_points)
+        bump_season_version(season, match.id)
+    return outcome
+
+
+def _parse_lines(lines, header=None):
+    """Records from NDJSON lines, or CSV lines after ``header``; returns ``(records, errors)``."""
+    records, errors = [], []
+    for line in lines:
+        if not line.strip():
+            continue
+        if header is not None:
+            records.append(dict(zip(header, next(csv.reader([line])))))
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            errors.append(line)
+            continue
+        if isinstance(record, dict):
+            records.append(record)
+        else:
+            errors.append(line)
+    return records, errors
+
+
+class FeedReader:
+    """Tails an append-only feed file, NDJSON or (by its ``.csv`` suffix) CSV with a header line.
+
+    Each ``read()`` returns the complete lines appended since the last one, so
+    a line still being written is picked up on the next call. A file that
+    shrinks or is replaced by a new one is taken to have been rotated and is
+    read again from the start.
+    """
+
+    def __init__(self, path, from_start=True):
+        self.path = path
+        self.is_csv = path.lower().endswith('.csv')
+        self.header = None
+        self.offset = 0
+        self.inode = None
+        if not from_start and os.path.exists(path):
+            self._skip_existing()
+
+    def _skip_existing(self):
+        with open(self.path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            data = f.read()
+        self.offset = data.rfind(b'\n') + 1
+        if self.is_csv and self.offset:
+            self.header = next(csv.reader([data.split(b'\n', 1)[0].decode('utf-8')]))
+
+    def waiting(self):
+        return False
+
+    def done(self, failed=False):
+        """Nothing to do: a line is consumed once read, and one that fails is reported and dropped."""
+
+    def read(self):
+        """``(records, errors)`` for the lines appended since the last call."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return [], []
+        size = stat.st_size
+        if size < self.offset or stat.st_ino != self.inode:
+            self.offset, self.header = 0, None
+        self.inode = stat.st_ino
+        if size == self.offset:
+            return [], []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        end = data.rfind(b'\n') + 1
+        self.offset += end
+        lines = data[:end].decode('utf-8').splitlines()
+        if self.is_csv and self.header is None and lines:
+            self.header = next(csv.reader([lines.pop(0)]))
+        return _parse_lines(lines, self.header if self.is_csv else None)
+
+
+class DropDirectory:
+    """Reads whole feed files dropped into ``path``, one per ``read()`` in name order.
+
+    A file stays where it is until ``done()`` is called after its records
+    have been applied, then moves to ``processed/``, or to ``failed/`` if any
+    of them could not be. A crash mid-file leaves it in place to be read
+    again; records already applied then come back 'unchanged'.
+
+    Writers should create each file under a dot-prefixed or other-suffixed
+    name and rename it into place, so a half-written file is never read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.current = None
+
+    def waiting(self):
+        return sorted(
+            name for name in os.listdir(self.path)
+            if not name.startswith('.') and name.lower().endswith(FEED_SUFFIXES)
+            and os.path.isfile(os.path.join(self.path, name))
+        )
+
+    def read(self):
+        """``(records, errors)`` for the oldest file waiting in the directory."""
+        names = self.waiting()
+        if not names:
+            self.current = None
+            return [], []
+        self.current = names[0]
+        with open(os.path.join(self.path, self.current), encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        header = None
+        if self.current.lower().endswith('.csv') and lines:
+            header = next(csv.reader([lines.pop(0)]))
+        return _parse_lines(lines, header)
+
+    def done(self, failed=False):
+        """Move the file the last ``read()`` returned to ``processed/``, or ``failed/``."""
+        if self.current is None:
+            return
+        target = os.path.join(self.path, 'failed' if failed else 'processed')
+        os.makedirs(target, exist_ok=True)
+        os.replace(os.path.join(self.path, self.current), os.path.join(target, self.current))
+        self.current = None
@@ -0,0 +1,197 @@
+"""Match predictions from a Dixon-Coles model fitted over a window of seasons.
+
+A season's model is fitted on that season and the PREDICTION_WINDOW - 1
+seasons before it. Older matches count for less, halving every
+PREDICTION_HALF_LIFE_DAYS. A fit is stored as a ModelFit with one TeamRating
+per team. It is stamped with the DataVersion of every season in its window
+and kept in memory per process.
+
+A request only compares the stamp, which is one query. Once an import moves a
+version on, the model is refitted starting from the previous ratings, so it
+converges in a few iterations instead of a cold fit. load_matches and
+import_statsbomb refit the stored models their seasons feed straight away,
+so requests rarely pay for that.
+"""
+import re
+import threading
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from dashboard.models import DataVersion, Match, ModelFit, Season, TeamRating
+from dashboard.services.poisson import MAX_GOALS, fit_rho, fit_strengths, log_likelihood, outcome_probabilities, score_matrix
+from dashboard.services.timing import timed
+
+_lock = threading.Lock()
+_models = {}
+
+
+def window_seasons(season, size):
+    """Canonical keys of ``season`` and the ``size - 1`` seasons before it, oldest first."""
+    match = re.match(r'^(\d{4})(-\d{4})?$', season)
+    if not match:
+        return [season]
+    years = range(int(match.group(1)) - size + 1, int(match.group(1)) + 1)
+    return [f'{year}-{year + 1}' for year in years] if match.group(2) else [str(year) for year in years]
+
+
+def window_stamp(season):
+    """``"season:version,..."`` over the catalogued seasons in ``season``'s window.
+
+    Seasons loaded before data versions existed have no DataVersion row and
+    count as version 0.
+    """
+    seasons = window_seasons(season, settings.PREDICTION_WINDOW)
+    version = DataVersion.objects.filter(season=OuterRef('key')).values('version')[:1]
+    versions = dict(Season.objects.filter(key__in=seasons).order_by()
+                    .annotate(version=Coalesce(Subquery(version), 0)).values_list('key', 'version'))
+    return ','.join(f'{key}:{versions[key]}' for key in seasons if key in versions)
+
+
+class MatchModel:
+    def __init__(self, season, window, team_pks, attack, defence, home_advantage, rho,
+                 matches=0, iterations=0, log_likelihood=0.0, fitted_at=None):
+        self.season = season
+        self.window = window
+        self.team_ids = {pk: i for i, pk in enumerate(team_pks)}
+        # One extra average team at the end stands in for teams outside the fit
+        self.attack = np.append(np.asarray(attack, dtype=np.float64), 1.0)
+        self.defence = np.append(np.asarray(defence, dtype=np.float64), 1.0)
+        self.home_advantage = float(home_advantage)
+        self.rho = float(rho)
+        self.matches = matches
+        self.iterations = iterations
+        self.log_likelihood = log_likelihood
+        self.fitted_at = fitted_at
+
+    @classmethod
+    def from_fit(cls, fit):
+        ratings = list(fit.ratings.order_by().values_list('team_id', 'attack', 'defence'))
+        team_pks, attack, defence = zip(*ratings) if ratings else ((), (), ())
+        return cls(fit.season, fit.window, team_pks, attack, defence, fit.home_advantage, fit.rho,
+                   fit.matches, fit.iterations, fit.log_likelihood, fit.fitted_at)
+
+    def strengths(self, team_pks):
+        """Attack and defence for each Team pk; teams outside the fit rate as average."""
+        index = np.array([self.team_ids.get(pk, -1) for pk in team_pks], dtype=np.int64)
+        return self.attack[index], self.defence[index]
+
+    def predict(self, home_pks, away_pks):
+        """Outcome probabilities, expected goals and the likeliest score for each (home, away) pair."""
+        home_attack, home_defence = self.strengths(home_pks)
+        away_attack, away_defence = self.strengths(away_pks)
+        home_rates = self.home_advantage * home_attack * away_defence
+        away_rates = away_attack * home_defence
+        matrix = score_matrix(home_rates, away_rates, self.rho)
+        home_win, draw, away_win = outcome_probabilities(matrix)
+        likely = matrix.reshape(len(matrix), -1).argmax(axis=1)
+        return [{
+            'home_win': round(float(home_win[i]), 4),
+            'draw': round(float(draw[i]), 4),
+            'away_win': round(float(away_win[i]), 4),
+            'home_goals': round(float(home_rates[i]), 3),
+            'away_goals': round(float(away_rates[i]), 3),
+            'likely_score': [int(likely[i] // (MAX_GOALS + 1)), int(likely[i] % (MAX_GOALS + 1))],
+        } for i in range(len(matrix))]
+
+    def summary(self):
+        return {
+            'seasons': [entry.rsplit(':', 1)[0] for entry in self.window.split(',')] if self.window else [],
+            'matches': self.matches,
+            'fitted_at': self.fitted_at.isoformat() if self.fitted_at else None,
+            'home_advantage': round(self.home_advantage, 4),
+            'rho': round(self.rho, 4),
+        }
+
+
+def fit_model(season, window, start=None):
+    """Fit ``season``'s model on the matches of every season in ``window``, continuing from ``start`` if given."""
+    seasons = [entry.rsplit(':', 1)[0] for entry in window.split(',')] if window else []
+    rows = list(Match.objects.filter(season__in=seasons).order_by()
+                .values_list('date', 'home_team_id', 'away_team_id', 'home_goals', 'away_goals'))
+    dates, home_pks, away_pks, home_goals, away_goals = zip(*rows) if rows else ((),) * 5
+    team_pks = sorted(set(home_pks) | set(away_pks))
+    index = {pk: i for i, pk in enumerate(team_pks)}
+    home = np.array([index[pk] for pk in home_pks], dtype=np.int64)
+    away = np.array([index[pk] for pk in away_pks], dtype=np.int64)
+    home_goals, away_goals = np.array(home_goals, dtype=np.int64), np.array(away_goals, dtype=np.int64)
+
+    weights = None
+    if rows and settings.PREDICTION_HALF_LIFE_DAYS > 0:
+        dates = np.array(dates, dtype='datetime64[D]')
+        age = (dates.max() - dates).astype(np.float64)
+        weights = 0.5 ** (age / settings.PREDICTION_HALF_LIFE_DAYS)
+    if start is not None:
+        start = (*start.strengths(team_pks), start.home_advantage)
+    attack, defence, home_factor, iterations = fit_strengths(
+        home, away, home_goals, away_goals, len(team_pks),
+        iterations=settings.PREDICTION_MAX_ITERATIONS, weights=weights, start=start, tol=settings.PREDICTION_TOLERANCE,
+    )
+    home_rates = home_factor * attack[home] * defence[away]
+    away_rates = attack[away] * defence[home]
+    rho = fit_rho(home_goals, away_goals, home_rates, away_rates, weights)
+    return MatchModel(
+        season, window, team_pks, attack, defence, home_factor, rho, matches=len(rows), iterations=iterations,
+        log_likelihood=log_likelihood(home_goals, away_goals, home_rates, away_rates, rho, weights) if rows else 0.0,
+        fitted_at=timezone.now(),
+    )
+
+
+def _save(model):
+    with transaction.atomic():
+        fit, _ = ModelFit.objects.update_or_create(season=model.season, defaults={
+            'window': model.window,
+            'home_advantage': model.home_advantage,
+            'rho': model.rho,
+            'log_likelihood': model.log_likelihood,
+            'matches': model.matches,
+            'iterations': model.iterations,
+            'fitted_at': model.fitted_at,
+        })
+        fit.ratings.all().delete()
+        TeamRating.objects.bulk_create([
+            TeamRating(fit=fit, team_id=pk, attack=model.attack[i], defence=model.defence[i])
+            for pk, i in model.team_ids.items()
+        ])
+
+
+def _load_or_refit(season, stamp, current=None):
+    fit = ModelFit.objects.filter(season=season).first()
+    stored = MatchModel.from_fit(fit) if fit else None
+    if stored is not None and stored.window == stamp:
+        return stored
+    with timed('fit'):
+        model = fit_model(season, stamp, start=current or stored)
+    _save(model)
+    return model
+
+
+def get_model(season, stamp=None):
+    """The current model for ``season``: from memory, from the database, or refitted when its window has new data."""
+    if stamp is None:
+        stamp = window_stamp(season)
+    model = _models.get(season)
+    if model is not None and model.window == stamp:
+        return model
+    with _lock:
+        model = _models.get(season)
+        if model is None or model.window != stamp:
+            model = _models[season] = _load_or_refit(season, stamp, model)
+    return model
+
+
+def refresh_predictions(seasons):
+    """Refit the stored models whose window covers any of ``seasons``; returns how many were refitted."""
+    seasons = set(seasons)
+    refitted = 0
+    for season, window in ModelFit.objects.values_list('season', 'window'):
+        if seasons & set(window_seasons(season, settings.PREDICTION_WINDOW)):
+            refitted += get_model(season).window != window
+    return refitted
+
+
+def clear_models():
+    with _lock:
+        _models.clear()
@@ -0,0 +1,21 @@
+"""Optional warm-up before the server forks its workers.
+
+Nothing heavy is imported at URLconf load: the JSON endpoints only need
+NumPy (through services/snapshot.py), and pandas and matplotlib are imported
+by services/charts.py on the first chart render. That keeps ``manage.py``
+commands and worker boot fast. A server started with ``--preload`` (gunicorn)
+can opt back in by setting DASHBOARD_PRELOAD. The imports then happen once in
+the parent and are shared copy-on-write by every forked worker.
+"""
+import importlib
+from django.conf import settings
+
+
+def preload():
+    """Import the analytics stack, and the chart stack if charts render in-process."""
+    for module in ('dashboard.services.analytics', 'dashboard.services.snapshot'):
+        importlib.import_module(module)
+    if settings.CHART_RENDER_WORKERS <= 0:
+        # With a worker pool the workers warm themselves and the parent never draws
+        from dashboard.services.rendering import _warm_worker
+        _warm_worker()
@@ -0,0 +1,194 @@
+"""Server-Sent Events for live standings, fanned out from one publisher per process.
+
+Each season with subscribers has a ``Channel``: one asyncio task on the ASGI
+event loop that checks the season's data version every
+``PUSH_POLL_INTERVAL`` seconds (or at once when ``notify`` is called from
+this process), diffs the new standings and team series against the last
+ones it sent, and encodes the diff once. Subscribers are plain bounded
+queues of those encoded events, so an idle connection costs a queue and a
+suspended generator rather than a thread, and the database sees one version
+lookup per season however many clients are listening.
+
+A subscriber whose queue fills up (a stalled client) has it emptied and
+replaced by a full ``standings`` event, so it catches up instead of
+holding every diff it missed.
+"""
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from dashboard.services.snapshot import get_snapshot
+from dashboard.services.versioning import season_version
+
+KEEPALIVE = b': keepalive\n\n'
+
+
+def encode_event(name, payload, event_id=None):
+    lines = [f'event: {name}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append('data: ' + json.dumps(payload, separators=(',', ':')))
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+def season_state(season):
+    """``(version, standings, series)`` for ``season``, series keyed by team name."""
+    snapshot = get_snapshot(season)
+    series = {}
+    for pk, name in zip(snapshot.team_pks, snapshot.team_names):
+        team = snapshot.team_series(pk)
+        series[name] = {
+            'dates': team.date_labels,
+            'points': team.points.tolist(),
+            'cumulative_points': team.cumulative_points.tolist(),
+            'rolling_average': team.rolling_form.tolist(),
+        }
+    standings = [{'position': i, **row} for i, row in enumerate(snapshot.standings(), start=1)]
+    return snapshot.version, standings, series
+
+
+def diff_state(old, new):
+    """The standings rows and team series in ``new`` that differ from ``old``.
+
+    A changed series is sent from the first entry that differs, with
+    ``from`` giving its index and ``length`` the new length, so appended and
+    corrected results both patch the client's copy in place.
+    """
+    _, old_standings, old_series = old
+    _, standings, series = new
+    previous = {row['name']: row for row in old_standings}
+    changed_rows = [row for row in standings if previous.get(row['name']) != row]
+    current = {row['name'] for row in standings}
+    changed_series = []
+    for name, columns in series.items():
+        before = old_series.get(name)
+        if before == columns:
+            continue
+        start = 0
+        if before is not None:
+            length = min(len(before['dates']), len(columns['dates']))
+            while start < length and all(before[key][start] == columns[key][start] for key in columns):
+                start += 1
+        changed_series.append({'team': name, 'from': start, 'length': len(columns['dates']),
+                               **{key: values[start:] for key, values in columns.items()}})
+    return {
+        'standings': changed_rows,
+        'removed': sorted(row['name'] for row in old_standings if row['name'] not in current),
+        'series': changed_series,
+    }
+
+
+class Channel:
+    def __init__(self, season):
+        self.season = season
+        self.subscribers = set()
+        self.loop = asyncio.get_running_loop()
+        self.wake = asyncio.Event()
+        self.ready = asyncio.Event()
+        self.state = None
+        self.snapshot_event = None
+        self.task = None
+        self.broadcasts = 0
+
+    async def start(self):
+        await self.refresh()
+        self.ready.set()
+        self.task = asyncio.create_task(self.watch())
+
+    async def refresh(self):
+        """Reload the season if its version moved; returns the encoded diff event, or None."""
+        version = await sync_to_async(season_version)(self.season)
+        if self.state is not None and self.state[0] == version:
+            return None
+        state = await sync_to_async(season_state)(self.season)
+        previous, self.state = self.state, state
+        self.snapshot_event = encode_event('standings', {'season': self.season, 'standings': state[1]}, state[0][0])
+        if previous is None:
+            return None
+        changes = diff_state(previous, state)
+        if not any(changes.values()):
+            return None
+        return encode_event('update', {'season': self.season, **changes}, state[0][0])
+
+    async def watch(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), settings.PUSH_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            try:
+                event = await self.refresh()
+            except Exception:
+                # A failed lookup is retried on the next poll rather than ending the channel
+                continue
+            if event is not None:
+                self.broadcast(event)
+
+    def broadcast(self, event):
+        self.broadcasts += 1
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_event)
+
+
+class Publisher:
+    def __init__(self):
+        self.channels = {}
+
+    async def subscribe(self, season):
+        """``(channel, queue)`` for a new subscriber; the queue starts with the full standings."""
+        channel = self.channels.get(season)
+        if channel is None or channel.loop is not asyncio.get_running_loop():
+            channel = self.channels[season] = Channel(season)
+            try:
+                await channel.start()
+            except BaseException:
+                del self.channels[season]
+                channel.ready.set()
+                raise
+        else:
+            await channel.ready.wait()
+            if channel.state is None:
+                # Its first load failed; start a fresh channel
+                return await self.subscribe(season)
+        queue = asyncio.Queue(maxsize=settings.PUSH_QUEUE_SIZE)
+        queue.put_nowait(channel.snapshot_event)
+        channel.subscribers.add(queue)
+        return channel, queue
+
+    def unsubscribe(self, channel, queue):
+        channel.subscribers.discard(queue)
+        if not channel.subscribers and self.channels.get(channel.season) is channel:
+            del self.channels[channel.season]
+            if channel.task is not None:
+                channel.task.cancel()
+
+    async def stream(self, season):
+        """Encoded events for one client: the standings, then every diff, with keep-alive comments when idle."""
+        channel, queue = await self.subscribe(season)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), settings.PUSH_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+        finally:
+            self.unsubscribe(channel, queue)
+
+    def notify(self, season):
+        """Wake ``season``'s channel now instead of at its next poll; safe to call from any thread."""
+        channel = self.channels.get(season)
+        if channel is not None:
+            try:
+                channel.loop.call_soon_threadsafe(channel.wake.set)
+            except RuntimeError:
+                # The loop has been closed; the channel goes with it
+                pass
+
+
+publisher = Publisher()
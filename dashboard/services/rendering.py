@@ -0,0 +1,157 @@
+"""Chart rendering off the request thread.
+
+Chart specs (kind, team, season and the team's match columns) are sent to a
+ProcessPoolExecutor whose workers import matplotlib with the Agg backend
+before their first job. At most CHART_RENDER_WORKERS + CHART_RENDER_QUEUE
+renders are in flight; beyond that ``render_chart`` raises ``RenderBusy``
+straight away instead of queueing, so the view can answer 503.
+Setting CHART_RENDER_WORKERS to 0 renders in-process, which is what tests
+and management commands without a pool use. Those renders run on a thread
+so the event loop keeps serving, one at a time because pyplot keeps global
+state.
+
+Workers send back the DataFrame and figure timings with the PNG; they are
+added to the request's Server-Timing. With CHART_PROFILE_EVERY set, one
+render in every N runs under cProfile and is dumped to CHART_PROFILE_DIR.
+"""
+import asyncio
+import hashlib
+import importlib
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from dashboard.services import timing
+
+# Chart view name -> chart kind, as served under /api/mpl/
+CHART_VIEWS = {
+    'api_matplotlib_form_image': 'form_image',
+    'api_mpl_hist_goals': 'hist_goals',
+    'api_mpl_kde_gd': 'kde_gd',
+    'api_mpl_box_points': 'box_points',
+    'api_mpl_scatter_scored_conceded': 'scatter_scored_conceded',
+    'api_mpl_hexbin_scored_conceded': 'hexbin_scored_conceded',
+    'api_mpl_box_goals_by_venue': 'box_goals_by_venue',
+    'api_mpl_corr_heatmap': 'corr_heatmap',
+}
+
+_lock = threading.Lock()
+_pool = None
+_slots = None
+_inline_lock = threading.Lock()
+
+
+class RenderBusy(Exception):
+    """All render slots are taken, or the render took longer than CHART_RENDER_TIMEOUT."""
+
+
+def chart_digest(view_name, team_name, season, version):
+    """The render cache key (``chart:<digest>``) and ETag of one chart at one data version."""
+    return hashlib.sha1(f'{view_name}|{team_name}|{season}|{version}'.encode()).hexdigest()
+
+
+def _warm_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    # Pulls in pandas too
+    importlib.import_module('dashboard.services.charts')
+    plt.close(plt.figure())
+
+
+def _noop():
+    return None
+
+
+def _get_pool():
+    global _pool, _slots
+    with _lock:
+        if _pool is None:
+            workers = settings.CHART_RENDER_WORKERS
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_warm_worker,
+            )
+            # Start every worker now rather than on the first chart request
+            for _ in range(workers):
+                _pool.submit(_noop)
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(settings.CHART_RENDER_WORKERS + settings.CHART_RENDER_QUEUE)
+        return _pool, _slots
+
+
+def start_pool():
+    """Create and warm the worker pool ahead of the first request."""
+    if settings.CHART_RENDER_WORKERS > 0:
+        _get_pool()
+
+
+def shutdown_pool():
+    global _pool, _slots
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        _slots = None
+
+
+async def render_chart(kind, team_name, season, columns):
+    """Render chart ``kind`` and return its PNG bytes, or None when there is nothing to draw."""
+    profile = timing.profile_path(settings.CHART_PROFILE_EVERY, settings.CHART_PROFILE_DIR, kind)
+    if settings.CHART_RENDER_WORKERS <= 0:
+        return _record(await asyncio.to_thread(_render_inline, kind, team_name, season, columns, profile))
+
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise RenderBusy()
+    try:
+        future = pool.submit(_render, kind, team_name, season, columns, profile)
+    except BrokenProcessPool:
+        slots.release()
+        shutdown_pool()
+        raise RenderBusy()
+    # The slot is held until the worker is really done, even if we stop waiting
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return _record(await asyncio.wait_for(asyncio.wrap_future(future), settings.CHART_RENDER_TIMEOUT))
+    except asyncio.TimeoutError:
+        raise RenderBusy()
+    except BrokenProcessPool:
+        shutdown_pool()
+        raise RenderBusy()
+
+
+def _record(result):
+    png, stages = result
+    for stage, seconds in stages.items():
+        timing.record(stage, seconds)
+    return png
+
+
+def _render(kind, team_name, season, columns, profile=None):
+    from dashboard.services.charts import render
+    stages = {}
+    if profile:
+        png = timing.run_profiled(profile, render, kind, team_name, season, columns, stages)
+    else:
+        png = render(kind, team_name, season, columns, stages)
+    return png, stages
+
+
+def _render_inline(*args):
+    with _inline_lock:
+        return _render(*args)
+
+
+def render_team(season, team_name, columns):
+    """Every chart for one team, for warming the cache: ``{view name: (png or None, seconds)}``."""
+    from dashboard.services.charts import render
+    rendered = {}
+    for view_name, kind in CHART_VIEWS.items():
+        started = time.perf_counter()
+        png = render(kind, team_name, season, columns)
+        rendered[view_name] = (png, time.perf_counter() - started)
+    return rendered
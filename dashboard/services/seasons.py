@@ -0,0 +1,109 @@
+"""Season catalogue and resolution.
+
+Sources label seasons differently: the football-data CSV has "2024/2025" or
+"2024-2025", and StatsBomb names them "2015/2016" or just "2022" for
+tournaments. Each import registers its labels as SeasonAlias rows of one
+Season, and Match.season always holds the canonical ``Season.key``. Views
+resolve the ``season`` parameter through a per-process alias map, which
+works the same way as the team map in services/teams.py: dropped on any
+change made here, and reloaded on a miss at most once every
+``MISS_RELOAD_INTERVAL`` seconds.
+"""
+import re
+import threading
+import time
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from dashboard.models import Season, SeasonAlias
+
+_SPLIT_YEARS = re.compile(r'^(\d{4})-(\d{2}|\d{4})$')
+
+MISS_RELOAD_INTERVAL = 5.0
+
+_lock = threading.Lock()
+_by_alias = {}
+# time.monotonic() of the last load, None while the map needs one
+_loaded_at = None
+
+
+def season_key(label):
+    """Canonical key for a season label: '2024/25', '2024_2025' and ' 2024 / 2025 ' all become '2024-2025'."""
+    key = re.sub(r'\s*[/_\-]\s*', '-', label.strip())
+    key = re.sub(r'\s+', '', key)
+    match = _SPLIT_YEARS.match(key)
+    if match:
+        start, end = match.groups()
+        if len(end) == 2:
+            # '1999/00' ends in the next century
+            end = str(int(start[:2]) * 100 + int(end) + (100 if int(end) < int(start[2:]) else 0))
+        key = f'{start}-{end}'
+    return key
+
+
+def _season_fields(key):
+    match = re.match(r'^(\d{4})(?:-(\d{4}))?$', key)
+    if not match:
+        return {'name': key, 'start_year': None}
+    start, end = match.groups()
+    return {'name': f'{start}/{end}' if end else start, 'start_year': int(start)}
+
+
+def resolve_or_create_seasons(labels):
+    """Map each raw label to its canonical season key, registering new seasons and aliases."""
+    labels = {label for label in labels if label and label.strip()}
+    keys = dict(SeasonAlias.objects.filter(alias__in=labels).values_list('alias', 'season__key'))
+    missing = labels - keys.keys()
+    if missing:
+        with transaction.atomic():
+            new_keys = {label: season_key(label) for label in missing}
+            ids = dict(Season.objects.filter(key__in=set(new_keys.values())).values_list('key', 'id'))
+            for key in sorted(set(new_keys.values()) - ids.keys()):
+                ids[key] = Season.objects.get_or_create(key=key, defaults=_season_fields(key))[0].id
+            # The key itself is an alias too, so canonical keys in URLs resolve directly
+            aliases = {label: key for label, key in new_keys.items()}
+            aliases.update({key: key for key in new_keys.values()})
+            SeasonAlias.objects.bulk_create(
+                [SeasonAlias(alias=alias, season_id=ids[key]) for alias, key in aliases.items()],
+                ignore_conflicts=True,
+            )
+        keys.update(new_keys)
+        # bulk_create sends no post_save
+        clear_season_cache()
+    return keys
+
+
+def _reload():
+    global _by_alias, _loaded_at
+    by_alias = dict(Season.objects.order_by().values_list('key', 'key'))
+    by_alias.update(SeasonAlias.objects.order_by().values_list('alias', 'season__key'))
+    _by_alias, _loaded_at = by_alias, time.monotonic()
+
+
+def _stale():
+    return _loaded_at is None or time.monotonic() - _loaded_at >= MISS_RELOAD_INTERVAL
+
+
+def resolve_season(label):
+    """Canonical key for a season label or any known alias of it, or None."""
+    key = _by_alias.get(label) or _by_alias.get(season_key(label))
+    if key is None and _stale():
+        with _lock:
+            if _stale():
+                _reload()
+        key = _by_alias.get(label) or _by_alias.get(season_key(label))
+    return key
+
+
+def season_catalogue():
+    return [{'key': key, 'name': name} for key, name in Season.objects.values_list('key', 'name')]
+
+
+@receiver(post_save, sender=Season)
+@receiver(post_delete, sender=Season)
+@receiver(post_save, sender=SeasonAlias)
+@receiver(post_delete, sender=SeasonAlias)
+def clear_season_cache(**kwargs):
+    global _by_alias, _loaded_at
+    with _lock:
+        _by_alias, _loaded_at = {}, None
@@ -0,0 +1,202 @@
+"""Monte Carlo season simulation.
+
+Team strengths are fitted from the results so far with the multiplicative
+Poisson model in services/poisson.py. Every remaining fixture is then drawn
+``runs`` times in NumPy batches, and the per-run tables are ranked on points,
+goal difference and goals scored, with the remaining ties broken at random.
+The result is each team's finishing-position distribution. The remaining
+fixtures are the double round robin's unplayed pairs, so a season that mixes
+competitions is refused with a SimulationError rather than simulated as one
+giant league.
+
+Large runs are split across a process pool (SIMULATION_WORKERS), each chunk
+with its own child seed, so a given seed gives the same answer whatever the
+worker count. The functions here only use NumPy, so pool workers do not need
+Django set up.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from django.conf import settings
+from dashboard.services.poisson import fit_strengths, outcome_probabilities, score_matrix
+
+BATCH_RUNS = 2000
+CHUNK_RUNS = 10000
+
+_lock = threading.Lock()
+_pool = None
+_pool_workers = 0
+
+
+class SimulationError(Exception):
+    pass
+
+
+def check_round_robin(n_teams, home, away, matchdays):
+    """Raise SimulationError unless the matches can be one double round robin of ``n_teams`` teams."""
+    if len(np.unique(home.astype(np.int64) * n_teams + away)) < len(home):
+        raise SimulationError('Some teams meet twice at the same ground, so the season is not one double round robin.')
+    sides = np.concatenate([home, away]).astype(np.int64)
+    days = np.concatenate([matchdays, matchdays]).astype(np.int64)
+    if len(np.unique(days * n_teams + sides)) < len(sides):
+        raise SimulationError('Some teams play twice on a matchday, so the season is not one double round robin.')
+    if len(matchdays) and matchdays.max() > 2 * (n_teams - 1):
+        raise SimulationError(f'{n_teams} teams play {2 * (n_teams - 1)} matchdays, but the season has {matchdays.max()}.')
+
+
+def remaining_fixtures(n_teams, home, away):
+    """Ordered (home, away) pairs of a double round robin that have not been played."""
+    played = np.zeros((n_teams, n_teams), dtype=bool)
+    played[home, away] = True
+    np.fill_diagonal(played, True)
+    fixture_home, fixture_away = np.nonzero(~played)
+    return fixture_home, fixture_away
+
+
+def goal_cdf(rates, tail=1e-7, max_goals=20):
+    """Per-fixture Poisson CDF columns, ``cdf[:, k] = P(goals <= k)``, up to where the tail is negligible."""
+    rates = np.asarray(rates, dtype=np.float64)
+    pmf = np.exp(-rates)
+    columns = [pmf]
+    for k in range(1, max_goals):
+        if len(rates) == 0 or 1 - columns[-1].min() < tail:
+            break
+        pmf = pmf * rates / k
+        columns.append(columns[-1] + pmf)
+    return np.stack(columns, axis=1).astype(np.float32)
+
+
+def _draw_goals(rng, cdf, batch):
+    # Inverse-CDF sampling: the goal count is how many CDF steps the uniform
+    # draw clears. Several times faster than Generator.poisson for the
+    # small rates football produces.
+    uniform = rng.random((batch, len(cdf)), dtype=np.float32)
+    goals = np.zeros((batch, len(cdf)), dtype=np.uint8)
+    cleared = np.empty((batch, len(cdf)), dtype=bool)
+    for column in cdf.T:
+        np.greater(uniform, column, out=cleared)
+        goals += cleared
+    return goals
+
+
+def simulate_positions(base, fixture_home, fixture_away, home_rates, away_rates, runs, seed):
+    """Finishing-position counts, ``counts[team, position]``, over ``runs`` simulated seasons.
+
+    ``base`` holds the current 'points', 'gd' and 'gf' per team.
+    """
+    n_teams = len(base['points'])
+    rng = np.random.default_rng(seed)
+    home_cdf, away_cdf = goal_cdf(home_rates), goal_cdf(away_rates)
+    # Fixture-by-team incidence, so per-run team totals are one matrix product
+    home_incidence = np.zeros((len(fixture_home), n_teams), dtype=np.float32)
+    home_incidence[np.arange(len(fixture_home)), fixture_home] = 1
+    away_incidence = np.zeros((len(fixture_away), n_teams), dtype=np.float32)
+    away_incidence[np.arange(len(fixture_away)), fixture_away] = 1
+    both = np.concatenate([home_incidence, away_incidence])
+    goal_diff_incidence = home_incidence - away_incidence
+    team_index = np.arange(n_teams)[None, :] * n_teams
+
+    counts = np.zeros(n_teams * n_teams, dtype=np.int64)
+    done = 0
+    while done < runs:
+        batch = min(BATCH_RUNS, runs - done)
+        home_goals = _draw_goals(rng, home_cdf, batch)
+        away_goals = _draw_goals(rng, away_cdf, batch)
+        draws = home_goals == away_goals
+        # Home and away points side by side, against the stacked incidence
+        match_points = np.concatenate([3 * (home_goals > away_goals) + draws, 3 * (away_goals > home_goals) + draws], axis=1)
+        points = base['points'] + match_points.astype(np.float32) @ both
+        goals = np.concatenate([home_goals, away_goals], axis=1).astype(np.float32)
+        gf = base['gf'] + goals @ both
+        gd = base['gd'] + (goals[:, :len(fixture_home)] - goals[:, len(fixture_home):]) @ goal_diff_incidence
+        # Points, then goal difference, then goals scored, then a coin toss.
+        # Goal counts stay far below 1000, so one float64 key orders all four.
+        key = points.astype(np.float64) * 1e9 + (gd + 5e5) * 1e3 + gf + rng.random((batch, n_teams))
+        order = np.argsort(-key, axis=1)
+        positions = np.empty_like(order)
+        np.put_along_axis(positions, order, np.arange(n_teams)[None, :], axis=1)
+        counts += np.bincount((team_index + positions).ravel(), minlength=n_teams * n_teams)
+        done += batch
+    return counts.reshape(n_teams, n_teams)
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def run_simulation(base, fixture_home, fixture_away, home_rates, away_rates, runs, seed=0, workers=None):
+    """``simulate_positions`` over ``runs`` seasons, split into seeded chunks across ``workers`` processes."""
+    if workers is None:
+        workers = settings.SIMULATION_WORKERS
+    chunks = [CHUNK_RUNS] * (runs // CHUNK_RUNS) + ([runs % CHUNK_RUNS] if runs % CHUNK_RUNS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = (base, fixture_home, fixture_away, home_rates, away_rates)
+    if workers <= 1 or len(chunks) <= 1:
+        return sum(simulate_positions(*args, chunk, chunk_seed) for chunk, chunk_seed in zip(chunks, seeds))
+    pool = _get_pool(workers)
+    futures = [pool.submit(simulate_positions, *args, chunk, chunk_seed) for chunk, chunk_seed in zip(chunks, seeds)]
+    return sum(future.result() for future in futures)
+
+
+def simulate_season(snapshot, runs, matchday=None, seed=0, workers=None):
+    """Finishing-position odds for every team in ``snapshot``, from the results up to ``matchday`` (default: all)."""
+    n_teams = len(snapshot.team_names)
+    check_round_robin(n_teams, snapshot.home, snapshot.away, snapshot.matchdays)
+    played = np.ones(len(snapshot), dtype=bool) if matchday is None else snapshot.matchdays <= matchday
+    home, away = snapshot.home[played], snapshot.away[played]
+    attack, defence, home_factor, _ = fit_strengths(
+        home, away, snapshot.home_goals[played], snapshot.away_goals[played], n_teams,
+    )
+    # Fixtures played after the matchday count as still to come
+    fixture_home, fixture_away = remaining_fixtures(n_teams, home, away)
+    totals = snapshot._totals(played)
+    base = {
+        'points': totals['points'].astype(np.float32),
+        'gd': (totals['gf'] - totals['ga']).astype(np.float32),
+        'gf': totals['gf'].astype(np.float32),
+    }
+    home_rates = home_factor * attack[fixture_home] * defence[fixture_away]
+    away_rates = attack[fixture_away] * defence[fixture_home]
+    counts = run_simulation(base, fixture_home, fixture_away, home_rates, away_rates, runs, seed, workers)
+
+    probabilities = counts / max(runs, 1)
+    relegated = max(n_teams - settings.SIMULATION_RELEGATION_PLACES, 1)
+    home_win, draw, away_win = outcome_probabilities(score_matrix(home_rates, away_rates))
+    expected_points = (base['points'] + np.bincount(fixture_home, 3 * home_win + draw, n_teams)
+                       + np.bincount(fixture_away, 3 * away_win + draw, n_teams))
+    teams = [{
+        'name': name,
+        'points': int(totals['points'][i]),
+        'expected_points': round(float(expected_points[i]), 2),
+        'attack': round(float(attack[i]), 3),
+        'defence': round(float(defence[i]), 3),
+        'title': round(float(probabilities[i, 0]), 4),
+        'top4': round(float(probabilities[i, :4].sum()), 4),
+        'relegation': round(float(probabilities[i, relegated:].sum()), 4),
+        'positions': [round(float(p), 4) for p in probabilities[i]],
+    } for i, name in enumerate(snapshot.team_names)]
+    teams.sort(key=lambda team: (-team['expected_points'], team['name']))
+    return {
+        'runs': runs,
+        'matchday': matchday,
+        'remaining_fixtures': len(fixture_home),
+        'home_advantage': round(float(home_factor), 3),
+        'teams': teams,
+    }
+
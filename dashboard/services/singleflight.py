@@ -0,0 +1,173 @@
+"""Single-flight coalescing of identical expensive computations.
+
+When many requests want the same chart or simulation at once, only the
+first caller (the leader) computes it; callers arriving while it runs
+(followers) wait for and share that result. Keys include the season's data
+version, so a computation is never shared across a data change.
+
+Within a process, flights are ``concurrent.futures.Future`` objects keyed
+under a thread lock, so ``SingleFlight.run`` coalesces coroutines whatever
+event loop they run on: one loop under ASGI, or the loop Django starts per
+request for async views under WSGI and runserver. ``SingleFlight.call`` does
+the same for plain threads, and both share one set of flights. The leader's
+work runs as its own task, so a leader whose client disconnects does not
+cancel it for the followers; if the leader's loop goes away before the work
+finishes, the followers start a new flight.
+
+Across processes, ``file_lock`` serialises leaders on an exclusive lock
+file per key bucket; a leader that waited re-checks the shared cache before
+computing, so the result is computed once in the whole deployment. It polls
+for the lock rather than blocking a thread on it, and gives up with
+``LockTimeout`` after ``timeout`` seconds.
+
+Every outcome is counted in ``dashboard_single_flight_total`` on /metrics.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import CancelledError, Future
+from contextlib import asynccontextmanager
+from dashboard.services import timing
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalescing stays per process
+    fcntl = None
+
+METRIC = 'dashboard_single_flight_total'
+# Keys are hex digests; locking on their first characters keeps the lock
+# directory at 16 ** LOCK_BUCKET_CHARS files however many keys go through it
+LOCK_BUCKET_CHARS = 3
+
+
+def record(name, role):
+    timing.increment(METRIC, (('flight', name), ('role', role)))
+
+
+class LockTimeout(Exception):
+    """Another process held the lock for longer than the caller would wait."""
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def _join(self, key):
+        """``(future, leader)``: the flight running for ``key``, or a new one led by the caller."""
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+        record(self.name, 'leader' if leader else 'follower')
+        return future, leader
+
+    def _land(self, key, future):
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    async def run(self, key, compute):
+        """Await ``compute()`` once for every concurrent caller with the same ``key``, on any event loop."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                # Shielded so a follower that is cancelled does not cancel the flight
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+        task = asyncio.get_running_loop().create_task(compute())
+
+        def land(task):
+            self._land(key, future)
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        task.add_done_callback(land)
+        return await asyncio.shield(task)
+
+    def call(self, key, func):
+        """``func()`` once for every thread calling with the same ``key`` while it runs."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return future.result()
+            except CancelledError:
+                continue
+        try:
+            result = func()
+        except BaseException as e:
+            self._land(key, future)
+            future.set_exception(e)
+            raise
+        self._land(key, future)
+        future.set_result(result)
+        return result
+
+    def in_flight(self):
+        return len(self._flights)
+
+
+def _try_acquire(path):
+    """A descriptor holding the exclusive lock on ``path``, or None if someone else holds it."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _release(fd):
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def lock_path(directory, key):
+    """The lock file ``key`` shares with every key in its bucket."""
+    return os.path.join(directory, f'{key[:LOCK_BUCKET_CHARS]}.lock')
+
+
+@asynccontextmanager
+async def file_lock(directory, key, timeout):
+    """Hold an exclusive lock on ``key``'s bucket file in ``directory`` across processes; a no-op without a directory or fcntl.
+
+    Waits up to ``timeout`` seconds, polling with backoff, then raises
+    ``LockTimeout``. Lock files are left in place, since removing one while
+    another process waits on it would let two leaders in; bucketing keeps
+    their number bounded.
+    """
+    if not directory or fcntl is None:
+        yield
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = lock_path(directory, key)
+    loop = asyncio.get_running_loop()
+    deadline, delay = loop.time() + timeout, 0.005
+    while True:
+        fd = _try_acquire(path)
+        if fd is not None:
+            break
+        if loop.time() >= deadline:
+            raise LockTimeout(path)
+        await asyncio.sleep(min(delay, max(deadline - loop.time(), 0)))
+        delay = min(delay * 2, 0.25)
+    try:
+        yield
+    finally:
+        _release(fd)
@@ -0,0 +1,410 @@
+"""Per-process columnar snapshots of a whole season.
+
+A season's matches are loaded once into NumPy arrays (dates, matchdays,
+integer team ids, goals, results) plus a map from Team primary keys to those
+ids. Team, head-to-head and league-table queries are then answered from
+memory. Each snapshot carries the season's DataVersion stamp. Every access
+compares it with the database, which is a single indexed lookup, and
+rebuilds the snapshot if an import has bumped the version.
+
+Tables as of a matchday come from team x matchday running totals, built on
+first use, so any historical table or a team's whole position trajectory is
+a column or row slice rather than a rescan of the matches.
+
+A live result bumps the version by one and records the match it changed
+(see services/live.py). A snapshot exactly one version behind loads just
+that match and applies it with ``with_match``, which patches the table
+totals, running totals and results grid by the match's contribution instead
+of rebuilding the season.
+"""
+import copy
+import threading
+from functools import cached_property
+import numpy as np
+from dashboard.models import Match, Team
+from dashboard.services.aggregates import rank_standings
+from dashboard.services.analytics import TeamSeries, match_points
+from dashboard.services.timing import timed
+from dashboard.services.versioning import changed_match, season_version
+
+_lock = threading.Lock()
+_snapshots = {}
+ROW_FIELDS = ('id', 'date', 'matchday', 'home_team_id', 'away_team_id', 'home_goals', 'away_goals')
+
+
+class SeasonSnapshot:
+    def __init__(self, season, version, rows, names):
+        self.season = season
+        self.version = version
+        ids, dates, matchdays, home, away, home_goals, away_goals = zip(*rows) if rows else ((),) * 7
+        # Local ids follow name order so that ties in the table still break alphabetically
+        pks = sorted(set(home) | set(away), key=names.get)
+        self.team_pks = pks
+        self.team_names = [names[pk] for pk in pks]
+        self.team_ids = {pk: i for i, pk in enumerate(pks)}
+        self.name_ids = {name: i for i, name in enumerate(self.team_names)}
+        self.match_ids = np.array(ids, dtype=np.int64)
+        self.dates = np.array(dates, dtype='datetime64[D]')
+        self.date_labels = np.datetime_as_string(self.dates, unit='D').astype(object)
+        self.home = np.array([self.team_ids[pk] for pk in home], dtype=np.int32)
+        self.away = np.array([self.team_ids[pk] for pk in away], dtype=np.int32)
+        self.home_goals = np.array(home_goals, dtype=np.int64)
+        self.away_goals = np.array(away_goals, dtype=np.int64)
+        # +1 home win, 0 draw, -1 away win
+        self.results = np.sign(self.home_goals - self.away_goals).astype(np.int8)
+        self.matchdays = self._number_rounds(matchdays)
+
+    def _number_rounds(self, matchdays):
+        """Matchday per match; matches without one get their round, one more than either side has played."""
+        rounds = np.array([day or 0 for day in matchdays], dtype=np.int32)
+        # Numbered rounds depend on every earlier match, which with_match needs to know
+        self.numbered = rounds == 0
+        missing = np.flatnonzero(self.numbered)
+        if len(missing):
+            played = np.zeros(len(self.team_names), dtype=np.int32)
+            for i in range(len(rounds)):
+                home, away = self.home[i], self.away[i]
+                if rounds[i] == 0:
+                    rounds[i] = max(played[home], played[away]) + 1
+                played[home] += 1
+                played[away] += 1
+        return rounds
+
+    @classmethod
+    def build(cls, season, version):
+        rows = list(Match.objects.filter(season=season).order_by('date', 'id').values_list(*ROW_FIELDS))
+        names = dict(Team.objects.filter(id__in={pk for row in rows for pk in row[3:5]}).values_list('id', 'name'))
+        return cls(season, version, rows, names)
+
+    def __len__(self):
+        return len(self.match_ids)
+
+    def teams(self):
+        return list(self.team_names)
+
+    def fixtures(self, matchday):
+        """``(date, home pk, away pk, home goals, away goals)`` for each match of ``matchday``."""
+        return [
+            (self.date_labels[i], self.team_pks[self.home[i]], self.team_pks[self.away[i]],
+             int(self.home_goals[i]), int(self.away_goals[i]))
+            for i in np.flatnonzero(self.matchdays == matchday)
+        ]
+
+    def team_name(self, team_pk):
+        team_id = self.team_ids.get(team_pk)
+        return None if team_id is None else self.team_names[team_id]
+
+    def team_series(self, team_pk, team_name=None):
+        """The team's matches as a ``TeamSeries``; empty if the team did not play this season.
+
+        ``team_name`` labels the series when the team is not in the snapshot.
+        """
+        team_id = self.team_ids.get(team_pk, -1)
+        is_home = self.home == team_id
+        mask = is_home | (self.away == team_id)
+        is_home = is_home[mask]
+        home_goals, away_goals = self.home_goals[mask], self.away_goals[mask]
+        opponents = np.where(is_home, self.away[mask], self.home[mask])
+        return TeamSeries(
+            self.team_name(team_pk) or team_name,
+            self.dates[mask].astype(object),
+            np.array(self.team_names, dtype=object)[opponents] if len(opponents) else [],
+            is_home,
+            np.where(is_home, home_goals, away_goals),
+            np.where(is_home, away_goals, home_goals),
+            date_labels=self.date_labels[mask].tolist(),
+        )
+
+    def head_to_head(self, team1_pk, team2_pk):
+        return self.team_series(team1_pk).head_to_head(self.team_name(team2_pk))
+
+    def _mini_league(self, names, mask=None):
+        ids = np.array([self.name_ids[name] for name in names])
+        among = np.isin(self.home, ids) & np.isin(self.away, ids)
+        return self._totals(among if mask is None else among & mask)
+
+    @staticmethod
+    def _match_values(home_goals, away_goals):
+        """Per-match contributions to each table column, as (home side, away side) arrays."""
+        home_points = match_points(home_goals, away_goals)
+        away_points = match_points(away_goals, home_goals)
+        ones = np.ones(len(home_goals), dtype=np.int64)
+        return {
+            'played': (ones, ones),
+            'wins': (home_points == 3, away_points == 3),
+            'draws': (home_points == 1, away_points == 1),
+            'losses': (home_points == 0, away_points == 0),
+            'gf': (home_goals, away_goals),
+            'ga': (away_goals, home_goals),
+            'points': (home_points, away_points),
+        }
+
+    @classmethod
+    def _contribution(cls, home_goals, away_goals):
+        """``_match_values`` for a single match, as ints."""
+        values = cls._match_values(np.array([home_goals]), np.array([away_goals]))
+        return {key: (int(home[0]), int(away[0])) for key, (home, away) in values.items()}
+
+    def _totals(self, mask=None):
+        home, away = self.home, self.away
+        home_goals, away_goals = self.home_goals, self.away_goals
+        if mask is not None:
+            home, away, home_goals, away_goals = home[mask], away[mask], home_goals[mask], away_goals[mask]
+        n = len(self.team_names)
+        return {
+            key: (np.bincount(home, weights=home_values, minlength=n)
+                  + np.bincount(away, weights=away_values, minlength=n)).astype(np.int64)
+            for key, (home_values, away_values) in self._match_values(home_goals, away_goals).items()
+        }
+
+    @cached_property
+    def totals(self):
+        """Per table column, each team's season total."""
+        return self._totals()
+
+    @cached_property
+    def matchday_totals(self):
+        """``(matchdays, totals)``: the sorted matchdays and, per table column, a team x matchday running total."""
+        labels, columns = np.unique(self.matchdays, return_inverse=True)
+        shape = (len(self.team_names), len(labels))
+        totals = {}
+        for key, (home_values, away_values) in self._match_values(self.home_goals, self.away_goals).items():
+            grid = np.zeros(shape, dtype=np.int64)
+            np.add.at(grid, (self.home, columns), home_values)
+            np.add.at(grid, (self.away, columns), away_values)
+            totals[key] = np.cumsum(grid, axis=1)
+        return labels, totals
+
+    def standings(self, matchday=None):
+        """League table ranked by ``aggregates.rank_standings``, computed from the arrays.
+
+        With ``matchday``, the table as it stood after that matchday, listing
+        the teams that had played by then.
+        """
+        if matchday is None:
+            totals, mask = self.totals, None
+            teams = range(len(self.team_names))
+        else:
+            labels, running = self.matchday_totals
+            column = np.searchsorted(labels, matchday, side='right') - 1
+            if column < 0:
+                return []
+            totals = {key: values[:, column] for key, values in running.items()}
+            mask = self.matchdays <= matchday
+            teams = np.flatnonzero(totals['played'])
+
+        table = []
+        for i in teams:
+            row = {'name': self.team_names[i]}
+            for key in ('played', 'wins', 'draws', 'losses', 'gf', 'ga'):
+                row[key] = int(totals[key][i])
+            row['gd'] = row['gf'] - row['ga']
+            row['points'] = int(totals['points'][i])
+            table.append(row)
+
+        def head_to_head_key(names):
+            mini = self._mini_league(names, mask)
+            return {
+                name: (int(mini['points'][i]), int(mini['gf'][i] - mini['ga'][i]), int(mini['gf'][i]))
+                for name, i in ((name, self.name_ids[name]) for name in names)
+            }
+
+        return rank_standings(table, head_to_head_key)
+
+    @cached_property
+    def results_grid(self):
+        """Home x away count matrices over local ids: matches played, goals on each side and results."""
+        n = len(self.team_names)
+        cells = self.home.astype(np.int64) * n + self.away
+
+        def grid(weights=None):
+            return np.bincount(cells, weights, n * n).reshape(n, n).astype(np.int64)
+
+        return {
+            'played': grid(),
+            'home_goals': grid(self.home_goals),
+            'away_goals': grid(self.away_goals),
+            'home_wins': grid(self.results == 1),
+            'draws': grid(self.results == 0),
+            'away_wins': grid(self.results == -1),
+        }
+
+    @cached_property
+    def positions(self):
+        """Team x matchday league positions, 0 before a team's first match."""
+        labels, _ = self.matchday_totals
+        grid = np.zeros((len(self.team_names), len(labels)), dtype=np.int16)
+        for column, matchday in enumerate(labels.tolist()):
+            for position, row in enumerate(self.standings(matchday), start=1):
+                grid[self.name_ids[row['name']], column] = position
+        return grid
+
+    def position_history(self, team_pk):
+        """The team's league position and points after every matchday of the season, or None if it did not play."""
+        team_id = self.team_ids.get(team_pk)
+        if team_id is None:
+            return None
+        labels, totals = self.matchday_totals
+        positions = self.positions[team_id]
+        played = positions > 0
+        return {
+            'team': self.team_names[team_id],
+            'matchdays': labels[played].tolist(),
+            'positions': positions[played].tolist(),
+            'points': totals['points'][team_id][played].tolist(),
+        }
+
+    def with_match(self, row, version):
+        """A copy stamped ``version`` with one new or corrected match applied, or None if that needs a rebuild.
+
+        ``row`` holds ``ROW_FIELDS`` for the match. The copy shares nothing
+        it changes with this snapshot, so readers still holding this one are
+        unaffected. A match with a new team (team ids follow name order), a
+        moved fixture or a changed matchday, and an insert ahead of matches
+        whose rounds were numbered all need a rebuild.
+        """
+        match_id, day, matchday, home_pk, away_pk, home_goals, away_goals = row
+        home, away = self.team_ids.get(home_pk), self.team_ids.get(away_pk)
+        if home is None or away is None:
+            return None
+        day = np.datetime64(day, 'D')
+        existing = np.flatnonzero(self.match_ids == match_id)
+        new = copy.copy(self)
+        new.version = version
+        new.__dict__.pop('positions', None)
+        new_values = self._contribution(home_goals, away_goals)
+        if len(existing):
+            i = existing[0]
+            stored = None if self.numbered[i] else int(self.matchdays[i])
+            if (self.dates[i], self.home[i], self.away[i]) != (day, home, away) or (matchday or None) != stored:
+                return None
+            matchday = int(self.matchdays[i])
+            old_values = self._contribution(self.home_goals[i], self.away_goals[i])
+            deltas = {key: (home - old_values[key][0], away - old_values[key][1]) for key, (home, away) in new_values.items()}
+            for name in ('home_goals', 'away_goals', 'results'):
+                setattr(new, name, getattr(self, name).copy())
+            new.home_goals[i], new.away_goals[i] = home_goals, away_goals
+            new.results[i] = np.sign(home_goals - away_goals)
+            played = 0
+        else:
+            i = int(np.count_nonzero((self.dates < day) | ((self.dates == day) & (self.match_ids < match_id))))
+            if self.numbered[i:].any():
+                return None
+            numbered = not matchday
+            if numbered:
+                # The round _number_rounds would give it: one more than either side had played
+                matchday = max(np.count_nonzero((self.home[:i] == side) | (self.away[:i] == side)) for side in (home, away)) + 1
+            deltas = new_values
+            new.match_ids = np.insert(self.match_ids, i, match_id)
+            new.dates = np.insert(self.dates, i, day)
+            new.date_labels = np.insert(self.date_labels, i, str(day))
+            new.home = np.insert(self.home, i, home)
+            new.away = np.insert(self.away, i, away)
+            new.home_goals = np.insert(self.home_goals, i, home_goals)
+            new.away_goals = np.insert(self.away_goals, i, away_goals)
+            new.results = np.insert(self.results, i, np.sign(home_goals - away_goals))
+            new.matchdays = np.insert(self.matchdays, i, matchday)
+            new.numbered = np.insert(self.numbered, i, numbered)
+            played = 1
+
+        if 'totals' in self.__dict__:
+            new.totals = {key: values.copy() for key, values in self.totals.items()}
+            for key, (home_delta, away_delta) in deltas.items():
+                new.totals[key][home] += home_delta
+                new.totals[key][away] += away_delta
+        if 'matchday_totals' in self.__dict__:
+            labels, running = self.matchday_totals
+            column = int(np.searchsorted(labels, matchday))
+            if column == len(labels) or labels[column] != matchday:
+                # A matchday not seen before starts as the running total before it
+                labels = np.insert(labels, column, matchday)
+                running = {key: np.insert(values, column, values[:, column - 1] if column else 0, axis=1)
+                           for key, values in running.items()}
+            else:
+                running = {key: values.copy() for key, values in running.items()}
+            for key, (home_delta, away_delta) in deltas.items():
+                running[key][home, column:] += home_delta
+                running[key][away, column:] += away_delta
+            new.matchday_totals = labels, running
+        if 'results_grid' in self.__dict__:
+            old_result = self.results[existing[0]] if len(existing) else None
+            new.results_grid = {key: values.copy() for key, values in self.results_grid.items()}
+            cell = new.results_grid
+            cell['played'][home, away] += played
+            cell['home_goals'][home, away] += deltas['gf'][0]
+            cell['away_goals'][home, away] += deltas['gf'][1]
+            for key, result in (('home_wins', 1), ('draws', 0), ('away_wins', -1)):
+                cell[key][home, away] += int(np.sign(home_goals - away_goals) == result) - int(old_result == result)
+        return new
+
+
+def results_grid(snapshots):
+    """The home x away grid and the all-pairs record over one or more season snapshots.
+
+    Each snapshot's grid is built once per data version; merging seasons only
+    re-indexes them onto the union of teams, ordered by name.
+    """
+    names = {}
+    for snapshot in snapshots:
+        names.update(zip(snapshot.team_pks, snapshot.team_names))
+    pks = sorted(names, key=names.get)
+    index = {pk: i for i, pk in enumerate(pks)}
+    n = len(pks)
+    grid = {key: np.zeros((n, n), dtype=np.int64)
+            for key in ('played', 'home_goals', 'away_goals', 'home_wins', 'draws', 'away_wins')}
+    for snapshot in snapshots:
+        ids = np.array([index[pk] for pk in snapshot.team_pks], dtype=np.int64)
+        for key, values in snapshot.results_grid.items():
+            grid[key][np.ix_(ids, ids)] += values
+    # Row team against column team, home and away together
+    wins = grid['home_wins'] + grid['away_wins'].T
+    goals_for = grid['home_goals'] + grid['away_goals'].T
+    pairs = {
+        'played': grid['played'] + grid['played'].T,
+        'wins': wins,
+        'draws': grid['draws'] + grid['draws'].T,
+        'losses': wins.T,
+        'goals_for': goals_for,
+        'goals_against': goals_for.T,
+    }
+    return {
+        'teams': [names[pk] for pk in pks],
+        'grid': {key: values.tolist() for key, values in grid.items()},
+        'pairs': {key: values.tolist() for key, values in pairs.items()},
+    }
+
+
+def get_snapshot(season, version=None):
+    """The current snapshot for ``season``, rebuilt lazily when its data version has moved on.
+
+    ``version`` is the ``season_version()`` stamp when the caller already has it.
+    """
+    if version is None:
+        version = season_version(season)
+    snapshot = _snapshots.get(season)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        snapshot = _snapshots.get(season)
+        if snapshot is None or snapshot.version != version:
+            snapshot = _snapshots[season] = _advance(snapshot, season, version)
+    return snapshot
+
+
+def _advance(snapshot, season, version):
+    """``snapshot`` moved on to ``version``: one changed match applied in place of a rebuild where possible."""
+    if snapshot is not None and version[0] == snapshot.version[0] + 1:
+        match_id = changed_match(season, version[0])
+        if match_id is not None:
+            with timed('snapshot_delta'):
+                row = Match.objects.filter(id=match_id, season=season).values_list(*ROW_FIELDS).first()
+                advanced = snapshot.with_match(row, version) if row else None
+            if advanced is not None:
+                return advanced
+    with timed('snapshot'):
+        return SeasonSnapshot.build(season, version)
+
+
+def clear_snapshots():
+    with _lock:
+        _snapshots.clear()
@@ -0,0 +1,286 @@
+"""Columnar staging of match data as Parquet, partitioned by season.
+
+``stage_csv`` converts a football-data CSV into typed Parquet without going
+through ``csv.DictReader``: pyarrow reads it in blocks of ``block_size``
+bytes, only the columns the loaders use (plus the half-time score, the
+referee and each side's points, kept for analysis) are parsed, and each block
+is written as a row group straight away, so memory stays flat however big the
+file is. A block whose values do not all cast cleanly (blank cells, dates
+that are not ISO, stray whitespace) goes through ``ingest.parse_row``
+instead, so staged data matches what the CSV loader would
+have stored. ``stage_rows`` does the same for rows already in the loaders'
+shape, such as StatsBomb imports.
+
+The layout is ``<directory>/season=<key>/<source>.parquet`` with seasons
+under their canonical key. Each row also keeps the season label it came
+with, so loading it registers the same aliases as loading the CSV. Staging
+the same source again replaces its file.
+
+``iter_rows`` feeds ``load_matches --parquet`` in batches, ``read_arrays``
+returns whole seasons as NumPy arrays (the numeric columns without a copy
+past combining the row groups) and ``read_frame`` returns a DataFrame for
+offline analysis.
+
+pyarrow is optional (the ``parquet`` extra); every entry point raises
+``StagingError`` without it.
+"""
+import os
+from dashboard.services.seasons import season_key
+
+COLUMNS = ('date', 'home_team', 'away_team', 'home_goals', 'away_goals', 'matchday')
+# CSV column for each staged column; the season is the partition. Points
+# are worked out from the score rather than read.
+CSV_COLUMNS = {'date': 'date_utc', 'home_team': 'home_team', 'away_team': 'away_team',
+               'home_goals': 'fulltime_home', 'away_goals': 'fulltime_away', 'matchday': 'matchday', 'season': 'season',
+               'halftime_home': 'halftime_home', 'halftime_away': 'halftime_away', 'referee': 'referee'}
+
+
+class StagingError(Exception):
+    pass
+
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise StagingError('Parquet staging needs pyarrow: pip install pyarrow') from None
+    return pyarrow
+
+
+def schema():
+    pa = _arrow()
+    return pa.schema([
+        ('date', pa.date32()),
+        ('home_team', pa.string()),
+        ('away_team', pa.string()),
+        ('home_goals', pa.int16()),
+        ('away_goals', pa.int16()),
+        ('matchday', pa.int16()),
+        ('halftime_home', pa.int16()),
+        ('halftime_away', pa.int16()),
+        ('referee', pa.string()),
+        ('home_points', pa.int8()),
+        ('away_points', pa.int8()),
+        ('season_label', pa.string()),
+    ])
+
+
+def _points(goals, against):
+    return 3 if goals > against else (1 if goals == against else 0)
+
+
+def _csv_details(row):
+    """The half-time score and referee of a raw CSV row; blank or malformed values are null."""
+    details = {'referee': (row.get('referee') or '').strip() or None}
+    for column in ('halftime_home', 'halftime_away'):
+        try:
+            details[column] = int(row.get(column) or '')
+        except ValueError:
+            details[column] = None
+    return details
+
+
+class _SeasonWriters:
+    """One open ``ParquetWriter`` per season, each renamed into place only when the whole source is staged."""
+
+    def __init__(self, directory, name):
+        self.directory = directory
+        self.name = name
+        self.writers = {}
+        self.rows = {}
+
+    def write(self, season, table):
+        pa = _arrow()
+        writer = self.writers.get(season)
+        if writer is None:
+            partition = os.path.join(self.directory, f'season={season}')
+            os.makedirs(partition, exist_ok=True)
+            writer = self.writers[season] = pa.parquet.ParquetWriter(
+                os.path.join(partition, f'.{self.name}.parquet.tmp'), schema(), compression='zstd'
+            )
+        writer.write_table(table)
+        self.rows[season] = self.rows.get(season, 0) + table.num_rows
+
+    def write_partitioned(self, table, seasons):
+        """Write ``table`` split by ``seasons``, an array of season labels aligned with its rows."""
+        pc = _arrow().compute
+        encoded = seasons.dictionary_encode()
+        for code, label in enumerate(encoded.dictionary.to_pylist()):
+            self.write(season_key(label), table.filter(pc.equal(encoded.indices, code)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for season, writer in self.writers.items():
+            writer.close()
+            partition = os.path.join(self.directory, f'season={season}')
+            temporary = os.path.join(partition, f'.{self.name}.parquet.tmp')
+            if exc_type is None:
+                os.replace(temporary, os.path.join(partition, f'{self.name}.parquet'))
+            else:
+                os.remove(temporary)
+
+
+def _table_from_rows(rows):
+    pa = _arrow()
+    return pa.Table.from_pylist([{
+        **{column: row[column] for column in COLUMNS},
+        'halftime_home': row.get('halftime_home'),
+        'halftime_away': row.get('halftime_away'),
+        'referee': row.get('referee'),
+        'home_points': _points(row['home_goals'], row['away_goals']),
+        'away_points': _points(row['away_goals'], row['home_goals']),
+        'season_label': row['season'],
+    } for row in rows], schema=schema()), pa.array([row['season'] for row in rows], pa.string())
+
+
+def _blank_to_null(values):
+    pa = _arrow()
+    return pa.compute.if_else(pa.compute.equal(values, ''), pa.scalar(None, pa.string()), values)
+
+
+def _convert_block(batch):
+    """``(table, seasons)`` for a block of CSV strings, or None if any value needs the row parser."""
+    pa = _arrow()
+    pc = pa.compute
+    strings = {column: pc.utf8_trim_whitespace(batch.column(CSV_COLUMNS[column]))
+               for column in ('date', 'home_team', 'away_team', 'season')}
+    if not all(pc.all(pc.greater(pc.utf8_length(values), 0)).as_py() for values in strings.values()):
+        return None
+    try:
+        date = pc.utf8_slice_codeunits(strings['date'], 0, 10).cast(pa.date32())
+        home_goals = batch.column('fulltime_home').cast(pa.int16())
+        away_goals = batch.column('fulltime_away').cast(pa.int16())
+        # Blank and zero matchdays are stored as NULL, as the loader does
+        matchday = _blank_to_null(batch.column('matchday')).cast(pa.int16())
+        halftime = [_blank_to_null(pc.utf8_trim_whitespace(batch.column(column))).cast(pa.int16())
+                    for column in ('halftime_home', 'halftime_away')]
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    matchday = pc.if_else(pc.equal(matchday, 0), pa.scalar(None, pa.int16()), matchday)
+    referee = _blank_to_null(pc.utf8_trim_whitespace(batch.column('referee')))
+    points = [pc.if_else(pc.greater(goals, against), 3, pc.if_else(pc.equal(goals, against), 1, 0)).cast(pa.int8())
+              for goals, against in ((home_goals, away_goals), (away_goals, home_goals))]
+    table = pa.table([date, strings['home_team'], strings['away_team'], home_goals, away_goals, matchday,
+                      *halftime, referee, *points, strings['season']], schema=schema())
+    return table, strings['season']
+
+
+def stage_csv(path, directory, parse_row, block_size=1 << 20):
+    """Stage one CSV file; returns ``{season: rows}``.
+
+    ``parse_row`` is the loaders' per-row parser (``ingest.parse_row``,
+    with the caller's warnings), used for blocks that do not convert cleanly.
+    """
+    pa = _arrow()
+    columns = list(CSV_COLUMNS.values())
+    reader = pa.csv.open_csv(
+        path,
+        read_options=pa.csv.ReadOptions(block_size=block_size),
+        convert_options=pa.csv.ConvertOptions(
+            include_columns=columns, include_missing_columns=True,
+            column_types={column: pa.string() for column in columns}, strings_can_be_null=False,
+        ),
+    )
+    with _SeasonWriters(directory, os.path.splitext(os.path.basename(path))[0]) as writers:
+        for batch in reader:
+            converted = _convert_block(batch)
+            if converted is None:
+                # Null cells from missing columns read as None; the parser expects absent values
+                raw = [{key: value for key, value in row.items() if value is not None} for row in batch.to_pylist()]
+                rows = [{**parsed, **_csv_details(row)} for row, parsed in ((row, parse_row(row)) for row in raw)
+                        if parsed is not None]
+                if not rows:
+                    continue
+                converted = _table_from_rows(rows)
+            writers.write_partitioned(*converted)
+    return writers.rows
+
+
+def stage_rows(rows, directory, name):
+    """Stage rows in the loaders' shape (``date``, team names, goals, ``season``, ``matchday``); returns ``{season: rows}``.
+
+    Rows may also carry ``halftime_home``, ``halftime_away`` and ``referee``.
+    """
+    with _SeasonWriters(directory, name) as writers:
+        if rows:
+            writers.write_partitioned(*_table_from_rows(rows))
+    return writers.rows
+
+
+def _dataset(directory, seasons=None):
+    pa = _arrow()
+    if not os.path.isdir(directory):
+        raise StagingError(f'No staged data at "{directory}".')
+    dataset = pa.dataset.dataset(
+        directory, format='parquet', partitioning='hive', exclude_invalid_files=True,
+        schema=schema().append(pa.field('season', pa.string())),
+    )
+    if seasons is not None:
+        dataset = dataset.filter(pa.compute.field('season').isin([season_key(s) for s in seasons]))
+    return dataset
+
+
+def iter_rows(directory, batch_size, seasons=None):
+    """Lists of at most ``batch_size`` rows in the loaders' shape, one record batch at a time."""
+    for batch in _dataset(directory, seasons).to_batches(batch_size=batch_size):
+        columns = batch.to_pydict()
+        yield [
+            {
+                'date': date, 'home_team': home_team, 'away_team': away_team,
+                'home_goals': home_goals, 'away_goals': away_goals,
+                'result': 'H' if home_goals > away_goals else ('A' if away_goals > home_goals else 'D'),
+                # Files staged before labels were kept fall back to the key
+                'season': label or season, 'matchday': matchday,
+            }
+            for date, home_team, away_team, home_goals, away_goals, matchday, label, season in zip(
+                *(columns[column] for column in COLUMNS + ('season_label', 'season'))
+            )
+        ]
+
+
+def read_table(directory, seasons=None):
+    """Every staged match, or those of ``seasons``, as one Arrow table with the string columns dictionary-encoded."""
+    pc = _arrow().compute
+    table = _dataset(directory, seasons).to_table()
+    for column in ('home_team', 'away_team', 'referee', 'season_label', 'season'):
+        table = table.set_column(table.schema.get_field_index(column), column, pc.dictionary_encode(table[column]))
+    return table
+
+
+def read_arrays(directory, seasons=None):
+    """Staged matches as NumPy arrays.
+
+    Returns ``date`` (datetime64[D]), ``home_goals``/``away_goals`` (int16),
+    ``matchday`` (int16, 0 for none), ``home``/``away`` as indices into the
+    sorted ``teams`` list and ``season`` as indices into ``seasons``. The
+    goal columns are views of Arrow's buffers rather than copies.
+    """
+    pa = _arrow()
+    pc = pa.compute
+    table = _dataset(directory, seasons).to_table().combine_chunks()
+    column = {name: table[name].combine_chunks() for name in table.column_names}
+    teams = pc.unique(pa.concat_arrays([column['home_team'], column['away_team']]))
+    teams = teams.take(pc.array_sort_indices(teams))
+    season = column['season'].dictionary_encode()
+    return {
+        'date': column['date'].to_numpy(zero_copy_only=False),
+        'home_goals': column['home_goals'].to_numpy(),
+        'away_goals': column['away_goals'].to_numpy(),
+        'matchday': column['matchday'].fill_null(0).to_numpy(),
+        'home': pc.index_in(column['home_team'], value_set=teams).to_numpy().astype('int32'),
+        'away': pc.index_in(column['away_team'], value_set=teams).to_numpy().astype('int32'),
+        'teams': teams.to_pylist(),
+        'season': season.indices.to_numpy(),
+        'seasons': season.dictionary.to_pylist(),
+    }
+
+
+def read_frame(directory, seasons=None):
+    """Staged matches as a pandas DataFrame, with team and season columns categorical."""
+    return read_table(directory, seasons).to_pandas()
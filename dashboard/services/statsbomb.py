@@ -0,0 +1,147 @@
+"""StatsBomb open data, read straight from its JSON files.
+
+Files are addressed by their path in the open-data repository, for example
+``matches/43/3.json``. Three sources can serve them:
+
+- ``source_dir``: a local copy of the repository, or of its ``data/``
+  directory, for offline runs and tests.
+- A content-addressed cache. Blobs are stored under their SHA-256 and each
+  path's ref file holds the digest it last resolved to, so re-imports and
+  CI never touch the network.
+- The network, for anything the cache has not seen or when ``refresh`` is
+  set.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from datetime import date
+
+OPEN_DATA_URL = 'https://raw.githubusercontent.com/statsbomb/open-data/master/data'
+
+
+class StatsBombError(Exception):
+    pass
+
+
+class StatsBombSource:
+    def __init__(self, source_dir=None, cache_dir=None, refresh=False, base_url=OPEN_DATA_URL, timeout=30):
+        if source_dir and os.path.isdir(os.path.join(source_dir, 'data')):
+            source_dir = os.path.join(source_dir, 'data')
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.refresh = refresh
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def fetch(self, path):
+        """``(content, origin)`` for ``path``; origin is 'mirror', 'cache' or 'network'."""
+        if self.source_dir:
+            try:
+                with open(os.path.join(self.source_dir, *path.split('/')), 'rb') as f:
+                    return f.read(), 'mirror'
+            except FileNotFoundError:
+                raise StatsBombError(f'{path} is not in {self.source_dir}')
+        if self.cache_dir and not self.refresh:
+            content = self._cached(path)
+            if content is not None:
+                return content, 'cache'
+        content = self._download(path)
+        if self.cache_dir:
+            self._store(path, content)
+        return content, 'network'
+
+    def fetch_json(self, path):
+        content, origin = self.fetch(path)
+        try:
+            return json.loads(content), origin
+        except ValueError as e:
+            # Truncated files and HTML error pages; a bad cache entry is dropped so the next run fetches it again
+            if origin == 'mirror':
+                where = os.path.join(self.source_dir, *path.split('/'))
+            else:
+                where = f'{self.base_url}/{path}'
+                if self.cache_dir:
+                    self._evict(path)
+            raise StatsBombError(f'{where} is not valid JSON: {e}')
+
+    def _download(self, path):
+        # Imported here so the command module loads without the HTTP stack
+        import requests
+
+        try:
+            response = requests.get(f'{self.base_url}/{path}', timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise StatsBombError(f'Could not download {path}: {e}')
+        return response.content
+
+    def _ref_path(self, path):
+        return os.path.join(self.cache_dir, 'refs', *path.split('/'))
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, 'objects', digest[:2], digest)
+
+    def _cached(self, path):
+        try:
+            with open(self._ref_path(path), encoding='ascii') as f:
+                digest = f.read().strip()
+            with open(self._blob_path(digest), 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        # A damaged blob counts as a miss and is fetched again
+        return content if hashlib.sha256(content).hexdigest() == digest else None
+
+    def _evict(self, path):
+        ref = self._ref_path(path)
+        try:
+            with open(ref, encoding='ascii') as f:
+                digest = f.read().strip()
+            os.remove(ref)
+            os.remove(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _store(self, path, content):
+        digest = hashlib.sha256(content).hexdigest()
+        blob = self._blob_path(digest)
+        if not os.path.exists(blob):
+            _write_atomic(blob, content)
+        _write_atomic(self._ref_path(path), digest.encode('ascii'))
+
+
+def _write_atomic(path, content):
+    # Concurrent fetches of the same file must never leave a half-written one
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def match_rows(matches):
+    """Rows in the loaders' shape from a parsed ``matches/<competition>/<season>.json``; unplayed matches are left out."""
+    rows = []
+    for match in matches:
+        home_goals, away_goals = match.get('home_score'), match.get('away_score')
+        if home_goals is None or away_goals is None:
+            continue
+        rows.append({
+            'date': date.fromisoformat(match['match_date']),
+            'home_team': match['home_team']['home_team_name'],
+            'away_team': match['away_team']['away_team_name'],
+            'home_goals': home_goals,
+            'away_goals': away_goals,
+            'season': str(match['season']['season_name']),
+            # Missing or zero weeks mean the source has no round
+            'matchday': match.get('match_week') or None,
+        })
+    return rows
@@ -0,0 +1,96 @@
+"""Synthetic league data for benchmarks.
+
+Generates double round-robin seasons with Poisson scorelines in the shape the
+loaders expect: CSV rows for ``load_matches`` and a StatsBomb open-data mirror
+for ``import_statsbomb --source-dir``.
+"""
+import csv
+import json
+import os
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+CSV_FIELDS = ['competition_code', 'season', 'matchday', 'date_utc', 'home_team', 'away_team',
+              'fulltime_home', 'fulltime_away']
+
+
+def season_label(index, first_year=2000):
+    year = first_year + index
+    return f'{year}/{year + 1}'
+
+
+def round_robin(n_teams):
+    """Fixture list as ``[(matchday, home, away), ...]``, each pair meeting home and away."""
+    teams = list(range(n_teams)) + ([None] if n_teams % 2 else [])
+    n = len(teams)
+    first_half = []
+    for day in range(n - 1):
+        for i in range(n // 2):
+            home, away = teams[i], teams[n - 1 - i]
+            if home is not None and away is not None:
+                first_half.append((day + 1, home, away) if day % 2 == 0 else (day + 1, away, home))
+        teams.insert(1, teams.pop())
+    second_half = [(day + n - 1, away, home) for day, home, away in first_half]
+    return first_half + second_half
+
+
+def synthetic_matches(seasons=1, teams=20, seed=0):
+    """Yield one dict per match across ``seasons`` seasons of ``teams`` teams."""
+    rng = np.random.default_rng(seed)
+    names = [f'Synthetic Team {i:03d} FC' for i in range(teams)]
+    fixtures = round_robin(teams)
+    for s in range(seasons):
+        label = season_label(s)
+        kickoff = datetime(2000 + s, 8, 1, 15, 0, tzinfo=timezone.utc)
+        strength = rng.normal(0, 0.3, teams)
+        for matchday, home, away in fixtures:
+            when = kickoff + timedelta(days=7 * (matchday - 1), minutes=home)
+            yield {
+                'competition_code': 'SYN',
+                'season': label,
+                'matchday': matchday,
+                'date_utc': when,
+                'home_team': names[home],
+                'away_team': names[away],
+                'fulltime_home': int(rng.poisson(np.exp(0.35 + strength[home] - strength[away]))),
+                'fulltime_away': int(rng.poisson(np.exp(0.1 + strength[away] - strength[home]))),
+            }
+
+
+def write_csv(path, matches):
+    """Write matches in the football-data CSV layout; returns the number of rows written."""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for match in matches:
+            writer.writerow({**match, 'date_utc': match['date_utc'].isoformat(sep=' ')})
+            count += 1
+    return count
+
+
+def write_statsbomb_mirror(directory, matches, competition_id=1):
+    """Write matches as a statsbomb/open-data ``data/`` tree, one season ID per season; returns the "competition:season" pairs."""
+    seasons = {}
+    for match in matches:
+        seasons.setdefault(match['season'], []).append(match)
+    os.makedirs(os.path.join(directory, 'data', 'matches', str(competition_id)), exist_ok=True)
+    competitions = []
+    for season_id, (label, season_matches) in enumerate(seasons.items(), start=1):
+        competitions.append({'competition_id': competition_id, 'season_id': season_id,
+                             'competition_name': 'Synthetic League', 'season_name': label})
+        records = [{
+            'match_id': season_id * 100000 + i,
+            'match_date': m['date_utc'].date().isoformat(),
+            'home_team': {'home_team_name': m['home_team']},
+            'away_team': {'away_team_name': m['away_team']},
+            'home_score': m['fulltime_home'],
+            'away_score': m['fulltime_away'],
+            'match_week': m['matchday'],
+            'season': {'season_id': season_id, 'season_name': label},
+        } for i, m in enumerate(season_matches)]
+        with open(os.path.join(directory, 'data', 'matches', str(competition_id), f'{season_id}.json'), 'w', encoding='utf-8') as f:
+            json.dump(records, f)
+    with open(os.path.join(directory, 'data', 'competitions.json'), 'w', encoding='utf-8') as f:
+        json.dump(competitions, f)
+    return [f'{competition_id}:{c["season_id"]}' for c in competitions]
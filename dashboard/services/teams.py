@@ -0,0 +1,98 @@
+"""Team name resolution.
+
+Imports spell clubs differently ("Manchester United" from StatsBomb and
+"Manchester United FC" from the CSV). Every spelling is stored as a
+TeamAlias of one Team, matched on a normalised key. Views resolve the name in
+the URL through a per-process map. It is dropped whenever a Team or TeamAlias
+is saved or deleted, or ``resolve_or_create_teams`` adds one, and a miss
+reloads it at most once every ``MISS_RELOAD_INTERVAL`` seconds, so names
+that exist nowhere cannot make every request reload it while teams added by
+another process still turn up.
+"""
+import re
+import threading
+import time
+import unicodedata
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from dashboard.models import Team, TeamAlias
+
+# Club-type tokens dropped from either end of a name when building its key
+_AFFIXES = {'fc', 'afc', 'cf'}
+
+MISS_RELOAD_INTERVAL = 5.0
+
+_lock = threading.Lock()
+_by_alias = {}
+_by_key = {}
+# time.monotonic() of the last load, None while the map needs one
+_loaded_at = None
+
+
+def team_key(name):
+    """Normalised form of a team name: 'Manchester United FC' and 'manchester united' share a key."""
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+    tokens = re.sub(r'[^a-z0-9]+', ' ', text).split()
+    while len(tokens) > 1 and tokens[-1] in _AFFIXES:
+        tokens.pop()
+    while len(tokens) > 1 and tokens[0] in _AFFIXES:
+        tokens.pop(0)
+    return ' '.join(tokens) or name.strip().lower()
+
+
+def resolve_or_create_teams(names):
+    """Map each raw name to a Team id, creating teams and aliases for spellings not seen before."""
+    names = {name for name in names if name}
+    ids = dict(TeamAlias.objects.filter(alias__in=names).values_list('alias', 'team_id'))
+    missing = names - ids.keys()
+    if missing:
+        with transaction.atomic():
+            keys = {name: team_key(name) for name in missing}
+            by_key = dict(Team.objects.filter(key__in=set(keys.values())).values_list('key', 'id'))
+            for name in sorted(missing):
+                key = keys[name]
+                if key not in by_key:
+                    by_key[key] = Team.objects.get_or_create(key=key, defaults={'name': name})[0].id
+            TeamAlias.objects.bulk_create(
+                [TeamAlias(alias=name, team_id=by_key[keys[name]]) for name in missing],
+                ignore_conflicts=True,
+            )
+        ids.update({name: by_key[keys[name]] for name in missing})
+        # bulk_create sends no post_save
+        clear_team_cache()
+    return ids
+
+
+def _reload():
+    global _by_alias, _by_key, _loaded_at
+    by_alias, by_key = {}, {}
+    for team_id, name, key in Team.objects.order_by().values_list('id', 'name', 'key'):
+        by_alias[name] = by_key[key] = team_id
+    by_alias.update(TeamAlias.objects.order_by().values_list('alias', 'team_id'))
+    _by_alias, _by_key, _loaded_at = by_alias, by_key, time.monotonic()
+
+
+def _stale():
+    return _loaded_at is None or time.monotonic() - _loaded_at >= MISS_RELOAD_INTERVAL
+
+
+def resolve_team(name):
+    """Team id for a name or any known spelling of it, or None."""
+    team_id = _by_alias.get(name) or _by_key.get(team_key(name))
+    if team_id is None and _stale():
+        with _lock:
+            if _stale():
+                _reload()
+        team_id = _by_alias.get(name) or _by_key.get(team_key(name))
+    return team_id
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=TeamAlias)
+@receiver(post_delete, sender=TeamAlias)
+def clear_team_cache(**kwargs):
+    global _by_alias, _by_key, _loaded_at
+    with _lock:
+        _by_alias, _by_key, _loaded_at = {}, {}, None
@@ -0,0 +1,219 @@
+"""Per-request timings and per-endpoint histograms.
+
+``ServerTimingMiddleware`` opens a ``RequestTimings`` for every request and
+keeps it in a context variable, so the ORM execute wrapper, ``timed()``
+blocks and the chart renderer can add to it from any thread or coroutine
+that serves the request. At the end of the request the timings become a
+``Server-Timing`` header and are folded into the histograms that
+``/metrics`` exposes in the Prometheus text format, next to plain event
+counters such as the single-flight outcomes.
+"""
+import cProfile
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def header(self):
+        """The ``Server-Timing`` header value, durations in milliseconds."""
+        parts = []
+        for stage, seconds in self.stages.items():
+            desc = f';desc="{self.queries} queries"' if stage == 'db' else ''
+            parts.append(f'{stage};dur={seconds * 1000:.2f}{desc}')
+        parts.append(f'total;dur={self.elapsed * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record(stage, seconds):
+    """Add ``seconds`` to ``stage`` of the current request; a no-op outside a request."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def timed(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Database execute wrapper that charges query count and time to the current request."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.add('db', time.perf_counter() - started)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    # connection_created receiver; runs again on every reconnect
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+
+_lock = threading.Lock()
+# (metric name, labels tuple) -> Histogram
+_histograms = {}
+
+# (metric name, labels tuple) -> count
+_counters = {}
+
+_COUNTERS = {
+    'dashboard_single_flight_total': 'Coalesced computations by role: leader computed it, follower shared an '
+                                     'in-flight result, cached found it finished by another process.',
+}
+
+_METRICS = {
+    'dashboard_request_duration_seconds': ('Wall time per request.', DURATION_BUCKETS),
+    'dashboard_db_queries': ('ORM queries per request.', QUERY_BUCKETS),
+    'dashboard_stage_duration_seconds': ('Time per request spent in one stage (db, dataframe, render, ...).', DURATION_BUCKETS),
+}
+
+
+def _observe(metric, labels, value):
+    key = (metric, labels)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms.setdefault(key, Histogram(_METRICS[metric][1]))
+    histogram.observe(value)
+
+
+def observe_request(view, status, timings):
+    """Fold one finished request into the per-endpoint histograms."""
+    elapsed = timings.elapsed
+    with _lock:
+        _observe('dashboard_request_duration_seconds', (('view', view), ('status', str(status))), elapsed)
+        _observe('dashboard_db_queries', (('view', view),), timings.queries)
+        for stage, seconds in timings.stages.items():
+            _observe('dashboard_stage_duration_seconds', (('view', view), ('stage', stage)), seconds)
+
+
+def increment(metric, labels, amount=1):
+    with _lock:
+        key = (metric, tuple(labels))
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def counter_values(metric):
+    """``{labels: count}`` for one counter."""
+    with _lock:
+        return {labels: count for (name, labels), count in _counters.items() if name == metric}
+
+
+def _labels(labels, **extra):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    pairs = list(labels) + list(extra.items())
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+
+def prometheus_text():
+    """Every histogram in the Prometheus text exposition format."""
+    with _lock:
+        snapshot = {key: (list(h.buckets), list(h.counts), h.sum) for key, h in _histograms.items()}
+        counters = dict(_counters)
+    lines = []
+    for metric, help_text in _COUNTERS.items():
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        for (name, labels), count in sorted(counters.items()):
+            if name == metric:
+                lines.append(f'{metric}{_labels(labels)} {count}')
+    for metric, (help_text, _) in _METRICS.items():
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} histogram')
+        for (name, labels), (buckets, counts, total) in sorted(snapshot.items()):
+            if name != metric:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{_labels(labels, le=bound)} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{metric}_bucket{_labels(labels, le="+Inf")} {cumulative}')
+            lines.append(f'{metric}_sum{_labels(labels)} {total}')
+            lines.append(f'{metric}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+_profile_counter = itertools.count(1)
+
+
+def profile_path(every, directory, name):
+    """Where to dump a profile of this chart render, for one in every ``every`` calls; None otherwise."""
+    if every <= 0:
+        return None
+    n = next(_profile_counter)
+    if n % every:
+        return None
+    return os.path.join(directory, f'{name}-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{n}.prof')
+
+
+def run_profiled(path, func, *args):
+    """Call ``func(*args)`` under cProfile and dump the stats to ``path``."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        profiler.dump_stats(path)
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from dashboard.models import DataVersion
+
+
+def bump_season_version(season, match_id=None):
+    """Mark ``season`` as changed so caches keyed on its version are bypassed.
+
+    ``match_id`` names the one match that changed, when that is all that did.
+    """
+    now = timezone.now()
+    updated = DataVersion.objects.filter(season=season).update(
+        version=F('version') + 1, updated_at=now, changed_match_id=match_id
+    )
+    if not updated:
+        DataVersion.objects.get_or_create(season=season, defaults={'version': 1, 'updated_at': now})
+    transaction.on_commit(lambda: _notify(season))
+
+
+def _notify(season):
+    # Imported here: the publisher builds on the snapshots, which import this module
+    from dashboard.services.push import publisher
+
+    publisher.notify(season)
+
+
+def season_version(season):
+    """Return ``(version, updated_at)`` for ``season``; ``(0, None)`` if it was never imported."""
+    row = DataVersion.objects.filter(season=season).values_list('version', 'updated_at').first()
+    return row or (0, None)
+
+
+def changed_match(season, version):
+    """The id of the one match changed by the bump to ``version``, or None if more changed or it has moved on."""
+    return DataVersion.objects.filter(season=season, version=version).values_list('changed_match_id', flat=True).first()
@@ -0,0 +1,104 @@
+"""Cache warm-up after an ingest.
+
+For every (team, season) an import touched, ``warm`` renders the eight
+chart PNGs on a pool of worker processes and stores them in the ``charts``
+cache under the keys the chart views look up, so the first visitor gets a
+cache hit instead of eight cold renders. Charts already cached at the
+current data version are skipped.
+
+The JSON endpoints are answered from the per-process season snapshot (see
+services/snapshot.py), which each server process builds with one query. They
+are built here too, along with the standings, matchday totals and results
+grid, so their timings are reported and this process is warm. Only the chart
+cache reaches the server processes, and only when CHART_CACHE_DIR points them
+at a shared directory; warm_dashboard refuses to run without one.
+
+The workers run ``rendering.render_team``, which like the chart pool's
+worker function imports nothing that needs Django set up.
+"""
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from django.core.cache import caches
+from dashboard.services.rendering import CHART_VIEWS, _warm_worker, chart_digest, render_team
+from dashboard.services.snapshot import get_snapshot
+
+
+def season_targets(seasons, teams=None):
+    """Build each season's snapshot and its JSON views; returns ``(targets, timings)``.
+
+    Targets are ``(season, version, team_name, columns)`` for every team in
+    the season, or only those in ``teams``. Timings are seconds per season.
+    """
+    targets, timings = [], {}
+    for season in seasons:
+        started = time.perf_counter()
+        snapshot = get_snapshot(season)
+        snapshot.standings()
+        snapshot.matchday_totals
+        snapshot.results_grid
+        for pk, name in zip(snapshot.team_pks, snapshot.team_names):
+            if teams and name not in teams:
+                continue
+            series = snapshot.team_series(pk)
+            series.results(), series.form(), series.cumulative(), series.goal_diff_series()
+            snapshot.position_history(pk)
+            targets.append((season, snapshot.version[0], name, series.columns()))
+        timings[season] = time.perf_counter() - started
+    return targets, timings
+
+
+def _missing(cache, season, version, team_name):
+    keys = {f'chart:{chart_digest(view_name, team_name, season, version)}': view_name for view_name in CHART_VIEWS}
+    return len(keys) - len(cache.get_many(list(keys)))
+
+
+def _store(cache, season, version, team_name, rendered):
+    # The same (status, content) the chart views cache; no PNG means 204
+    cache.set_many({
+        f'chart:{chart_digest(view_name, team_name, season, version)}': (200, png) if png else (204, b'')
+        for view_name, (png, _) in rendered.items()
+    })
+
+
+def warm(targets, workers, force=False, deadline=None, progress=None):
+    """Render and cache the charts for ``targets`` on ``workers`` processes (0 renders here).
+
+    ``progress(done, total, target, rendered, seconds)`` is called as each
+    team finishes. With ``deadline`` (a ``time.perf_counter()`` value), work
+    not started by then is dropped. Returns ``(done, skipped, dropped)``.
+    """
+    cache = caches['charts']
+    todo = [t for t in targets if force or _missing(cache, t[0], t[1], t[2])]
+    skipped, total, done = len(targets) - len(todo), len(todo), 0
+
+    def finish(target, rendered, seconds):
+        nonlocal done
+        _store(cache, target[0], target[1], target[2], rendered)
+        done += 1
+        if progress:
+            progress(done, total, target, rendered, seconds)
+
+    if workers <= 0:
+        for target in todo:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            started = time.perf_counter()
+            finish(target, render_team(target[0], target[2], target[3]), time.perf_counter() - started)
+        return done, skipped, total - done
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_warm_worker) as pool:
+        # Keep each worker busy with one team queued behind it, so a deadline drops little work
+        pending, queue = {}, list(reversed(todo))
+        while queue or pending:
+            while queue and len(pending) < 2 * workers and (deadline is None or time.perf_counter() < deadline):
+                target = queue.pop()
+                pending[pool.submit(render_team, target[0], target[2], target[3])] = (target, time.perf_counter())
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                target, started = pending.pop(future)
+                finish(target, future.result(), time.perf_counter() - started)
+    return done, skipped, total - done
@@ -1,3 +1,1252 @@
-from django.test import TestCase
+import asyncio
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timezone
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+import numpy as np
+from django.contrib import admin
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from .management.commands import ingest_live, load_matches
+from .management.commands.bench_imports import TARGETS, measure_import
+from .management.commands.bench_push import Subscriber
+from .cache import LRUFileBasedCache
+from .models import DataVersion, Match, ModelFit, SeasonAlias, Team, TeamAlias, TeamMatch, TeamSeasonStats
+from . import views
+from .services import ingest, prediction, rendering, simulation, singleflight, staging, statsbomb, teams, timing
+from .services.aggregates import refresh_seasons
+from .services.analytics import season_team_rows
+from .services.live import FeedReader, apply_result
+from .services.poisson import fit_strengths
+from .services.prediction import refresh_predictions
+from .services.push import publisher
+from .services.seasons import resolve_or_create_seasons, resolve_season, season_key
+from .services.simulation import simulate_season
+from .services.snapshot import SeasonSnapshot, get_snapshot
+from .services.statsbomb import StatsBombSource
+from .services.synthetic import CSV_FIELDS, synthetic_matches, write_csv, write_statsbomb_mirror
+from .services.teams import resolve_or_create_teams, resolve_team
+from .services.versioning import bump_season_version, season_version
 
-# Create your tests here.
+
+def add_match(day, home, away, home_goals, away_goals, season='2024-2025', matchday=None):
+    result = 'H' if home_goals > away_goals else ('A' if away_goals > home_goals else 'D')
+    team_ids = resolve_or_create_teams([home, away])
+    return Match.objects.create(date=date(2024, 8, day), home_team_id=team_ids[home], away_team_id=team_ids[away],
+                                home_goals=home_goals, away_goals=away_goals, result=result,
+                                season=resolve_or_create_seasons([season])[season], matchday=matchday)
+
+
+class LoadMatchesTests(TestCase):
+    header = 'season,matchday,date_utc,home_team,away_team,fulltime_home,fulltime_away\n'
+    rows = [
+        '2024/2025,1,2024-08-17 15:00:00,A,B,1,0\n',
+        '2024/2025,1,2024-08-17 15:00:00,A,B,2,2\n',  # the same fixture again: the later row wins
+        '2024/2025,1,2024-08-17,,D,1,0\n',  # incomplete
+        '2024/2025,1,not a date,C,D,1,0\n',
+        '2024/2025,1,2024-08-18T12:30:00Z,C,D,0,1\n',
+        '2024/2025,1,18/08/2024,E,F,3,0\n',  # unparseable as any of the accepted formats
+        '2024/2025,1,08/18/2024,E,F,3,0\n',
+        '2024/2025,1,2024-08-18 12:30:00,C,D,1,1\n',
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'matches.csv')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(self.header + ''.join(self.rows))
+
+    def load(self, **options):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('load_matches', file=self.path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def stored(self):
+        return sorted(Match.objects.values_list('date', 'home_team__name', 'away_team__name', 'home_goals', 'away_goals', 'result'))
+
+    def test_counts_skips_and_batch_boundaries(self):
+        expected = [(date(2024, 8, 17), 'A', 'B', 2, 2, 'D'), (date(2024, 8, 18), 'C', 'D', 1, 1, 'D'),
+                    (date(2024, 8, 18), 'E', 'F', 3, 0, 'H')]
+        # Repeats of a fixture in one batch are written once; in a later batch they count as updates
+        for batch_size, created, updated in ((1, 3, 2), (2, 3, 1), (3, 3, 1), (5, 3, 0), (1000, 3, 0)):
+            with self.subTest(batch_size=batch_size):
+                out, err = self.load(batch_size=batch_size, clear=True)
+                self.assertIn(f'{created} created, {updated} updated', out)
+                self.assertIn('Processed 8 rows', out)
+                self.assertEqual(self.stored(), expected)
+                self.assertEqual(err.count('Skipping incomplete row'), 1)
+                self.assertEqual(err.count('Invalid date format'), 2)
+
+        out, _ = self.load()
+        self.assertIn('0 created, 3 updated', out)
+        self.assertEqual(self.stored(), expected)
+        with self.assertRaisesRegex(CommandError, '--batch-size'):
+            self.load(batch_size=0)
+
+    def test_errors_name_their_source(self):
+        with mock.patch.object(load_matches, 'write_chunk', side_effect=ValueError('boom')):
+            with self.assertRaisesRegex(CommandError, f'^Error processing CSV file "{self.path}": boom$'):
+                self.load()
+        with mock.patch.object(load_matches, 'iter_rows', side_effect=ValueError('bad footer')):
+            with self.assertRaisesRegex(CommandError, f'^Error processing Parquet staging directory "{self.directory.name}": bad footer$'):
+                self.load(parquet=self.directory.name)
+
+    def test_a_failed_load_still_refreshes_the_chunks_it_wrote(self):
+        calls = []
+
+        def fail_second(chunk, touched):
+            calls.append(chunk)
+            if len(calls) > 1:
+                raise ValueError('boom')
+            return ingest.write_chunk(chunk, touched)
+
+        with mock.patch.object(load_matches, 'write_chunk', fail_second):
+            with self.assertRaisesRegex(CommandError, 'boom'):
+                self.load(batch_size=1)
+        self.assertEqual(season_version('2024-2025')[0], 1)
+        self.assertEqual(get_snapshot('2024-2025').teams(), ['A', 'B'])
+
+
+class MatchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        team_ids = resolve_or_create_teams(f'Team {day}' for day in range(1, 30))
+        Match.objects.bulk_create([
+            Match(date=date(2024, 8, day), home_team_id=team_ids[f'Team {day}'], away_team_id=team_ids[f'Team {day + 1}'],
+                  home_goals=1, away_goals=0, result='H', season='2024-2025')
+            for day in range(1, 29)
+        ])
+        cls.team3, cls.team4 = team_ids['Team 3'], team_ids['Team 4']
+
+    def assertUsesIndex(self, queryset):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Tiny tables always favour a sequential scan, so ask whether an index path exists
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        if connection.vendor == 'sqlite':
+            self.assertNotIn('SCAN dashboard_match', plan, plan)
+        elif connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan on dashboard_match', plan, plan)
+
+    def test_team_season_query_uses_index(self):
+        team = self.team3
+        self.assertUsesIndex(
+            Match.objects.filter(Q(home_team=team) | Q(away_team=team), season='2024-2025').order_by('date')
+        )
+
+    def test_head_to_head_query_uses_index(self):
+        self.assertUsesIndex(Match.objects.filter(
+            (Q(home_team=self.team3) & Q(away_team=self.team4)) | (Q(home_team=self.team4) & Q(away_team=self.team3)),
+            season='2024-2025',
+        ))
+
+    def test_fixture_lookup_uses_index(self):
+        self.assertUsesIndex(Match.objects.filter(
+            date__in=[date(2024, 8, 3)], home_team__in=[self.team3], away_team__in=[self.team4],
+        ))
+
+    def test_fixture_is_unique(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Match.objects.create(date=date(2024, 8, 3), home_team_id=self.team3, away_team_id=self.team4,
+                                 home_goals=0, away_goals=0, result='D', season='2024-2025')
+
+
+class LeagueTableTests(TestCase):
+    def test_away_draw_scores_a_point(self):
+        add_match(1, 'A', 'B', 1, 1)
+        refresh_seasons(['2024-2025'])
+        standings = {row['name']: row for row in get_snapshot('2024-2025').standings()}
+        self.assertEqual(standings['A']['points'], 1)
+        self.assertEqual(standings['B']['points'], 1)
+
+    def test_ties_broken_by_goals_scored_then_head_to_head(self):
+        # A and B finish level on points, goal difference and goals scored; A won their meeting
+        add_match(1, 'A', 'B', 2, 1)
+        add_match(2, 'C', 'A', 1, 0)
+        add_match(3, 'B', 'C', 1, 0)
+        add_match(4, 'D', 'C', 3, 3)
+        refresh_seasons(['2024-2025'])
+        standings = get_snapshot('2024-2025').standings()
+        self.assertEqual([row['name'] for row in standings], ['C', 'A', 'B', 'D'])
+        self.assertEqual(standings[1]['points'], standings[2]['points'])
+        self.assertEqual(standings[1]['gd'], standings[2]['gd'])
+
+
+class TeamStatsRefreshTests(TestCase):
+    def setUp(self):
+        add_match(1, 'A', 'B', 2, 0)
+        add_match(2, 'B', 'C', 1, 1)
+        add_match(3, 'C', 'A', 3, 1)
+        add_match(4, 'A', 'C', 0, 0)
+        add_match(5, 'A', 'B', 1, 2, season='2023-2024')
+
+    def stats(self, season='2024-2025'):
+        fields = ['played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'points',
+                  'home_wins', 'home_draws', 'home_losses', 'home_goals_for', 'home_goals_against',
+                  'away_wins', 'away_draws', 'away_losses', 'away_goals_for', 'away_goals_against']
+        return {row[0]: row[1:] for row in TeamSeasonStats.objects.filter(season=season).values_list('team__name', *fields)}
+
+    def test_command_rebuilds_totals_and_splits_idempotently(self):
+        out = io.StringIO()
+        call_command('refresh_team_stats', season=['2024/25'], stdout=out)
+        self.assertIn('Refreshed team stats for 1 season(s), 3 team rows', out.getvalue())
+        expected = {
+            #     P  W  D  L GF GA Pts  home W D L GF GA  away W D L GF GA
+            'A': (3, 1, 1, 1, 3, 3, 4, 1, 1, 0, 2, 0, 0, 0, 1, 1, 3),
+            'B': (2, 0, 1, 1, 1, 3, 1, 0, 1, 0, 1, 1, 0, 0, 1, 0, 2),
+            'C': (3, 1, 2, 0, 4, 2, 5, 1, 0, 0, 3, 1, 0, 2, 0, 1, 1),
+        }
+        self.assertEqual(self.stats(), expected)
+        self.assertEqual(self.stats('2023-2024'), {})
+        self.assertEqual(list(TeamMatch.objects.filter(season='2024-2025', team__name='A')
+                              .values_list('is_home', 'points', 'cumulative_points')),
+                         [(True, 3, 3), (False, 0, 3), (True, 1, 4)])
+
+        rows = sorted(TeamMatch.objects.values_list('match_id', 'team_id', 'points', 'cumulative_points', 'rolling_points'))
+        version = season_version('2024-2025')[0]
+        call_command('refresh_team_stats', stdout=io.StringIO())
+        self.assertEqual(self.stats(), expected)
+        self.assertEqual(self.stats('2023-2024')['B'][:7], (1, 1, 0, 0, 2, 1, 3))
+        self.assertEqual(sorted(TeamMatch.objects.filter(season='2024-2025').values_list(
+            'match_id', 'team_id', 'points', 'cumulative_points', 'rolling_points')), rows)
+        self.assertEqual(TeamSeasonStats.objects.count(), 5)
+        self.assertEqual(season_version('2024-2025')[0], version + 1)
+
+
+@override_settings(CHART_RENDER_WORKERS=0)
+class ChartCacheTests(TestCase):
+    url = '/api/mpl/box-points/A/?season=2024-2025'
+
+    def setUp(self):
+        caches['charts'].clear()
+        add_match(1, 'A', 'B', 2, 0)
+        refresh_seasons(['2024-2025'])
+
+    def test_conditional_request_returns_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('Last-Modified', response)
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_reimport_invalidates_cached_render(self):
+        first = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url).content, first.content)
+        add_match(8, 'B', 'A', 1, 1)
+        refresh_seasons(['2024-2025'])
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+    def test_file_cache_culls_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LRUFileBasedCache(directory, {'OPTIONS': {'MAX_ENTRIES': 4, 'CULL_FREQUENCY': 2}})
+            for i, key in enumerate('abcd'):
+                cache.set(key, key)
+                os.utime(cache._key_to_file(key), (1000 + i, 1000 + i))
+            self.assertEqual(cache.get('a'), 'a')
+            self.assertIsNone(cache.get('x'))
+            cache.set('e', 'e')
+            self.assertEqual(cache.get_many('abcde'), {'a': 'a', 'd': 'd', 'e': 'e'})
+
+
+class SingleFlightTests(TestCase):
+    url = '/api/mpl/kde-gd/A/?season=2024-2025'
+
+    def setUp(self):
+        caches['charts'].clear()
+        timing.reset()
+        add_match(1, 'A', 'B', 2, 0)
+        refresh_seasons(['2024-2025'])
+
+    def roles(self, flight):
+        counts = timing.counter_values(singleflight.METRIC)
+        return {dict(labels)['role']: n for labels, n in counts.items() if dict(labels)['flight'] == flight}
+
+    async def test_concurrent_requests_share_one_render(self):
+        renders = []
+
+        async def slow_render(kind, team_name, season, columns):
+            renders.append(kind)
+            await asyncio.sleep(0.05)
+            return b'\x89PNG shared'
+
+        with mock.patch('dashboard.views.render_chart', slow_render):
+            responses = await asyncio.gather(*(self.async_client.get(self.url) for _ in range(5)))
+        self.assertEqual(renders, ['kde_gd'])
+        self.assertEqual({(r.status_code, r.content) for r in responses}, {(200, b'\x89PNG shared')})
+        self.assertEqual(self.roles('chart'), {'leader': 1, 'follower': 4})
+        metrics = await self.async_client.get('/metrics')
+        self.assertIn('dashboard_single_flight_total{flight="chart",role="follower"} 4', metrics.content.decode())
+
+    async def test_leader_uses_a_render_finished_by_another_process(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        version = (await sync_to_async(season_version)('2024-2025'))[0]
+        digest = hashlib.sha1(f'api_mpl_kde_gd|A|2024-2025|{version}'.encode()).hexdigest()
+        render = mock.AsyncMock(return_value=b'\x89PNG ours')
+        with override_settings(SINGLE_FLIGHT_LOCK_DIR=directory.name), mock.patch('dashboard.views.render_chart', render):
+            # Hold the chart's lock as the other process would while it renders
+            lock = singleflight._try_acquire(singleflight.lock_path(directory.name, digest))
+            request = asyncio.ensure_future(self.async_client.get(self.url))
+            while not views._chart_flight.in_flight():
+                await asyncio.sleep(0.01)
+            await caches['charts'].aset(f'chart:{digest}', (200, b'\x89PNG theirs'))
+            singleflight._release(lock)
+            response = await request
+        self.assertEqual(response.content, b'\x89PNG theirs')
+        render.assert_not_called()
+        self.assertEqual(self.roles('chart'), {'leader': 1, 'cached': 1})
+
+    async def test_a_lock_held_too_long_gives_503(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        version = (await sync_to_async(season_version)('2024-2025'))[0]
+        digest = hashlib.sha1(f'api_mpl_kde_gd|A|2024-2025|{version}'.encode()).hexdigest()
+        render = mock.AsyncMock(return_value=b'\x89PNG ours')
+        lock = singleflight._try_acquire(singleflight.lock_path(directory.name, digest))
+        self.addCleanup(singleflight._release, lock)
+        with override_settings(SINGLE_FLIGHT_LOCK_DIR=directory.name, SINGLE_FLIGHT_LOCK_TIMEOUT=0.05), \
+                mock.patch('dashboard.views.render_chart', render):
+            response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        render.assert_not_called()
+        self.assertIsNone(await caches['charts'].aget(f'chart:{digest}'))
+        self.assertEqual(self.roles('chart'), {'leader': 1, 'lock_timeout': 1})
+
+    async def test_lock_files_are_bucketed(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for n in range(300):
+            async with singleflight.file_lock(directory.name, hashlib.sha1(str(n).encode()).hexdigest(), 1):
+                pass
+        self.assertLessEqual(len(os.listdir(directory.name)), 16 ** singleflight.LOCK_BUCKET_CHARS)
+        self.assertEqual(singleflight.lock_path(directory.name, 'abc123'), singleflight.lock_path(directory.name, 'abc456'))
+
+    def test_event_loops_in_different_threads_share_one_flight(self):
+        # As under WSGI, where each request's async view runs on a loop of its own
+        flight, started, release = singleflight.SingleFlight('test'), threading.Event(), threading.Event()
+        calls, results = [], []
+
+        async def compute():
+            calls.append(1)
+            started.set()
+            await asyncio.to_thread(release.wait, 5)
+            return 'png'
+
+        threads = [threading.Thread(target=lambda: results.append(asyncio.run(flight.run('key', compute))))
+                   for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while self.roles('test').get('follower', 0) < 2:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual((len(calls), results), (1, ['png'] * 3))
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_threads_share_one_simulation(self):
+        flight, started, release = singleflight.SingleFlight('test'), threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'odds': 1}
+
+        threads = [threading.Thread(target=lambda: results.append(flight.call('key', compute))) for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while self.roles('test').get('follower', 0) < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual((len(calls), results), (1, [{'odds': 1}] * 4))
+        self.assertEqual(flight.in_flight(), 0)
+
+
+class WarmDashboardTests(TestCase):
+    def setUp(self):
+        # Warming is only useful into a cache the server processes share
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shared = override_settings(CHART_CACHE_DIR=directory.name, CACHES={
+            **settings.CACHES, 'charts': {'BACKEND': 'dashboard.cache.LRUFileBasedCache', 'LOCATION': directory.name},
+        })
+        shared.enable()
+        self.addCleanup(shared.disable)
+        add_match(1, 'A', 'B', 2, 0)
+        add_match(2, 'B', 'C', 1, 1)
+        refresh_seasons(['2024-2025'])
+
+    def test_warmed_charts_are_served_without_rendering(self):
+        out = io.StringIO()
+        with mock.patch('dashboard.services.charts.render', return_value=b'\x89PNG warm') as render:
+            call_command('warm_dashboard', '2024/2025', workers=0, stdout=out, stderr=io.StringIO())
+        self.assertEqual(render.call_count, 3 * len(rendering.CHART_VIEWS))
+        self.assertIn('Warmed 3 team(s)', out.getvalue())
+
+        with mock.patch('dashboard.views.render_chart') as render_chart:
+            response = self.client.get('/api/mpl/box-points/C/?season=2024-2025')
+        render_chart.assert_not_called()
+        self.assertEqual((response.status_code, response.content), (200, b'\x89PNG warm'))
+
+        # Nothing left to do until the season changes
+        out = io.StringIO()
+        with mock.patch('dashboard.services.charts.render', return_value=b'\x89PNG warm') as render:
+            call_command('warm_dashboard', workers=0, stdout=out, stderr=io.StringIO())
+            render.assert_not_called()
+            self.assertIn('Warmed 0 team(s)', out.getvalue())
+            self.assertIn('3 already cached', out.getvalue())
+            add_match(3, 'C', 'A', 0, 1)
+            refresh_seasons(['2024-2025'])
+            call_command('warm_dashboard', workers=0, team=['A'], stdout=out, stderr=io.StringIO())
+        self.assertEqual(render.call_count, len(rendering.CHART_VIEWS))
+
+    def test_refuses_to_warm_an_in_memory_cache(self):
+        with override_settings(CHART_CACHE_DIR=''):
+            with self.assertRaisesRegex(CommandError, 'CHART_CACHE_DIR'):
+                call_command('warm_dashboard', workers=0, stdout=io.StringIO())
+            with self.assertRaisesRegex(CommandError, 'CHART_CACHE_DIR'):
+                call_command('load_matches', warm=True, stdout=io.StringIO())
+        self.assertEqual(Match.objects.count(), 2)
+
+
+class ChartRenderingTests(TestCase):
+    url = '/api/mpl/hist-goals/A/?season=2024-2025'
+
+    def setUp(self):
+        caches['charts'].clear()
+        add_match(1, 'A', 'B', 2, 0)
+        refresh_seasons(['2024-2025'])
+
+    def tearDown(self):
+        rendering.shutdown_pool()
+
+    @override_settings(CHART_RENDER_WORKERS=1, CHART_RENDER_QUEUE=0)
+    def test_renders_in_worker_process(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+
+    @override_settings(CHART_RENDER_WORKERS=0)
+    async def test_inline_renders_leave_the_event_loop_free(self):
+        threads = []
+
+        def render(*args):
+            threads.append(threading.get_ident())
+            return b'\x89PNG', {'figure': 0.01}
+
+        with mock.patch.object(rendering, '_render', side_effect=render):
+            pngs = await asyncio.gather(*(rendering.render_chart('hist_goals', 'A', '2024-2025', {}) for _ in range(2)))
+        self.assertEqual(pngs, [b'\x89PNG'] * 2)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    @override_settings(CHART_RENDER_WORKERS=1, CHART_RENDER_QUEUE=0)
+    def test_saturated_pool_returns_503(self):
+        with mock.patch.object(rendering, '_get_pool', return_value=(None, threading.BoundedSemaphore(1))) as get_pool:
+            get_pool.return_value[1].acquire()
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertNotIn('ETag', response)
+
+
+class TeamBundleTests(TestCase):
+    def setUp(self):
+        add_match(1, 'A', 'B', 2, 0)
+        add_match(8, 'C', 'A', 1, 1)
+        refresh_seasons(['2024-2025'])
+
+    def test_bundle_matches_single_series_endpoints(self):
+        url = '/api/team-bundle/A/?season=2024-2025&opponent=B'
+        self.client.get(url)
+        # Once the snapshot and the team and season maps are loaded, only the data version is checked
+        with self.assertNumQueries(1):
+            bundle = self.client.get(url).json()
+        for key, endpoint in [('team_stats', 'team-stats'), ('goals_over_time', 'goals-over-time'),
+                              ('cumulative_points', 'cumulative-points'), ('goal_diff_series', 'goal-diff-series'),
+                              ('home_away_breakdown', 'home-away-breakdown'), ('goals_histogram', 'goals-histogram')]:
+            self.assertEqual(bundle[key], self.client.get(f'/api/{endpoint}/A/?season=2024-2025').json(), key)
+        self.assertEqual(bundle['head_to_head'],
+                         self.client.get('/api/head-to-head/?team1=A&team2=B&season=2024-2025').json())
+        self.assertEqual(bundle['league_table'], self.client.get('/api/league-table/?season=2024-2025').json())
+
+    def test_breakdown_does_not_need_the_aggregate_tables(self):
+        # As on a database migrated without running refresh_team_stats
+        TeamSeasonStats.objects.all().delete()
+        breakdown = self.client.get('/api/home-away-breakdown/A/?season=2024-2025').json()
+        self.assertEqual(breakdown, {'home': {'wins': 1, 'draws': 0, 'losses': 0, 'gf': 2, 'ga': 0},
+                                     'away': {'wins': 0, 'draws': 1, 'losses': 0, 'gf': 1, 'ga': 1}})
+
+
+class AdminEditTests(TestCase):
+    def setUp(self):
+        add_match(1, 'A', 'B', 2, 0)
+        add_match(8, 'C', 'A', 1, 1)
+        refresh_seasons(['2024-2025'])
+
+    def test_admin_edits_reach_the_snapshot(self):
+        match_admin, team_admin = admin.site._registry[Match], admin.site._registry[Team]
+        get_snapshot('2024-2025')
+        match = Match.objects.get(home_team__name='A')
+        match.home_goals = 0
+        match_admin.save_model(None, match, None, True)
+        self.assertEqual(Match.objects.get(pk=match.pk).result, 'D')
+        table = {row['name']: row['points'] for row in get_snapshot('2024-2025').standings()}
+        self.assertEqual(table, {'A': 2, 'B': 1, 'C': 1})
+        self.assertEqual(TeamSeasonStats.objects.get(team__name='A').points, 2)
+
+        team = Team.objects.get(name='C')
+        team.name = 'C United'
+        team_admin.save_model(None, team, mock.Mock(changed_data=['name']), True)
+        self.assertIn('C United', get_snapshot('2024-2025').teams())
+
+        match_admin.delete_queryset(None, Match.objects.filter(pk=match.pk))
+        self.assertEqual(sum(row['played'] for row in get_snapshot('2024-2025').standings()), 2)
+
+
+class TeamResolutionTests(TestCase):
+    def test_spellings_resolve_to_one_team(self):
+        team_ids = resolve_or_create_teams(['Manchester United FC', 'Manchester United', 'Man City'])
+        self.assertEqual(team_ids['Manchester United FC'], team_ids['Manchester United'])
+        self.assertEqual(Team.objects.count(), 2)
+        self.assertEqual(resolve_team('manchester united'), team_ids['Manchester United'])
+        self.assertIsNone(resolve_team('Nonexistent'))
+
+    def test_misses_do_not_reload_every_time(self):
+        resolve_or_create_teams(['A'])
+        self.assertIsNone(resolve_team('Nonexistent'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(resolve_team('Nonexistent'))
+        # Teams added here are picked up at once, those added elsewhere after the interval
+        self.assertEqual(resolve_team('B'), None)
+        team_id = resolve_or_create_teams(['B'])['B']
+        self.assertEqual(resolve_team('B'), team_id)
+        TeamAlias.objects.bulk_create([TeamAlias(alias='Bees', team_id=team_id)])
+        self.assertIsNone(resolve_team('Bees'))
+        with mock.patch('dashboard.services.teams.time.monotonic', return_value=time.monotonic() + teams.MISS_RELOAD_INTERVAL):
+            self.assertEqual(resolve_team('Bees'), team_id)
+
+    def test_alias_in_url_finds_the_team(self):
+        add_match(1, 'Manchester United FC', 'B', 2, 0)
+        add_match(8, 'B', 'Manchester United', 1, 1)
+        refresh_seasons(['2024-2025'])
+        self.assertEqual(self.client.get('/api/teams/?season=2024-2025').json(), {'teams': ['B', 'Manchester United FC']})
+        response = self.client.get('/api/team-stats/Manchester United/?season=2024-2025').json()
+        self.assertEqual(response['results'], {'wins': 1, 'draws': 1, 'losses': 0})
+
+
+class SeasonCatalogueTests(TestCase):
+    def test_season_labels_share_a_canonical_key(self):
+        self.assertEqual(season_key('2024/2025'), '2024-2025')
+        self.assertEqual(season_key(' 2024_25 '), '2024-2025')
+        self.assertEqual(season_key('1999/00'), '1999-2000')
+        self.assertEqual(season_key('2022'), '2022')
+
+    def test_every_endpoint_accepts_any_alias(self):
+        add_match(1, 'A', 'B', 2, 0, season='2024/2025')
+        add_match(8, 'B', 'A', 1, 1, season='2024-2025')
+        refresh_seasons(['2024-2025'])
+        self.assertEqual(Match.objects.filter(season='2024-2025').count(), 2)
+        self.assertEqual(self.client.get('/api/seasons/').json(), {'seasons': [{'key': '2024-2025', 'name': '2024/2025'}]})
+        for label in ('2024-2025', '2024/2025', '2024-25'):
+            self.assertEqual(self.client.get(f'/api/teams/?season={label}').json(), {'teams': ['A', 'B']}, label)
+            self.assertEqual(len(self.client.get(f'/api/league-table/?season={label}').json()['standings']), 2, label)
+        self.assertEqual(self.client.get('/api/teams/?season=1990-1991').json(), {'teams': []})
+
+    def test_misses_do_not_reload_every_time(self):
+        resolve_or_create_seasons(['2024/2025'])
+        self.assertIsNone(resolve_season('1990-1991'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(resolve_season('1990-1991'))
+        resolve_or_create_seasons(['1990/91'])
+        self.assertEqual(resolve_season('1990-1991'), '1990-1991')
+
+
+@override_settings(CHART_RENDER_WORKERS=0)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        caches['charts'].clear()
+        timing.reset()
+        add_match(1, 'A', 'B', 2, 0)
+        refresh_seasons(['2024-2025'])
+
+    def test_server_timing_header_counts_queries(self):
+        response = self.client.get('/api/team-stats/A/?season=2024-2025')
+        entries = {entry.split(';')[0]: entry for entry in response['Server-Timing'].split(', ')}
+        self.assertIn('total', entries)
+        self.assertRegex(entries['db'], r'^db;dur=[\d.]+;desc="\d+ queries"$')
+
+    def test_chart_stages_reach_metrics(self):
+        response = self.client.get('/api/mpl/hist-goals/A/?season=2024-2025')
+        self.assertIn('render;dur=', response['Server-Timing'])
+        self.assertIn('dataframe;dur=', response['Server-Timing'])
+        metrics = self.client.get('/metrics').content.decode()
+        self.assertIn('# TYPE dashboard_request_duration_seconds histogram', metrics)
+        self.assertIn('dashboard_request_duration_seconds_count{view="dashboard:api_mpl_hist_goals",status="200"} 1', metrics)
+        self.assertIn('dashboard_stage_duration_seconds_bucket{view="dashboard:api_mpl_hist_goals",stage="render",le="+Inf"} 1', metrics)
+
+    def test_sampled_chart_render_is_profiled(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(CHART_PROFILE_EVERY=1, CHART_PROFILE_DIR=directory):
+            self.client.get('/api/mpl/box-points/A/?season=2024-2025')
+            self.assertEqual(len([name for name in os.listdir(directory) if name.endswith('.prof')]), 1)
+
+
+class ImportTimeTests(SimpleTestCase):
+    def test_startup_paths_do_not_import_the_chart_stack(self):
+        for target in ('urls', 'load_matches'):
+            self.assertEqual(measure_import(TARGETS[target])['heavy'], [], target)
+        # The measurement does see them when they are imported
+        self.assertEqual(measure_import(TARGETS['charts'])['heavy'], ['matplotlib', 'pandas'])
+
+
+class MatchdayTableTests(TestCase):
+    def test_tables_as_of_each_matchday_match_a_rescan(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'league.csv')
+            write_csv(path, synthetic_matches(seasons=1, teams=6, seed=3))
+            call_command('load_matches', file=path, stdout=io.StringIO())
+        self.assertFalse(Match.objects.filter(matchday__isnull=True).exists())
+        snapshot = get_snapshot('2000-2001')
+        rows = list(Match.objects.order_by('date', 'id').values_list(
+            'id', 'date', 'matchday', 'home_team_id', 'away_team_id', 'home_goals', 'away_goals'))
+        names = dict(Team.objects.values_list('id', 'name'))
+        for matchday in range(1, 11):
+            played = [row for row in rows if row[2] <= matchday]
+            rescan = SeasonSnapshot('2000-2001', None, played, names).standings()
+            self.assertEqual(snapshot.standings(matchday), rescan, matchday)
+        self.assertEqual(snapshot.standings(10), snapshot.standings())
+
+        response = self.client.get('/api/league-table/?season=2000/2001&matchday=4').json()
+        self.assertEqual(response, {'matchday': 4, 'standings': snapshot.standings(4)})
+        team = snapshot.standings()[0]['name']
+        history = self.client.get(f'/api/position-history/{team}/?season=2000-2001').json()
+        self.assertEqual(history['matchdays'], list(range(1, 11)))
+        self.assertEqual(history['positions'][-1], 1)
+        self.assertEqual(history['positions'][3], [row['name'] for row in snapshot.standings(4)].index(team) + 1)
+
+    def test_reimport_without_matchdays_keeps_them(self):
+        matches = list(synthetic_matches(seasons=1, teams=4, seed=3))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'league.csv')
+            write_csv(path, matches)
+            call_command('load_matches', file=path, stdout=io.StringIO())
+            stored = dict(Match.objects.values_list('id', 'matchday'))
+            # The same fixtures without the column, one with a corrected score
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=[name for name in CSV_FIELDS if name != 'matchday'])
+                writer.writeheader()
+                for i, match in enumerate(matches):
+                    row = {key: value for key, value in match.items() if key != 'matchday'}
+                    row['date_utc'] = match['date_utc'].isoformat(sep=' ')
+                    if i == 0:
+                        row['fulltime_home'] = 9
+                    writer.writerow(row)
+            out = io.StringIO()
+            call_command('load_matches', file=path, stdout=out)
+        self.assertIn(f'0 created, {len(matches)} updated', out.getvalue())
+        self.assertEqual(dict(Match.objects.values_list('id', 'matchday')), stored)
+        self.assertEqual(Match.objects.filter(home_goals=9).count(), 1)
+
+    def test_missing_matchdays_are_numbered_by_round(self):
+        add_match(1, 'A', 'B', 1, 0)
+        add_match(2, 'C', 'D', 0, 0)
+        add_match(8, 'A', 'C', 2, 2)
+        refresh_seasons(['2024-2025'])
+        snapshot = get_snapshot('2024-2025')
+        self.assertEqual(snapshot.matchdays.tolist(), [1, 1, 2])
+        self.assertEqual([row['name'] for row in snapshot.standings(1)], ['A', 'C', 'D', 'B'])
+        self.assertEqual(self.client.get('/api/position-history/B/?season=2024-2025').json()['positions'], [4, 4])
+        self.assertEqual(self.client.get('/api/position-history/E/?season=2024-2025').status_code, 404)
+        self.assertEqual(self.client.get('/api/league-table/?season=2024-2025&matchday=x').status_code, 400)
+        # A superscript two passes str.isdigit() but not int()
+        for url in ('/api/league-table/', '/api/predictions/', '/api/simulate/', '/api/matches/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(f'{url}?season=2024-2025&matchday=%C2%B2&limit=%C2%B2').status_code, 400)
+
+
+class AnalyticsTests(TestCase):
+    def test_season_rows_stay_chronological_per_team(self):
+        # A plays at home, away, then at home again
+        rows = season_team_rows([1, 2, 3], [1, 2, 3], ['A', 'C', 'A'], ['B', 'A', 'C'], [1, 2, 1], [0, 0, 0])
+        team_a = rows['team'] == 'A'
+        self.assertEqual(rows['match_id'][team_a].tolist(), [1, 2, 3])
+        self.assertEqual(rows['points'][team_a].tolist(), [3, 0, 3])
+        self.assertEqual(rows['cumulative_points'][team_a].tolist(), [3, 3, 6])
+        self.assertEqual(rows['rolling_points'][team_a].tolist(), [3.0, 1.5, 2.0])
+
+
+class SeasonSnapshotTests(TestCase):
+    def test_snapshot_is_rebuilt_after_version_bump(self):
+        add_match(1, 'A', 'B', 2, 0)
+        refresh_seasons(['2024-2025'])
+        snapshot = get_snapshot('2024-2025')
+        self.assertIs(get_snapshot('2024-2025'), snapshot)
+        resolve_season('2024-2025')
+        with self.assertNumQueries(1):
+            self.client.get('/api/league-table/?season=2024-2025')
+
+        add_match(8, 'B', 'C', 0, 0)
+        self.assertIs(get_snapshot('2024-2025'), snapshot)
+        refresh_seasons(['2024-2025'])
+        fresh = get_snapshot('2024-2025')
+        self.assertIsNot(fresh, snapshot)
+        self.assertEqual(fresh.teams(), ['A', 'B', 'C'])
+        self.assertEqual(fresh.head_to_head(resolve_team('B'), resolve_team('C'))['results'], {'team1_wins': 0, 'team2_wins': 0, 'draws': 1})
+
+
+class SimulationTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'league.csv')
+            write_csv(path, synthetic_matches(seasons=1, teams=6, seed=3))
+            call_command('load_matches', file=path, stdout=io.StringIO())
+
+    def test_odds_are_distributions_over_the_remaining_fixtures(self):
+        snapshot = get_snapshot('2000-2001')
+        result = simulate_season(snapshot, 3000, matchday=4)
+        # 6 teams play 30 fixtures, 12 of them by matchday 4
+        self.assertEqual(result['remaining_fixtures'], 18)
+        positions = np.array([team['positions'] for team in result['teams']])
+        np.testing.assert_allclose(positions.sum(axis=0), 1, atol=1e-3)
+        np.testing.assert_allclose(positions.sum(axis=1), 1, atol=1e-3)
+        self.assertEqual(sum(team['points'] for team in result['teams']),
+                         sum(row['points'] for row in snapshot.standings(4)))
+
+        # Nothing left to play: the final table is certain
+        final = simulate_season(snapshot, 100)
+        self.assertEqual(final['remaining_fixtures'], 0)
+        points = sorted((team['points'] for team in final['teams']), reverse=True)
+        if points[0] > points[1]:
+            self.assertEqual(final['teams'][0]['title'], 1.0)
+
+    def test_worker_count_does_not_change_the_odds(self):
+        self.addCleanup(simulation.shutdown_pool)
+        snapshot = get_snapshot('2000-2001')
+        runs = simulation.CHUNK_RUNS + 500
+        serial = simulate_season(snapshot, runs, matchday=5, seed=7, workers=1)
+        parallel = simulate_season(snapshot, runs, matchday=5, seed=7, workers=2)
+        self.assertEqual(serial, parallel)
+
+    def test_endpoint_caches_per_data_version(self):
+        self.assertEqual(self.client.get('/api/simulate/?season=2000-2001&runs=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/simulate/?season=2000-2001&matchday=x').status_code, 400)
+        with mock.patch('dashboard.views.simulate_season', wraps=simulate_season) as simulate:
+            first = self.client.get('/api/simulate/?season=2000/2001&runs=500&matchday=6').json()
+            second = self.client.get('/api/simulate/?season=2000-2001&runs=500&matchday=6').json()
+            self.assertEqual(first, second)
+            self.assertEqual(simulate.call_count, 1)
+            add_match(1, 'Synthetic Team 000 FC', 'Promoted FC', 1, 0, season='2000-2001')
+            refresh_seasons(['2000-2001'])
+            self.client.get('/api/simulate/?season=2000-2001&runs=500&matchday=6')
+            self.assertEqual(simulate.call_count, 2)
+        self.assertEqual(first['season'], '2000-2001')
+        self.assertEqual(len(first['teams']), 6)
+
+    def test_mixed_competitions_are_not_simulated_as_one_league(self):
+        # A cup tie on a league matchday: two teams play twice on matchday 1
+        add_match(1, 'Synthetic Team 000 FC', 'Synthetic Team 001 FC', 1, 0, season='2000-2001', matchday=1)
+        refresh_seasons(['2000-2001'])
+        response = self.client.get('/api/simulate/?season=2000-2001&runs=100')
+        self.assertEqual(response.status_code, 400)
+        with self.assertRaises(simulation.SimulationError):
+            simulate_season(get_snapshot('2000-2001'), 100, matchday=3)
+
+
+class PredictionTests(TestCase):
+    def setUp(self):
+        prediction.clear_models()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'league.csv')
+            write_csv(path, synthetic_matches(seasons=2, teams=6, seed=5))
+            call_command('load_matches', file=path, stdout=io.StringIO())
+
+    def test_fit_recovers_known_strengths(self):
+        rng = np.random.default_rng(0)
+        attack, defence = rng.uniform(0.6, 1.6, 10), rng.uniform(0.6, 1.6, 10)
+        attack /= attack.mean()
+        home = rng.integers(0, 10, 20000)
+        away = (home + rng.integers(1, 10, 20000)) % 10
+        home_goals = rng.poisson(1.3 * attack[home] * defence[away])
+        away_goals = rng.poisson(attack[away] * defence[home])
+        fitted_attack, fitted_defence, home_factor, _ = fit_strengths(
+            home, away, home_goals, away_goals, 10, iterations=500, prior=0, tol=1e-9)
+        np.testing.assert_allclose(fitted_attack, attack, rtol=0.05)
+        np.testing.assert_allclose(fitted_defence, defence, rtol=0.05)
+        self.assertAlmostEqual(home_factor, 1.3, delta=0.05)
+
+    def test_models_are_stored_and_refitted_from_the_previous_fit(self):
+        model = prediction.get_model('2001-2002')
+        self.assertEqual(model.summary()['seasons'], ['2000-2001', '2001-2002'])
+        self.assertEqual(model.matches, 60)
+        self.assertEqual(ModelFit.objects.get(season='2001-2002').ratings.count(), 6)
+        with self.assertNumQueries(1):
+            self.assertIs(prediction.get_model('2001-2002'), model)
+        # Another process starts from the stored fit without refitting
+        prediction.clear_models()
+        self.assertEqual(prediction.get_model('2001-2002').log_likelihood, model.log_likelihood)
+
+        # load_matches refits the stored model as soon as the new match is in
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'late.csv')
+            write_csv(path, [{
+                'competition_code': 'SYN', 'season': '2001/2002', 'matchday': 11,
+                'date_utc': datetime(2001, 12, 1, 15, tzinfo=timezone.utc),
+                'home_team': 'Synthetic Team 000 FC', 'away_team': 'Synthetic Team 005 FC',
+                'fulltime_home': 4, 'fulltime_away': 0,
+            }])
+            out = io.StringIO()
+            call_command('load_matches', file=path, stdout=out)
+        self.assertIn('Refitted 1 prediction model(s)', out.getvalue())
+        self.assertEqual(refresh_predictions(['2001-2002']), 0)
+        refitted = prediction.get_model('2001-2002')
+        self.assertEqual(refitted.matches, 61)
+        self.assertLess(refitted.iterations, model.iterations)
+        cold = prediction.fit_model('2001-2002', refitted.window)
+        np.testing.assert_allclose(refitted.attack, cold.attack, rtol=1e-4)
+
+    def test_seasons_without_a_data_version_are_in_the_window(self):
+        # As on a database migrated from before data versions
+        DataVersion.objects.all().delete()
+        model = prediction.get_model('2001-2002')
+        self.assertEqual(model.summary()['seasons'], ['2000-2001', '2001-2002'])
+        self.assertEqual(model.matches, 60)
+        self.assertEqual(model.window, '2000-2001:0,2001-2002:0')
+
+    def test_batch_endpoint_scores_a_matchday_and_pairs(self):
+        response = self.client.get('/api/predictions/?season=2001/2002&matchday=1'
+                                   '&home=Synthetic Team 002 FC&away=Synthetic Team 003 FC').json()
+        self.assertEqual(response['season'], '2001-2002')
+        self.assertEqual(len(response['predictions']), 4)
+        for row in response['predictions']:
+            self.assertAlmostEqual(row['home_win'] + row['draw'] + row['away_win'], 1, places=3)
+        self.assertEqual(response['predictions'][0]['score'], list(get_snapshot('2001-2002').fixtures(1)[0][3:]))
+        self.assertEqual(self.client.get('/api/predictions/?season=2001-2002').status_code, 400)
+        self.assertEqual(self.client.get('/api/predictions/?season=2001-2002&home=Synthetic Team 002 FC').status_code, 400)
+        self.assertEqual(self.client.get('/api/predictions/?season=2001-2002&home=Nobody&away=Synthetic Team 002 FC').status_code, 404)
+
+
+class MatchExportTests(TestCase):
+    def setUp(self):
+        for day in range(1, 8):
+            add_match(day, 'A', 'B', day % 3, 1)
+            add_match(day, 'C', 'D', 2, day % 2, season='2023-2024')
+
+    def test_keyset_pages_cover_the_filtered_matches_once(self):
+        seen, url = [], '/api/matches/?season=2024/2025&limit=3'
+        while url:
+            response = self.client.get(url).json()
+            seen += response['matches']
+            url = response['next'] and f'/api/matches/?season=2024-2025&limit=3&after={response["next"]}'
+        self.assertEqual([m['date'] for m in seen], [f'2024-08-0{day}' for day in range(1, 8)])
+        self.assertEqual({m['home_team'] for m in seen}, {'A'})
+        filtered = self.client.get('/api/matches/?team=D&date_from=2024-08-03&date_to=2024-08-05').json()
+        self.assertEqual([(m['date'], m['away_team']) for m in filtered['matches']],
+                         [('2024-08-03', 'D'), ('2024-08-04', 'D'), ('2024-08-05', 'D')])
+        self.assertIsNone(filtered['next'])
+        self.assertEqual(self.client.get('/api/matches/?after=nonsense').status_code, 400)
+        self.assertEqual(self.client.get('/api/matches/?date_from=08/03/2024').status_code, 400)
+        self.assertEqual(self.client.get('/api/matches/?team=Nobody').status_code, 404)
+
+    def test_exports_stream_in_chunks(self):
+        with override_settings(EXPORT_CHUNK_SIZE=4):
+            response = self.client.get('/api/matches/?format=csv')
+            self.assertTrue(response.streaming)
+            chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 4)
+        lines = ''.join(chunks).splitlines()
+        self.assertEqual(lines[0], 'id,date,season,matchday,home_team,away_team,home_goals,away_goals,result')
+        self.assertEqual(len(lines), 15)
+
+        response = self.client.get('/api/matches/?format=ndjson&season=2023-2024')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(records), 7)
+        self.assertEqual(records[0]['home_team'], 'C')
+
+    async def test_asgi_exports_stream_asynchronously(self):
+        response = await self.async_client.get('/api/matches/?format=csv')
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.decode().splitlines()), 15)
+
+
+class ResultsGridTests(TestCase):
+    def setUp(self):
+        add_match(1, 'A', 'B', 2, 0)
+        add_match(2, 'B', 'A', 1, 1)
+        add_match(3, 'C', 'A', 0, 3)
+        add_match(4, 'A', 'B', 0, 1, season='2023-2024')
+        add_match(5, 'B', 'D', 2, 2, season='2023-2024')
+        refresh_seasons(['2024-2025', '2023-2024'])
+
+    def test_grid_and_pairs_agree_with_head_to_head(self):
+        response = self.client.get('/api/results-grid/?season=2024/2025').json()
+        teams, grid, pairs = response['teams'], response['grid'], response['pairs']
+        self.assertEqual(teams, ['A', 'B', 'C'])
+        self.assertEqual(grid['played'], [[0, 1, 0], [1, 0, 0], [1, 0, 0]])
+        self.assertEqual((grid['home_goals'][0][1], grid['away_goals'][0][1]), (2, 0))
+        snapshot = get_snapshot('2024-2025')
+        for i, team1 in enumerate(teams):
+            for j, team2 in enumerate(teams):
+                expected = snapshot.head_to_head(resolve_team(team1), resolve_team(team2))['results']
+                self.assertEqual((pairs['wins'][i][j], pairs['draws'][i][j], pairs['losses'][i][j]),
+                                 (expected['team1_wins'], expected['draws'], expected['team2_wins']))
+
+    def test_seasons_combine_over_the_union_of_teams(self):
+        response = self.client.get('/api/results-grid/?season=2024-2025&season=2023-2024').json()
+        self.assertEqual(response['seasons'], ['2024-2025', '2023-2024'])
+        self.assertEqual(response['teams'], ['A', 'B', 'C', 'D'])
+        self.assertEqual(response['grid']['played'][0][1], 2)
+        self.assertEqual(response['pairs']['wins'][0][1], 1)
+        self.assertEqual(response['pairs']['losses'][0][1], 1)
+        self.assertEqual(response['pairs']['draws'][1][3], 1)
+        with self.assertNumQueries(2):
+            self.client.get('/api/results-grid/?season=2024-2025&season=2023-2024')
+        self.assertEqual(self.client.get('/api/results-grid/?season=1800').status_code, 404)
+        self.assertEqual(self.client.get('/api/results-grid/').status_code, 400)
+
+
+class StatsBombImportTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.mirror = os.path.join(self.directory.name, 'open-data')
+        self.pairs = write_statsbomb_mirror(self.mirror, synthetic_matches(seasons=2, teams=4, seed=1))
+
+    def test_imports_several_pairs_from_a_mirror_once(self):
+        out = io.StringIO()
+        call_command('import_statsbomb', *self.pairs, source_dir=self.mirror, stdout=out)
+        self.assertIn('1:2: 12 matches (mirror)', out.getvalue())
+        self.assertEqual(Match.objects.count(), 24)
+        self.assertEqual(set(Match.objects.values_list('season', flat=True)), {'2000-2001', '2001-2002'})
+        self.assertFalse(Match.objects.filter(matchday__isnull=True).exists())
+        self.assertEqual(len(get_snapshot('2001-2002').standings()), 4)
+
+        out = io.StringIO()
+        call_command('import_statsbomb', *self.pairs, source_dir=self.mirror, stdout=out)
+        self.assertIn('Successfully imported 0 matches', out.getvalue())
+        self.assertIn('Refreshed team stats for 0 season(s)', out.getvalue())
+
+        out = io.StringIO()
+        call_command('import_statsbomb', list=True, source_dir=self.mirror, stdout=out)
+        self.assertIn('1:1 - Synthetic League - 2000/2001', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('import_statsbomb', '1-1', source_dir=self.mirror, stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command('import_statsbomb', '1:9', source_dir=self.mirror, stdout=io.StringIO())
+
+    def test_downloads_go_through_the_content_addressed_cache(self):
+        cache = os.path.join(self.directory.name, 'cache')
+
+        def download(source, path):
+            with open(os.path.join(self.mirror, 'data', *path.split('/')), 'rb') as f:
+                return f.read()
+
+        with mock.patch.object(StatsBombSource, '_download', autospec=True, side_effect=download) as fetched:
+            out = io.StringIO()
+            call_command('import_statsbomb', *self.pairs, cache_dir=cache, stdout=out)
+            self.assertIn('(network)', out.getvalue())
+            self.assertEqual(fetched.call_count, 2)
+
+            out = io.StringIO()
+            call_command('import_statsbomb', *self.pairs, cache_dir=cache, stdout=out)
+            self.assertNotIn('(network)', out.getvalue())
+            self.assertEqual(fetched.call_count, 2)
+
+            # A damaged blob is a miss, and identical content is stored once
+            with open(os.path.join(cache, 'refs', 'matches', '1', '1.json'), encoding='ascii') as f:
+                blob = os.path.join(cache, 'objects', f.read()[:2])
+            with open(os.path.join(blob, os.listdir(blob)[0]), 'wb') as f:
+                f.write(b'[]')
+            call_command('import_statsbomb', self.pairs[0], cache_dir=cache, stdout=io.StringIO())
+            self.assertEqual(fetched.call_count, 3)
+        self.assertEqual(Match.objects.count(), 24)
+
+    def test_bad_json_is_reported_and_not_kept(self):
+        cache = os.path.join(self.directory.name, 'cache')
+        with mock.patch.object(StatsBombSource, '_download', autospec=True, return_value=b'<html>rate limited'):
+            with self.assertRaisesRegex(CommandError, r'/data/matches/1/1\.json is not valid JSON'):
+                call_command('import_statsbomb', self.pairs[0], cache_dir=cache, stdout=io.StringIO())
+        self.assertFalse(os.path.exists(os.path.join(cache, 'refs', 'matches', '1', '1.json')))
+        self.assertEqual(os.listdir(os.path.join(cache, 'objects', os.listdir(os.path.join(cache, 'objects'))[0])), [])
+
+        path = os.path.join(self.mirror, 'data', 'matches', '1', '1.json')
+        with open(path, 'r+b') as f:
+            f.truncate(10)
+        with self.assertRaisesRegex(CommandError, r'open-data/data/matches/1/1\.json is not valid JSON'):
+            call_command('import_statsbomb', self.pairs[0], source_dir=self.mirror, stdout=io.StringIO())
+
+        # A failed write leaves no temporary file behind
+        with mock.patch('dashboard.services.statsbomb.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                statsbomb._write_atomic(os.path.join(cache, 'refs', 'x.json'), b'{}')
+        self.assertNotIn('x.json', os.listdir(os.path.join(cache, 'refs')))
+        self.assertFalse([name for name in os.listdir(os.path.join(cache, 'refs')) if name.startswith('.tmp-')])
+
+
+class StagingTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.csv = os.path.join(self.directory.name, 'matches.csv')
+        self.staging = os.path.join(self.directory.name, 'staging')
+        write_csv(self.csv, synthetic_matches(seasons=2, teams=6, seed=2))
+        # Rows only the per-row parser handles, in the file's last block
+        with open(self.csv, 'a', encoding='utf-8') as f:
+            f.write('SYN,2001/02,,08/01/2002,Synthetic Team 000 FC , Synthetic Team 001 FC,3,1\n')
+            f.write('SYN,2001/2002,5,2002-08-02,,Synthetic Team 001 FC,1,1\n')
+
+    def stored(self):
+        return sorted(Match.objects.values_list('date', 'home_team__name', 'away_team__name', 'home_goals',
+                                                'away_goals', 'result', 'season', 'matchday'))
+
+    @skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_staged_parquet_loads_the_same_matches_as_the_csv(self):
+        call_command('load_matches', file=self.csv, stdout=io.StringIO(), stderr=io.StringIO())
+        expected = self.stored()
+        Match.objects.all().delete()
+
+        out = io.StringIO()
+        call_command('stage_matches', self.csv, output=self.staging, block_size=2048, stdout=out, stderr=io.StringIO())
+        self.assertIn('61 rows', out.getvalue())
+        self.assertEqual(sorted(os.listdir(self.staging)), ['season=2000-2001', 'season=2001-2002'])
+        call_command('load_matches', parquet=self.staging, stdout=io.StringIO())
+        self.assertEqual(self.stored(), expected)
+
+        arrays = staging.read_arrays(self.staging, ['2001/2002'])
+        self.assertEqual((len(arrays['date']), arrays['seasons']), (31, ['2001-2002']))
+        self.assertEqual(len(arrays['teams']), 6)
+        self.assertEqual(arrays['matchday'][arrays['date'] == np.datetime64('2002-08-01')].tolist(), [0])
+        self.assertEqual(len(staging.read_frame(self.staging)), 61)
+
+        # StatsBomb pairs stage into the same season partitions
+        mirror = os.path.join(self.directory.name, 'open-data')
+        pairs = write_statsbomb_mirror(mirror, synthetic_matches(seasons=1, teams=4, seed=1))
+        call_command('import_statsbomb', *pairs, source_dir=mirror, stage=self.staging, stdout=io.StringIO())
+        self.assertEqual(Match.objects.count(), 61)
+        self.assertIn('statsbomb-1-1.parquet', os.listdir(os.path.join(self.staging, 'season=2000-2001')))
+        self.assertEqual(len(staging.read_arrays(self.staging, ['2000-2001'])['date']), 42)
+
+    @skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_staging_keeps_details_and_season_labels(self):
+        path = os.path.join(self.directory.name, 'detailed.csv')
+        # A US-style date sends the second file's block through the row parser
+        for date_utc in ('2024-08-17 14:00:00+00:00', '08/17/2024'):
+            with self.subTest(date_utc=date_utc):
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write('season,matchday,date_utc,home_team,away_team,fulltime_home,fulltime_away,'
+                            'halftime_home,halftime_away,referee\n')
+                    f.write('2024/25,1,2024-08-16 19:00:00+00:00,A,B,1,0,0,0,Robert Jones\n')
+                    f.write(f'2024/25,1,{date_utc},C,D,2,2,,,\n')
+                call_command('stage_matches', path, output=self.staging, stdout=io.StringIO())
+                frame = staging.read_frame(self.staging).sort_values('date')
+                self.assertEqual(frame['halftime_home'].isna().tolist(), [False, True])
+                self.assertEqual((frame['halftime_home'].iloc[0], frame['referee'].iloc[0]), (0, 'Robert Jones'))
+                self.assertTrue(frame['referee'].isna().iloc[1])
+                self.assertEqual(frame[['home_points', 'away_points']].values.tolist(), [[3, 0], [1, 1]])
+
+        call_command('load_matches', parquet=self.staging, stdout=io.StringIO())
+        self.assertTrue(SeasonAlias.objects.filter(alias='2024/25', season__key='2024-2025').exists())
+        self.assertEqual(self.client.get('/api/league-table/?season=2024/25').json()['standings'][0]['name'], 'A')
+
+    def test_missing_pyarrow_is_a_command_error(self):
+        with mock.patch.dict(sys.modules, {'pyarrow': None}), self.assertRaisesMessage(CommandError, 'pip install pyarrow'):
+            call_command('stage_matches', self.csv, output=self.staging, stdout=io.StringIO())
+
+
+class LiveIngestTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.matches = list(synthetic_matches(teams=6, seed=2))
+
+    def apply(self, match, **changes):
+        return apply_result(ingest.parse_row({key: str(value) for key, value in {**match, **changes}.items()}))
+
+    def aggregates(self):
+        rows = TeamMatch.objects.values_list('match_id', 'team_id', 'date', 'is_home', 'goals_for', 'goals_against',
+                                             'points', 'cumulative_points', 'rolling_points')
+        stats = TeamSeasonStats.objects.values_list(*[f.name for f in TeamSeasonStats._meta.fields if f.name != 'id'])
+        return sorted(row[:-1] + (round(row[-1], 9),) for row in rows), sorted(stats)
+
+    def test_deltas_match_a_full_rebuild(self):
+        path = os.path.join(self.directory.name, 'seed.csv')
+        write_csv(path, self.matches[:12])
+        call_command('load_matches', file=path, stdout=io.StringIO())
+        version = season_version('2000-2001')[0]
+
+        # Mostly appended in order, some results late, then corrections old and new
+        rest = self.matches[12:]
+        self.assertEqual({self.apply(match) for match in rest[4:] + rest[:4]}, {'created'})
+        self.assertEqual(self.apply(self.matches[0], fulltime_home=self.matches[0]['fulltime_away'] + 1), 'updated')
+        self.assertEqual(self.apply(rest[6], fulltime_away=rest[6]['fulltime_away'] + 2), 'updated')
+        self.assertEqual(self.apply(rest[6], fulltime_away=rest[6]['fulltime_away'] + 2), 'unchanged')
+        self.assertEqual(Match.objects.count(), 30)
+        self.assertGreater(season_version('2000-2001')[0], version)
+
+        incremental = self.aggregates()
+        refresh_seasons({'2000-2001'})
+        self.assertEqual(incremental, self.aggregates())
+
+    def assertSameSnapshot(self, snapshot, expected):
+        labels, totals = snapshot.matchday_totals
+        expected_labels, expected_totals = expected.matchday_totals
+        self.assertEqual(labels.tolist(), expected_labels.tolist())
+        for key, values in expected_totals.items():
+            self.assertEqual(totals[key].tolist(), values.tolist(), key)
+        for key, values in expected.results_grid.items():
+            self.assertEqual(snapshot.results_grid[key].tolist(), values.tolist(), key)
+        self.assertEqual(snapshot.standings(), expected.standings())
+        for matchday in labels.tolist():
+            self.assertEqual(snapshot.standings(matchday), expected.standings(matchday))
+        for pk in expected.team_pks:
+            self.assertEqual(snapshot.team_series(pk).columns(), expected.team_series(pk).columns())
+            self.assertEqual(snapshot.position_history(pk), expected.position_history(pk))
+
+    def test_snapshots_apply_each_result_without_a_rebuild(self):
+        path = os.path.join(self.directory.name, 'seed.csv')
+        write_csv(path, self.matches[:12])
+        call_command('load_matches', file=path, stdout=io.StringIO())
+        snapshot = get_snapshot('2000-2001')
+        snapshot.standings(), snapshot.matchday_totals, snapshot.results_grid, snapshot.positions
+
+        rest = self.matches[12:]
+        steps = [(match, {}) for match in rest[4:-1] + rest[:4]]
+        steps += [(self.matches[0], {'fulltime_home': self.matches[0]['fulltime_away'] + 1}),
+                  (rest[6], {'fulltime_away': rest[6]['fulltime_away'] + 2}),
+                  (rest[-1], {'matchday': ''})]
+        with mock.patch.object(SeasonSnapshot, 'build', side_effect=SeasonSnapshot.build) as build:
+            for match, changes in steps:
+                self.apply(match, **changes)
+                snapshot = get_snapshot('2000-2001')
+                build.assert_not_called()
+                self.assertSameSnapshot(snapshot, SeasonSnapshot.build('2000-2001', snapshot.version))
+                build.reset_mock()
+            self.assertEqual(len(snapshot), 30)
+
+            # A new team changes every local id, so that takes a rebuild
+            self.apply(self.matches[0], home_team='Newcomers FC', date_utc='2001-07-01')
+            get_snapshot('2000-2001')
+            build.assert_called_once()
+
+    def test_feed_and_drop_directory(self):
+        feed = os.path.join(self.directory.name, 'feed.csv')
+        with open(feed, 'w', encoding='utf-8') as f:
+            f.write('season,date_utc,home_team,away_team,fulltime_home,fulltime_away\n2024/2025,2024-08-17,Arsenal,Chel')
+        reader = FeedReader(feed)
+        self.assertEqual(reader.read(), ([], []))
+        with open(feed, 'a', encoding='utf-8') as f:
+            f.write('sea,2,1\n')
+        records, _ = reader.read()
+        self.assertEqual(records[0]['away_team'], 'Chelsea')
+        # A rotated feed is read again from its header
+        with open(feed + '.new', 'w', encoding='utf-8') as f:
+            f.write('season,date_utc,home_team,away_team,fulltime_home,fulltime_away\n2024/2025,2024-08-18,Chelsea,Arsenal,0,0\n')
+        os.replace(feed + '.new', feed)
+        records, _ = reader.read()
+        self.assertEqual(records[0]['home_team'], 'Chelsea')
+
+        drop = os.path.join(self.directory.name, 'drop')
+        os.makedirs(drop)
+        write_csv(os.path.join(drop, 'a.csv'), self.matches[:3])
+        with open(os.path.join(drop, 'b.ndjson'), 'w', encoding='utf-8') as f:
+            f.write(json.dumps({**self.matches[3], 'date_utc': str(self.matches[3]['date_utc'])}) + '\nnot json\n')
+        write_csv(os.path.join(drop, 'c.csv'), self.matches[4:7])
+        # A file is still in place while its records are applied, and one that fails does not stop the rest
+        waiting = []
+
+        def apply(parsed):
+            waiting.append([name for name in sorted(os.listdir(drop)) if '.' in name])
+            if (parsed['home_team'], parsed['away_team']) == (self.matches[5]['home_team'], self.matches[5]['away_team']):
+                raise ValueError('no such fixture')
+            return apply_result(parsed)
+
+        out, err = io.StringIO(), io.StringIO()
+        with mock.patch.object(ingest_live, 'apply_result', side_effect=apply):
+            call_command('ingest_live', watch_dir=drop, once=True, stdout=out, stderr=err)
+        self.assertIn('Live ingest: 6 created, 0 updated, 0 unchanged, 0 moved, 1 skipped, 1 failed', out.getvalue())
+        self.assertIn('no such fixture', err.getvalue())
+        self.assertEqual(waiting[:3], [['a.csv', 'b.ndjson', 'c.csv']] * 3)
+        self.assertEqual(waiting[3:], [['b.ndjson', 'c.csv']] + [['c.csv']] * 3)
+        self.assertEqual(sorted(os.listdir(os.path.join(drop, 'processed'))), ['a.csv', 'b.ndjson'])
+        self.assertEqual(os.listdir(os.path.join(drop, 'failed')), ['c.csv'])
+        self.assertEqual(sum(row['played'] for row in get_snapshot('2000-2001').standings()), 12)
+
+
+class LivePushTests(TestCase):
+    def setUp(self):
+        add_match(1, 'A', 'B', 2, 0, matchday=1)
+        add_match(1, 'C', 'D', 1, 1, matchday=1)
+        bump_season_version('2024-2025')
+        # As the test client does, keep the handler from closing the test transaction's connection
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+    def test_needs_the_asgi_server(self):
+        self.assertEqual(self.client.get('/api/live/?season=2024-2025').status_code, 501)
+
+    @override_settings(PUSH_POLL_INTERVAL=60)
+    async def test_subscribers_get_the_table_then_diffs(self):
+        application = ASGIHandler()
+        subscribers = [Subscriber(application, '/api/live/', 'season=2024/2025') for _ in range(3)]
+        for subscriber in subscribers:
+            subscriber.start()
+        await asyncio.gather(*(subscriber.wait_for(1) for subscriber in subscribers))
+        event, data = subscribers[0].events()[0]
+        self.assertEqual(subscribers[0].status, 200)
+        self.assertEqual(event, 'standings')
+        self.assertEqual([row['name'] for row in data['standings']], ['A', 'C', 'D', 'B'])
+        self.assertEqual(len(publisher.channels), 1)
+
+        # One result swaps B and C: only their rows and their two series are sent
+        await sync_to_async(add_match)(8, 'B', 'C', 3, 0, matchday=2)
+        await sync_to_async(bump_season_version)('2024-2025')
+        publisher.notify('2024-2025')
+        await asyncio.gather(*(subscriber.wait_for(2) for subscriber in subscribers))
+        event, data = subscribers[2].events()[1]
+        self.assertEqual(event, 'update')
+        self.assertEqual({row['name']: row['position'] for row in data['standings']}, {'B': 2, 'C': 4})
+        series = {team['team']: team for team in data['series']}
+        self.assertEqual(set(series), {'B', 'C'})
+        self.assertEqual((series['B']['from'], series['B']['length']), (1, 2))
+        self.assertEqual((series['B']['points'], series['B']['cumulative_points']), ([3], [3]))
+
+        await asyncio.gather(*(subscriber.close() for subscriber in subscribers))
+        self.assertEqual(publisher.channels, {})
+
+        unknown = Subscriber(application, '/api/live/', 'season=1900-1901')
+        unknown.start()
+        await unknown.task
+        self.assertEqual(unknown.status, 404)
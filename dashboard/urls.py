@@ -5,10 +5,19 @@ app_name = 'dashboard'
 
 urlpatterns = [
     path('', views.team_dashboard, name='dashboard'),
+    path('metrics', views.metrics, name='metrics'),
+    path('api/matches/', views.api_matches, name='api_matches'),
+    path('api/seasons/', views.api_seasons, name='api_seasons'),
     path('api/teams/', views.api_teams, name='api_teams'),
     path('api/team-stats/<str:team_name>/', views.api_team_stats, name='api_team_stats'),
+    path('api/team-bundle/<str:team_name>/', views.api_team_bundle, name='api_team_bundle'),
     path('api/head-to-head/', views.api_head_to_head, name='api_head_to_head'),
     path('api/league-table/', views.api_league_table, name='api_league_table'),
+    path('api/live/', views.api_live, name='api_live'),
+    path('api/results-grid/', views.api_results_grid, name='api_results_grid'),
+    path('api/position-history/<str:team_name>/', views.api_position_history, name='api_position_history'),
+    path('api/predictions/', views.api_predictions, name='api_predictions'),
+    path('api/simulate/', views.api_simulate, name='api_simulate'),
     path('api/goals-over-time/<str:team_name>/', views.api_goals_over_time, name='api_goals_over_time'),
     path('api/cumulative-points/<str:team_name>/', views.api_cumulative_points, name='api_cumulative_points'),
     path('api/goal-diff-series/<str:team_name>/', views.api_goal_diff_series, name='api_goal_diff_series'),
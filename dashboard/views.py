@@ -1,313 +1,383 @@
-import pandas as pd
-import numpy as np
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from io import BytesIO
-from django.http import HttpResponse
+from calendar import timegm
+from datetime import date
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.http import JsonResponse, HttpResponseBadRequest
-from django.db.models import Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views.decorators.http import require_GET
-from .models import Match
+from .services.export import aiterate, csv_chunks, match_rows, ndjson_chunks, page, parse_cursor
+from .services.prediction import get_model
+from .services.push import publisher
+from .services.rendering import RenderBusy, chart_digest, render_chart
+from .services.seasons import resolve_season, season_catalogue
+from .services.simulation import SimulationError, simulate_season
+from .services.singleflight import LockTimeout, SingleFlight, file_lock, record
+from .services.snapshot import SeasonSnapshot, get_snapshot, results_grid
+from .services.timing import prometheus_text, timed
+from .services.teams import resolve_team
+from .services.versioning import season_version
+
+_chart_flight = SingleFlight('chart')
+_simulation_flight = SingleFlight('simulation')
+
+def _snapshot(season_key, version=None):
+    # Seasons that resolve to nothing get an empty snapshot that is not kept
+    if season_key is None: return SeasonSnapshot(None, (0, None), [], {})
+    return get_snapshot(season_key, version)
+
+def _series(team_name, season_key, version=None):
+    # Answered from the in-memory season snapshot (see services/snapshot.py)
+    return _snapshot(season_key, version).team_series(resolve_team(team_name), team_name)
 
 def team_dashboard(request):
     return render(request, 'dashboard/team_dashboard.html')
 
+@require_GET
+def metrics(request):
+    return HttpResponse(prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@require_GET
+def api_matches(request):
+    """Raw matches by season, team and date range: keyset-paged JSON, or a streamed CSV/NDJSON export."""
+    output = request.GET.get('format', 'json')
+    if output not in ('json', 'csv', 'ndjson'): return HttpResponseBadRequest('Format must be json, csv or ndjson.')
+    season, team = request.GET.get('season'), request.GET.get('team')
+    season_key = resolve_season(season) if season else None
+    if season and season_key is None: return JsonResponse({'error': f'Unknown season {season}.'}, status=404)
+    team_pk = resolve_team(team) if team else None
+    if team and team_pk is None: return JsonResponse({'error': f'Unknown team {team}.'}, status=404)
+    try:
+        dates = [date.fromisoformat(request.GET[key]) if request.GET.get(key) else None for key in ('date_from', 'date_to')]
+    except ValueError:
+        return HttpResponseBadRequest('Dates must be given as YYYY-MM-DD.')
+    rows = match_rows(season_key, team_pk, *dates)
+
+    if output == 'json':
+        limit = request.GET.get('limit', str(settings.EXPORT_PAGE_SIZE))
+        if not limit.isdecimal() or not 1 <= int(limit) <= settings.EXPORT_MAX_PAGE_SIZE:
+            return HttpResponseBadRequest(f'Limit must be an integer between 1 and {settings.EXPORT_MAX_PAGE_SIZE}.')
+        try:
+            after = parse_cursor(request.GET['after']) if request.GET.get('after') else None
+        except ValueError:
+            return HttpResponseBadRequest('Invalid cursor.')
+        matches, next_cursor = page(rows, after, int(limit))
+        return JsonResponse({'matches': matches, 'next': next_cursor})
+
+    chunks = (csv_chunks if output == 'csv' else ndjson_chunks)(rows, settings.EXPORT_CHUNK_SIZE)
+    response = StreamingHttpResponse(
+        aiterate(chunks) if isinstance(request, ASGIRequest) else chunks,
+        content_type='text/csv; charset=utf-8' if output == 'csv' else 'application/x-ndjson',
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="matches.{output}"'
+    return response
+
+@require_GET
+async def api_live(request):
+    """Server-Sent Events for one season: the standings on connect, then a diff whenever its data changes."""
+    season = request.GET.get('season')
+    if not season: return HttpResponseBadRequest('Season is required.')
+    # A sync worker would hold a thread for as long as the client listens
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Live updates are only served through football_visualizer.asgi.'}, status=501)
+    season_key = await sync_to_async(resolve_season)(season)
+    if season_key is None: return JsonResponse({'error': f'Unknown season {season}.'}, status=404)
+    response = StreamingHttpResponse(publisher.stream(season_key), content_type='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@require_GET
+def api_seasons(request):
+    return JsonResponse({'seasons': season_catalogue()})
+
 @require_GET
 def api_teams(request):
     season = request.GET.get('season')
     if not season:
         return HttpResponseBadRequest('A season parameter is required.')
-    # try exact match first (normalized), then fallback to contains to handle different separators
-    season_norm = season.replace('/', '-').replace('_', '-').replace(' ', '')
-    qs_exact = Match.objects.filter(season=season_norm)
-    if not qs_exact.exists():
-        qs_exact = Match.objects.filter(season__icontains=season)
-    home_teams = qs_exact.values_list('home_team', flat=True)
-    away_teams = qs_exact.values_list('away_team', flat=True)
-    teams = sorted(list(set(home_teams) | set(away_teams)))
-    return JsonResponse({'teams': teams})
+    # Any known spelling of the season ('2024/2025', '2024-25') resolves to its canonical key
+    return JsonResponse({'teams': _snapshot(resolve_season(season)).teams()})
 
 @require_GET
 def api_team_stats(request, team_name):
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('A season parameter is required.')
-    matches = Match.objects.filter(Q(home_team=team_name) | Q(away_team=team_name), season=season).order_by('date')
-    if not matches.exists(): return JsonResponse({'error': f'No matches found for {team_name} in the {season} season.'}, status=404)
-    results = {'wins': 0, 'draws': 0, 'losses': 0}
-    points_data = []
-    for match in matches:
-        points = 0; is_home = match.home_team == team_name
-        if match.result == 'D': results['draws'] += 1; points = 1
-        elif (is_home and match.result == 'H') or (not is_home and match.result == 'A'): results['wins'] += 1; points = 3
-        else: results['losses'] += 1
-        points_data.append({'date': match.date, 'points': points})
-    df = pd.DataFrame(points_data)
-    df['rolling_avg'] = df['points'].rolling(window=5, min_periods=1).mean()
-    return JsonResponse({'team': team_name, 'results': results, 'form': {'dates': [d.strftime('%Y-%m-%d') for d in df['date']], 'rolling_average': df['rolling_avg'].tolist()}})
+    series = _series(team_name, resolve_season(season))
+    if not len(series): return JsonResponse({'error': f'No matches found for {team_name} in the {season} season.'}, status=404)
+    return JsonResponse({'team': team_name, 'results': series.results(), 'form': series.form()})
 
 @require_GET
 def api_head_to_head(request):
     team1, team2, season = request.GET.get('team1'), request.GET.get('team2'), request.GET.get('season')
     if not all([team1, team2, season]): return HttpResponseBadRequest('All parameters are required.')
-    matches = Match.objects.filter((Q(home_team=team1) & Q(away_team=team2)) | (Q(home_team=team2) & Q(away_team=team1)), season=season)
-    results = {'team1_wins': 0, 'team2_wins': 0, 'draws': 0}
-    for match in matches:
-        if match.result == 'D': results['draws'] += 1
-        elif (match.home_team == team1 and match.result == 'H') or (match.away_team == team1 and match.result == 'A'): results['team1_wins'] += 1
-        else: results['team2_wins'] += 1
-    return JsonResponse({'team1_name': team1, 'team2_name': team2, 'results': results})
+    snapshot = _snapshot(resolve_season(season))
+    series = snapshot.team_series(resolve_team(team1), team1)
+    return JsonResponse(series.head_to_head(snapshot.team_name(resolve_team(team2)) or team2))
 
 @require_GET
 def api_league_table(request):
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('Season is required.')
-    teams_qs = Match.objects.filter(season=season).values_list('home_team', flat=True).distinct()
-    teams = {name: {'name': name,'played':0,'wins':0,'draws':0,'losses':0,'gf':0,'ga':0,'gd':0,'points':0} for name in teams_qs}
-    for match in Match.objects.filter(season=season):
-        if match.home_team not in teams or match.away_team not in teams: continue
-        h, a = teams[match.home_team], teams[match.away_team]
-        h['played'] += 1; a['played'] += 1; h['gf'] += match.home_goals; a['gf'] += match.away_goals; h['ga'] += match.away_goals; a['ga'] += match.home_goals
-        if match.result == 'H': h['wins'] += 1; h['points'] += 3; a['losses'] += 1
-        elif match.result == 'A': a['wins'] += 1; a['points'] += 3; h['losses'] += 1
-        else: h['draws'] += 1; h['points'] += 1; a['draws'] += 1
-    for team in teams.values(): team['gd'] = team['gf'] - team['ga']
-    return JsonResponse({'standings': sorted(teams.values(), key=lambda x: (x['points'], x['gd']), reverse=True)})
+    matchday = request.GET.get('matchday')
+    if matchday is None:
+        return JsonResponse({'standings': _snapshot(resolve_season(season)).standings()})
+    if not matchday.isdecimal(): return HttpResponseBadRequest('Matchday must be a positive integer.')
+    matchday = int(matchday)
+    return JsonResponse({'matchday': matchday, 'standings': _snapshot(resolve_season(season)).standings(matchday)})
 
 @require_GET
-def api_goals_over_time(request, team_name):
-    season = request.GET.get('season')
-    if not season: return HttpResponseBadRequest('Season is required.')
-    matches = Match.objects.filter(Q(home_team=team_name) | Q(away_team=team_name), season=season).order_by('date')
-    data = {'dates': [], 'scored': [], 'conceded': []}
-    for m in matches:
-        data['dates'].append(m.date.strftime('%Y-%m-%d'))
-        if m.home_team == team_name:
-            data['scored'].append(m.home_goals); data['conceded'].append(m.away_goals)
-        else:
-            data['scored'].append(m.away_goals); data['conceded'].append(m.home_goals)
-    return JsonResponse(data)
+def api_results_grid(request):
+    """Home x away results grid and the all-pairs W/D/L matrix for one or more seasons (repeat ``season``)."""
+    seasons = request.GET.getlist('season')
+    if not seasons: return HttpResponseBadRequest('Season is required.')
+    season_keys = list(dict.fromkeys(resolve_season(season) for season in seasons))
+    if None in season_keys:
+        unknown = next(season for season in seasons if resolve_season(season) is None)
+        return JsonResponse({'error': f'Unknown season {unknown}.'}, status=404)
+    return JsonResponse({'seasons': season_keys, **results_grid([_snapshot(key) for key in season_keys])})
 
 @require_GET
-def api_cumulative_points(request, team_name):
+def api_position_history(request, team_name):
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('Season is required.')
-    matches = Match.objects.filter(Q(home_team=team_name) | Q(away_team=team_name), season=season).order_by('date')
-    if not matches.exists():
-        return JsonResponse({'dates': [], 'cumulative_points': []})
-    rows = []
-    for m in matches:
-        is_home = m.home_team == team_name
-        if m.result == 'D': pts = 1
-        elif (is_home and m.result == 'H') or ((not is_home) and m.result == 'A'): pts = 3
-        else: pts = 0
-        rows.append({'date': m.date, 'points': pts})
-    df = pd.DataFrame(rows)
-    df['cumulative'] = df['points'].cumsum()
-    return JsonResponse({'dates': [d.strftime('%Y-%m-%d') for d in df['date']], 'cumulative_points': df['cumulative'].tolist()})
+    history = _snapshot(resolve_season(season)).position_history(resolve_team(team_name))
+    if history is None: return JsonResponse({'error': f'No matches found for {team_name} in the {season} season.'}, status=404)
+    return JsonResponse(history)
 
 @require_GET
-def api_goal_diff_series(request, team_name):
+def api_predictions(request):
+    """Model predictions for every match of a matchday, or for the given home/away pairs, in one call."""
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('Season is required.')
-    matches = Match.objects.filter(Q(home_team=team_name) | Q(away_team=team_name), season=season).order_by('date')
-    dates, diffs = [], []
-    for m in matches:
-        if m.home_team == team_name:
-            gd = m.home_goals - m.away_goals
-        else:
-            gd = m.away_goals - m.home_goals
-        dates.append(m.date.strftime('%Y-%m-%d'))
-        diffs.append(gd)
-    return JsonResponse({'dates': dates, 'goal_diff': diffs})
+    matchday, homes, aways = request.GET.get('matchday'), request.GET.getlist('home'), request.GET.getlist('away')
+    if matchday is None and not homes: return HttpResponseBadRequest('A matchday or home/away team pairs are required.')
+    if matchday is not None and not matchday.isdecimal(): return HttpResponseBadRequest('Matchday must be a positive integer.')
+    if len(homes) != len(aways): return HttpResponseBadRequest('Every home team needs an away team.')
+    if len(homes) > settings.PREDICTION_MAX_PAIRS:
+        return HttpResponseBadRequest(f'At most {settings.PREDICTION_MAX_PAIRS} pairs can be scored in one call.')
+    season_key = resolve_season(season)
+    if season_key is None: return JsonResponse({'error': f'Unknown season {season}.'}, status=404)
+
+    fixtures, pairs = [], []
+    if matchday is not None:
+        snapshot = _snapshot(season_key)
+        for day, home_pk, away_pk, home_goals, away_goals in snapshot.fixtures(int(matchday)):
+            fixtures.append({'date': day, 'home': snapshot.team_name(home_pk), 'away': snapshot.team_name(away_pk),
+                             'score': [home_goals, away_goals]})
+            pairs.append((home_pk, away_pk))
+    for home, away in zip(homes, aways):
+        home_pk, away_pk = resolve_team(home), resolve_team(away)
+        for name, pk in ((home, home_pk), (away, away_pk)):
+            if pk is None: return JsonResponse({'error': f'Unknown team {name}.'}, status=404)
+        fixtures.append({'home': home, 'away': away})
+        pairs.append((home_pk, away_pk))
+
+    model = get_model(season_key)
+    predictions = model.predict([home for home, _ in pairs], [away for _, away in pairs]) if pairs else []
+    return JsonResponse({
+        'season': season_key,
+        'model': model.summary(),
+        'predictions': [{**fixture, **prediction} for fixture, prediction in zip(fixtures, predictions)],
+    })
 
 @require_GET
-def api_home_away_breakdown(request, team_name):
+def api_simulate(request):
+    """Finishing-position odds from a Monte Carlo run over the season's remaining fixtures."""
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('Season is required.')
-    stats = {
-        'home': {'wins':0,'draws':0,'losses':0,'gf':0,'ga':0},
-        'away': {'wins':0,'draws':0,'losses':0,'gf':0,'ga':0},
-    }
-    for m in Match.objects.filter(Q(home_team=team_name) | Q(away_team=team_name), season=season):
-        if m.home_team == team_name:
-            side = 'home'; gf, ga = m.home_goals, m.away_goals
-            res = 'win' if m.result=='H' else ('draw' if m.result=='D' else 'loss')
-        else:
-            side = 'away'; gf, ga = m.away_goals, m.home_goals
-            res = 'win' if m.result=='A' else ('draw' if m.result=='D' else 'loss')
-        stats[side]['gf'] += gf; stats[side]['ga'] += ga
-        if res=='win': stats[side]['wins'] += 1
-        elif res=='draw': stats[side]['draws'] += 1
-        else: stats[side]['losses'] += 1
-    return JsonResponse(stats)
+    runs, matchday = request.GET.get('runs', str(settings.SIMULATION_RUNS)), request.GET.get('matchday')
+    if not runs.isdecimal() or not 1 <= int(runs) <= settings.SIMULATION_MAX_RUNS:
+        return HttpResponseBadRequest(f'Runs must be an integer between 1 and {settings.SIMULATION_MAX_RUNS}.')
+    if matchday is not None and not matchday.isdecimal(): return HttpResponseBadRequest('Matchday must be a positive integer.')
+    runs, matchday = int(runs), int(matchday) if matchday is not None else None
+    season_key = resolve_season(season)
+    version = season_version(season_key) if season_key else (0, None)
+    # Seeded runs are reproducible, so one result per data version can be shared
+    cache_key = f'simulation:{season_key}:{version[0]}:{matchday}:{runs}'
+    result = caches['default'].get(cache_key)
+    if result is None:
+        # Identical requests that arrive while it runs wait for this one's result
+        try:
+            result = _simulation_flight.call(cache_key, lambda: _simulate(cache_key, season_key, version, runs, matchday))
+        except SimulationError as e:
+            return HttpResponseBadRequest(str(e))
+    return JsonResponse({'season': season_key, **result})
+
+def _simulate(cache_key, season_key, version, runs, matchday):
+    with timed('simulate'):
+        result = simulate_season(_snapshot(season_key, version), runs, matchday)
+    caches['default'].set(cache_key, result, settings.SIMULATION_CACHE_TIMEOUT)
+    return result
 
 @require_GET
-def api_goals_histogram(request, team_name):
+def api_goals_over_time(request, team_name):
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('Season is required.')
-    goals = []
-    for m in Match.objects.filter(Q(home_team=team_name) | Q(away_team=team_name), season=season):
-        goals.append(m.home_goals if m.home_team == team_name else m.away_goals)
-    if not goals:
-        return JsonResponse({'bins': [], 'counts': []})
-    counts, bins = np.histogram(goals, bins=range(0, max(goals)+2))
-    # bins are edges; use left edges as labels
-    return JsonResponse({'bins': bins[:-1].tolist(), 'counts': counts.tolist()})
+    return JsonResponse(_series(team_name, resolve_season(season)).goals_over_time())
 
 @require_GET
-def api_matplotlib_form_image(request, team_name):
+def api_cumulative_points(request, team_name):
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('Season is required.')
-    matches = Match.objects.filter(Q(home_team=team_name) | Q(away_team=team_name), season=season).order_by('date')
-    rows = []
-    for m in matches:
-        is_home = m.home_team == team_name
-        if m.result == 'D': pts = 1
-        elif (is_home and m.result == 'H') or ((not is_home) and m.result == 'A'): pts = 3
-        else: pts = 0
-        gf = m.home_goals if is_home else m.away_goals
-        ga = m.away_goals if is_home else m.home_goals
-        rows.append({'date': m.date, 'points': pts, 'gd': gf-ga})
-    if not rows:
-        return HttpResponse(status=204)
-    df = pd.DataFrame(rows)
-    df['rolling5'] = df['points'].rolling(window=5, min_periods=1).mean()
-    df['cum_points'] = df['points'].cumsum()
-    fig, ax1 = plt.subplots(figsize=(7, 3.5), dpi=150)
-    ax1.plot(df['date'], df['rolling5'], color='#0d6efd', label='Rolling 5 Avg')
-    ax1.set_ylabel('Rolling Avg')
-    ax2 = ax1.twinx()
-    ax2.plot(df['date'], df['cum_points'], color='#198754', label='Cumulative Points')
-    ax2.set_ylabel('Points')
-    ax1.set_title(f'{team_name} Form ({season})')
-    fig.autofmt_xdate()
-    buf = BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return HttpResponse(buf.getvalue(), content_type='image/png')
-
-# ---------- Pandas/Matplotlib helpers and endpoints ----------
-def _team_matches_dataframe(team_name: str, season: str) -> pd.DataFrame:
-    qs = Match.objects.filter(Q(home_team=team_name) | Q(away_team=team_name), season=season).order_by('date')
-    rows = []
-    for m in qs:
-        is_home = m.home_team == team_name
-        gf = m.home_goals if is_home else m.away_goals
-        ga = m.away_goals if is_home else m.home_goals
-        if m.result == 'D': pts = 1
-        elif (is_home and m.result == 'H') or ((not is_home) and m.result == 'A'): pts = 3
-        else: pts = 0
-        rows.append({
-            'date': m.date,
-            'venue': 'Home' if is_home else 'Away',
-            'goals_for': gf,
-            'goals_against': ga,
-            'gd': gf - ga,
-            'points': pts,
-        })
-    return pd.DataFrame(rows)
-
-def _png_response(figure) -> HttpResponse:
-    buf = BytesIO()
-    plt.tight_layout()
-    figure.savefig(buf, format='png')
-    plt.close(figure)
-    buf.seek(0)
-    return HttpResponse(buf.getvalue(), content_type='image/png')
+    return JsonResponse(_series(team_name, resolve_season(season)).cumulative())
 
 @require_GET
-def api_mpl_hist_goals(request, team_name):
+def api_goal_diff_series(request, team_name):
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('Season is required.')
-    df = _team_matches_dataframe(team_name, season)
-    if df.empty: return HttpResponse(status=204)
-    fig, ax = plt.subplots(figsize=(6,3.2), dpi=150)
-    df['goals_for'].plot(kind='hist', bins=range(0, int(df['goals_for'].max())+2), color='#0d6efd', edgecolor='white', ax=ax)
-    ax.set_title(f'Goals Scored Histogram - {team_name} ({season})')
-    ax.set_xlabel('Goals For per Match')
-    ax.set_ylabel('Matches')
-    return _png_response(fig)
+    return JsonResponse(_series(team_name, resolve_season(season)).goal_diff_series())
 
 @require_GET
-def api_mpl_kde_gd(request, team_name):
+def api_home_away_breakdown(request, team_name):
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('Season is required.')
-    df = _team_matches_dataframe(team_name, season)
-    if df.empty or df['gd'].nunique() <= 1: return HttpResponse(status=204)
-    fig, ax = plt.subplots(figsize=(6,3.2), dpi=150)
-    df['gd'].plot(kind='kde', color='#198754', ax=ax)
-    ax.set_title(f'Goal Difference KDE - {team_name} ({season})')
-    ax.set_xlabel('Goal Difference')
-    return _png_response(fig)
+    return JsonResponse(_series(team_name, resolve_season(season)).home_away_breakdown())
 
 @require_GET
-def api_mpl_box_points(request, team_name):
+def api_goals_histogram(request, team_name):
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('Season is required.')
-    df = _team_matches_dataframe(team_name, season)
-    if df.empty: return HttpResponse(status=204)
-    fig, ax = plt.subplots(figsize=(4,3.2), dpi=150)
-    df['points'].plot(kind='box', ax=ax)
-    ax.set_title(f'Points Distribution - {team_name} ({season})')
-    ax.set_ylabel('Points per Match')
-    return _png_response(fig)
+    return JsonResponse(_series(team_name, resolve_season(season)).goals_histogram())
 
 @require_GET
-def api_mpl_scatter_scored_conceded(request, team_name):
+def api_team_bundle(request, team_name):
+    """Every JSON series the dashboard shows for one team, built from a single pass over its matches."""
     season = request.GET.get('season')
     if not season: return HttpResponseBadRequest('Season is required.')
-    df = _team_matches_dataframe(team_name, season)
-    if df.empty: return HttpResponse(status=204)
-    fig, ax = plt.subplots(figsize=(6,3.2), dpi=150)
-    df.plot.scatter(x='goals_for', y='goals_against', color='#dc3545', ax=ax)
-    ax.set_title(f'Scored vs Conceded - {team_name} ({season})')
-    ax.set_xlabel('Goals For')
-    ax.set_ylabel('Goals Against')
-    return _png_response(fig)
+    opponent = request.GET.get('opponent')
+    season_key = resolve_season(season)
+    snapshot = _snapshot(season_key)
+    series = snapshot.team_series(resolve_team(team_name), team_name)
+    if not len(series): return JsonResponse({'error': f'No matches found for {team_name} in the {season} season.'}, status=404)
+    return JsonResponse({
+        'team': team_name,
+        'season': season_key,
+        'team_stats': {'team': team_name, 'results': series.results(), 'form': series.form()},
+        'goals_over_time': series.goals_over_time(),
+        'cumulative_points': series.cumulative(),
+        'goal_diff_series': series.goal_diff_series(),
+        'home_away_breakdown': series.home_away_breakdown(),
+        'goals_histogram': series.goals_histogram(),
+        'head_to_head': series.head_to_head(snapshot.team_name(resolve_team(opponent)) or opponent) if opponent else None,
+        'league_table': {'standings': snapshot.standings()},
+    })
+
+def cached_chart(view):
+    """Serve a chart view from the render cache, keyed on (chart, team, season, data version).
+
+    Concurrent misses for the same key share one render (see services/singleflight.py).
+    Responses carry an ETag and Last-Modified so browsers can revalidate with a 304.
+    """
+    @wraps(view)
+    async def wrapper(request, team_name):
+        season = request.GET.get('season')
+        if not season: return HttpResponseBadRequest('Season is required.')
+        request.season_key = await sync_to_async(resolve_season)(season)
+        if request.season_key is None:
+            request.data_version = version, updated_at = 0, None
+        else:
+            request.data_version = version, updated_at = await sync_to_async(season_version)(request.season_key)
+        digest = chart_digest(view.__name__, team_name, request.season_key, version)
+        etag = quote_etag(digest)
+        last_modified = timegm(updated_at.utctimetuple()) if updated_at else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            cached = await caches['charts'].aget(f'chart:{digest}')
+            headers = {}
+            if cached is None:
+                cached, headers = await _chart_flight.run(digest, lambda: _render_once(view, request, team_name, digest))
+            status, content = cached
+            response = HttpResponse(content, status=status, content_type='image/png' if content else None)
+            for name, value in headers.items():
+                response.headers[name] = value
+        if response.status_code in (200, 204, 304):
+            response.headers['ETag'] = etag
+            if last_modified is not None:
+                response.headers['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, no_cache=True)
+        return response
+    return wrapper
+
+async def _render_once(view, request, team_name, digest):
+    """Run a chart view for every request waiting on ``digest``; returns ``((status, content), headers)``."""
+    cache = caches['charts']
+    try:
+        async with file_lock(settings.SINGLE_FLIGHT_LOCK_DIR, digest, settings.SINGLE_FLIGHT_LOCK_TIMEOUT):
+            # Another process may have rendered it while this one waited for the lock
+            cached = await cache.aget(f'chart:{digest}')
+            if cached is not None:
+                record('chart', 'cached')
+                return cached, {}
+            response = await view(request, team_name)
+            parts = (response.status_code, response.content)
+            if response.status_code in (200, 204):
+                await cache.aset(f'chart:{digest}', parts)
+                return parts, {}
+    except LockTimeout:
+        record('chart', 'lock_timeout')
+        response = _busy()
+        parts = (response.status_code, response.content)
+    # Errors such as a busy renderer are shared but not cached
+    return parts, {name: value for name, value in response.headers.items() if name in ('Content-Type', 'Retry-After')}
+
+def _busy():
+    response = HttpResponse('Chart renderer is busy, try again shortly.', status=503, content_type='text/plain')
+    response.headers['Retry-After'] = str(settings.CHART_RENDER_RETRY_AFTER)
+    return response
+
+async def _chart_response(request, kind, team_name) -> HttpResponse:
+    series = await sync_to_async(_series)(team_name, request.season_key, request.data_version)
+    if not len(series): return HttpResponse(status=204)
+    try:
+        png = await render_chart(kind, team_name, request.season_key, series.columns())
+    except RenderBusy:
+        return _busy()
+    if png is None: return HttpResponse(status=204)
+    return HttpResponse(png, content_type='image/png')
 
 @require_GET
-def api_mpl_hexbin_scored_conceded(request, team_name):
-    season = request.GET.get('season')
-    if not season: return HttpResponseBadRequest('Season is required.')
-    df = _team_matches_dataframe(team_name, season)
-    if df.empty: return HttpResponse(status=204)
-    fig, ax = plt.subplots(figsize=(6,3.2), dpi=150)
-    df.plot.hexbin(x='goals_for', y='goals_against', gridsize=15, cmap='Blues', ax=ax)
-    ax.set_title(f'Density: Scored vs Conceded - {team_name} ({season})')
-    ax.set_xlabel('Goals For')
-    ax.set_ylabel('Goals Against')
-    return _png_response(fig)
+@cached_chart
+async def api_matplotlib_form_image(request, team_name):
+    return await _chart_response(request, 'form_image', team_name)
 
+# ---------- Pandas/Matplotlib endpoints (rendered in services/rendering.py) ----------
 @require_GET
-def api_mpl_box_goals_by_venue(request, team_name):
-    season = request.GET.get('season')
-    if not season: return HttpResponseBadRequest('Season is required.')
-    df = _team_matches_dataframe(team_name, season)
-    if df.empty: return HttpResponse(status=204)
-    fig, ax = plt.subplots(figsize=(6,3.2), dpi=150)
-    df.boxplot(column='goals_for', by='venue', ax=ax)
-    ax.set_title(f'Goals For by Venue - {team_name} ({season})')
-    ax.set_xlabel('')
-    ax.set_ylabel('Goals For')
-    fig.suptitle('')
-    return _png_response(fig)
+@cached_chart
+async def api_mpl_hist_goals(request, team_name):
+    return await _chart_response(request, 'hist_goals', team_name)
 
 @require_GET
-def api_mpl_corr_heatmap(request, team_name):
-    season = request.GET.get('season')
-    if not season: return HttpResponseBadRequest('Season is required.')
-    df = _team_matches_dataframe(team_name, season)
-    if df.empty: return HttpResponse(status=204)
-    cols = ['points','goals_for','goals_against','gd']
-    corr = df[cols].corr()
-    fig, ax = plt.subplots(figsize=(4.5,3.5), dpi=150)
-    cax = ax.imshow(corr, cmap='coolwarm', vmin=-1, vmax=1)
-    ax.set_xticks(range(len(cols))); ax.set_xticklabels(cols, rotation=45, ha='right')
-    ax.set_yticks(range(len(cols))); ax.set_yticklabels(cols)
-    ax.set_title(f'Correlation Heatmap - {team_name} ({season})')
-    fig.colorbar(cax, ax=ax, fraction=0.046, pad=0.04)
-    return _png_response(fig)
\ No newline at end of file
+@cached_chart
+async def api_mpl_kde_gd(request, team_name):
+    return await _chart_response(request, 'kde_gd', team_name)
+
+@require_GET
+@cached_chart
+async def api_mpl_box_points(request, team_name):
+    return await _chart_response(request, 'box_points', team_name)
+
+@require_GET
+@cached_chart
+async def api_mpl_scatter_scored_conceded(request, team_name):
+    return await _chart_response(request, 'scatter_scored_conceded', team_name)
+
+@require_GET
+@cached_chart
+async def api_mpl_hexbin_scored_conceded(request, team_name):
+    return await _chart_response(request, 'hexbin_scored_conceded', team_name)
+
+@require_GET
+@cached_chart
+async def api_mpl_box_goals_by_venue(request, team_name):
+    return await _chart_response(request, 'box_goals_by_venue', team_name)
+
+@require_GET
+@cached_chart
+async def api_mpl_corr_heatmap(request, team_name):
+    return await _chart_response(request, 'corr_heatmap', team_name)
\ No newline at end of file
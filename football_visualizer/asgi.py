@@ -14,3 +14,14 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'football_visualizer.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.DASHBOARD_PRELOAD:
+    from dashboard.services.preload import preload
+    preload()
+
+# Spawn and warm the chart rendering workers before the first request arrives
+from dashboard.services.rendering import start_pool  # noqa: E402
+
+start_pool()
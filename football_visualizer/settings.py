@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dashboard.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,6 +84,117 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Rendered chart PNGs are keyed on the season's data version, so stale entries
+# are never served and simply age out of the LRU. Set CHART_CACHE_DIR to share
+# renders between worker processes through the file system instead; that
+# backend (dashboard/cache.py) also culls least recently used files first,
+# where Django's FileBasedCache would cull a random sample.
+
+CHART_CACHE_DIR = config('CHART_CACHE_DIR', default='')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'charts': {
+        'BACKEND': 'dashboard.cache.LRUFileBasedCache',
+        'LOCATION': CHART_CACHE_DIR,
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    } if CHART_CACHE_DIR else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'charts',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': config('CHART_CACHE_MAX_ENTRIES', default=500, cast=int)},
+    },
+}
+
+
+# Identical chart renders and simulations in flight at once are computed once
+# per process (see dashboard/services/singleflight.py). With a lock directory,
+# leaders in different processes also take turns on a lock file per chart, so
+# with a shared CHART_CACHE_DIR each chart is rendered once in the deployment.
+# A request that waits longer than the timeout for another process's render
+# gets a 503 with Retry-After, as when the renderer is busy.
+
+SINGLE_FLIGHT_LOCK_DIR = config(
+    'SINGLE_FLIGHT_LOCK_DIR', default=os.path.join(CHART_CACHE_DIR, 'locks') if CHART_CACHE_DIR else ''
+)
+SINGLE_FLIGHT_LOCK_TIMEOUT = config('SINGLE_FLIGHT_LOCK_TIMEOUT', default=15.0, cast=float)
+
+# Chart rendering worker pool (see dashboard/services/rendering.py). Set the
+# worker count to 0 to render in-process instead, one chart at a time on a
+# thread beside the event loop.
+
+CHART_RENDER_WORKERS = config('CHART_RENDER_WORKERS', default=2, cast=int)
+CHART_RENDER_QUEUE = config('CHART_RENDER_QUEUE', default=8, cast=int)
+CHART_RENDER_TIMEOUT = config('CHART_RENDER_TIMEOUT', default=10.0, cast=float)
+CHART_RENDER_RETRY_AFTER = 2
+
+# Monte Carlo season simulation (see dashboard/services/simulation.py). Runs of
+# more than 10,000 seasons are split across SIMULATION_WORKERS processes; set
+# it to 1 to simulate on the request thread. Results are cached per season,
+# data version, matchday and run count.
+
+SIMULATION_WORKERS = config('SIMULATION_WORKERS', default=2, cast=int)
+SIMULATION_RUNS = config('SIMULATION_RUNS', default=10000, cast=int)
+SIMULATION_MAX_RUNS = config('SIMULATION_MAX_RUNS', default=200000, cast=int)
+SIMULATION_RELEGATION_PLACES = config('SIMULATION_RELEGATION_PLACES', default=3, cast=int)
+SIMULATION_CACHE_TIMEOUT = config('SIMULATION_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Match predictions (see dashboard/services/prediction.py): a Dixon-Coles model
+# per season, fitted on it and the PREDICTION_WINDOW - 1 seasons before, with
+# match weights halving every PREDICTION_HALF_LIFE_DAYS (0 weighs all equally).
+
+PREDICTION_WINDOW = config('PREDICTION_WINDOW', default=3, cast=int)
+PREDICTION_HALF_LIFE_DAYS = config('PREDICTION_HALF_LIFE_DAYS', default=240.0, cast=float)
+PREDICTION_MAX_ITERATIONS = 500
+PREDICTION_TOLERANCE = 1e-6
+PREDICTION_MAX_PAIRS = 500
+
+# /api/matches/: JSON page sizes, and rows fetched per database round trip
+# (and per streamed chunk) in CSV/NDJSON exports
+
+EXPORT_PAGE_SIZE = 100
+EXPORT_MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Content-addressed cache of downloaded StatsBomb open-data files (see
+# dashboard/services/statsbomb.py); import_statsbomb --cache-dir overrides it
+
+STATSBOMB_CACHE_DIR = config('STATSBOMB_CACHE_DIR', default=str(BASE_DIR / '.statsbomb-cache'))
+
+# Season-partitioned Parquet copies of imported match data (see
+# dashboard/services/staging.py), written by stage_matches and
+# import_statsbomb --stage and read by load_matches --parquet. Needs pyarrow
+
+STAGING_DIR = config('STAGING_DIR', default=str(BASE_DIR / 'staging'))
+
+# Server-Sent Events at /api/live/ (see dashboard/services/push.py). Each
+# season with listeners checks its data version every PUSH_POLL_INTERVAL
+# seconds; idle connections get a keep-alive comment every PUSH_KEEPALIVE.
+
+PUSH_POLL_INTERVAL = config('PUSH_POLL_INTERVAL', default=1.0, cast=float)
+PUSH_KEEPALIVE = config('PUSH_KEEPALIVE', default=15.0, cast=float)
+PUSH_QUEUE_SIZE = 16
+
+# Import the analytics (and, rendering in-process, the chart) stack when the
+# WSGI/ASGI application loads, e.g. in the gunicorn master with --preload
+DASHBOARD_PRELOAD = config('DASHBOARD_PRELOAD', default=False, cast=bool)
+
+
+# Request instrumentation (see dashboard/services/timing.py). Per-request
+# timings are sent as a Server-Timing header and aggregated at /metrics.
+# CHART_PROFILE_EVERY > 0 runs one chart render in every N under cProfile and
+# writes the stats to CHART_PROFILE_DIR.
+
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+CHART_PROFILE_EVERY = config('CHART_PROFILE_EVERY', default=0, cast=int)
+CHART_PROFILE_DIR = config('CHART_PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 